@@ -0,0 +1,269 @@
+# Vectorised persistence/cooldown alert engine
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def index_ns(index: pd.Index) -> np.ndarray:
+    """Return a DatetimeIndex as raw int64 nanoseconds (UTC for tz-aware indexes)."""
+    return np.asarray(index.values.astype("datetime64[ns]")).view("int64")
+
+
+def cooldown_ns(cooldown_h: float) -> int:
+    return int(pd.Timedelta(hours=cooldown_h).value)
+
+
+def run_bounds(above: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(starts, ends)`` of the runs of True values; each run covers ``[start, end)``."""
+    padded = np.concatenate(([False], np.asarray(above, dtype=bool), [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[0::2], edges[1::2]
+
+
+def fire_indices(
+    above: np.ndarray,
+    times_ns: np.ndarray,
+    persist_k: int,
+    cooldown: int,
+) -> np.ndarray:
+    """Positions at which alerts fire for a boolean ``above`` mask.
+
+    An alert fires on the ``persist_k``-th consecutive point above threshold.
+    After firing, scanning resumes at the end of the run or at the first point
+    whose timestamp is at least ``cooldown`` nanoseconds after the alert,
+    whichever is later. A scan that resumes mid-run treats the rest of that run
+    as a fresh run. Python-level work is proportional to the number of alerts,
+    not the number of points.
+    """
+    starts, ends = run_bounds(above)
+    return fire_indices_from_runs(starts, ends, times_ns, persist_k, cooldown)
+
+
+def fire_indices_from_runs(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    times_ns: np.ndarray,
+    persist_k: int,
+    cooldown: int,
+    monotonic: Optional[bool] = None,
+) -> np.ndarray:
+    """:func:`fire_indices` on a precomputed run decomposition (see :func:`run_bounds`)."""
+    if persist_k < 1:
+        raise ValueError("persist_k must be >= 1")
+    if not len(starts):
+        return np.empty(0, dtype=np.int64)
+
+    qualifying = np.flatnonzero(ends - starts >= persist_k)
+    if monotonic is None:
+        monotonic = is_monotonic(times_ns)
+    n = len(times_ns)
+    fires = []
+    pos = 0
+
+    while True:
+        # First run that still has points at or after ``pos``.
+        r = int(np.searchsorted(ends, pos, side="right"))
+        if r >= len(starts):
+            break
+
+        start = max(int(starts[r]), pos)
+        end = int(ends[r])
+        if end - start < persist_k:
+            q = int(np.searchsorted(qualifying, r + 1))
+            if q >= len(qualifying):
+                break
+            r = int(qualifying[q])
+            start, end = int(starts[r]), int(ends[r])
+
+        fire = start + persist_k - 1
+        fires.append(fire)
+        cool_until = times_ns[fire] + cooldown
+        if monotonic:
+            pos = max(end, int(np.searchsorted(times_ns, cool_until, side="left")))
+        else:
+            later = times_ns[end:] >= cool_until
+            pos = end + int(np.argmax(later)) if later.any() else n
+
+    return np.asarray(fires, dtype=np.int64)
+
+
+def segmented_fire_indices(
+    above: np.ndarray,
+    times_ns: np.ndarray,
+    offsets: np.ndarray,
+    persist_k: int,
+    cooldown: int,
+) -> np.ndarray:
+    """:func:`fire_indices` on each segment ``[offsets[i], offsets[i + 1])`` of concatenated series, in one scan.
+
+    Runs are cut at segment boundaries and each segment's clock is moved past
+    the previous segment's end plus ``cooldown``, so neither persistence nor
+    cooldown carries from one series into the next. Each segment's timestamps
+    must be sorted.
+    """
+    above = np.asarray(above, dtype=bool)
+    times_ns = np.asarray(times_ns, dtype=np.int64)
+    offsets = np.unique(np.asarray(offsets, dtype=np.int64))  # drops empty segments
+    if len(above) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    starts, ends = run_bounds(above)
+    inner = offsets[(offsets > 0) & (offsets < len(above))]
+    cut = inner[above[inner - 1] & above[inner]]
+    if len(cut):
+        starts, ends = np.sort(np.concatenate((starts, cut))), np.sort(np.concatenate((ends, cut)))
+
+    first, last = times_ns[offsets[:-1]], times_ns[offsets[1:] - 1]
+    base = np.concatenate(([0], np.cumsum(last - first + cooldown + 1)[:-1]))
+    shift = np.repeat(base - first, np.diff(offsets))
+    return fire_indices_from_runs(starts, ends, times_ns + shift, persist_k, cooldown, monotonic=True)
+
+
+def is_monotonic(times_ns: np.ndarray) -> bool:
+    return bool(np.all(times_ns[1:] >= times_ns[:-1]))
+
+
+def sweep_fire_indices(
+    prob: np.ndarray,
+    mult: np.ndarray,
+    times_ns: np.ndarray,
+    base_thrs: Sequence[float],
+    persist_ks: Sequence[int],
+    cooldowns_h: Sequence[float],
+) -> Iterator[Tuple[float, int, float, np.ndarray]]:
+    """Yield ``(base_thr, persist_k, cooldown_h, fires)`` for every grid combination.
+
+    The above-threshold mask and its run decomposition are built once per
+    ``base_thr`` and shared by every ``persist_k``/``cooldown_h`` pair.
+    """
+    monotonic = is_monotonic(times_ns)
+    for base_thr in base_thrs:
+        starts, ends = run_bounds(prob >= base_thr * mult)
+        for persist_k in persist_ks:
+            for cooldown_h in cooldowns_h:
+                fires = fire_indices_from_runs(starts, ends, times_ns, persist_k, cooldown_ns(cooldown_h), monotonic)
+                yield base_thr, persist_k, cooldown_h, fires
+
+
+def breach_events(dp: np.ndarray, limit: float) -> np.ndarray:
+    """Indices where ``dp`` first crosses ``limit`` from below (the notebook's ``first_crossings``)."""
+    dp = np.asarray(dp, dtype=float)
+    crossing = np.zeros(len(dp), dtype=bool)
+    crossing[1:] = (dp[:-1] < limit) & (dp[1:] >= limit)
+    return np.flatnonzero(crossing)
+
+
+def lead_times_ns(alert_ns: np.ndarray, event_ns: np.ndarray, horizon: int) -> np.ndarray:
+    """Time from each alert to the next breach event, for alerts that precede an event by at most ``horizon``."""
+    if not len(alert_ns) or not len(event_ns):
+        return np.empty(0, dtype=np.int64)
+    nxt = np.searchsorted(event_ns, alert_ns, side="left")
+    has_next = nxt < len(event_ns)
+    leads = event_ns[nxt[has_next]] - alert_ns[has_next]
+    return leads[(leads > 0) & (leads <= horizon)]
+
+
+def covered_events(alert_ns: np.ndarray, event_ns: np.ndarray, horizon: int) -> int:
+    """Number of events preceded by at least one alert within ``horizon`` (sorted inputs)."""
+    if not len(alert_ns) or not len(event_ns):
+        return 0
+    first = np.searchsorted(alert_ns, event_ns - horizon, side="left")
+    found = first < len(alert_ns)
+    return int(np.count_nonzero(alert_ns[first[found]] < event_ns[found]))
+
+
+def alert_flags(
+    prob: np.ndarray,
+    thr: np.ndarray,
+    times_ns: np.ndarray,
+    persist_k: int,
+    cooldown_h: float,
+) -> np.ndarray:
+    """0/1 alert flags for raw probability/threshold arrays."""
+    above = np.asarray(prob >= thr, dtype=bool)
+    flags = np.zeros(len(above), dtype=int)
+    flags[fire_indices(above, times_ns, persist_k, cooldown_ns(cooldown_h))] = 1
+    return flags
+
+
+@dataclass(frozen=True)
+class AlertState:
+    """Where the alert scan stands after the last processed row.
+
+    ``run_length`` counts trailing above-threshold points the scan is still
+    accumulating towards ``persist_k``. ``in_fired_run`` means the trailing run
+    already fired and is being skipped. ``cool_until`` (int64 ns) is the pending
+    cooldown end once that run has finished.
+    """
+
+    persist_k: int
+    cooldown_h: float
+    processed: int = 0
+    last_ts: Optional[int] = None
+    run_length: int = 0
+    in_fired_run: bool = False
+    cool_until: Optional[int] = None
+
+
+def _first_at_or_after(times_ns: np.ndarray, start: int, cutoff: int) -> int:
+    """First index ``>= start`` whose timestamp is ``>= cutoff``, or ``len(times_ns)``."""
+    later = times_ns[start:] >= cutoff
+    return start + int(np.argmax(later)) if later.any() else len(times_ns)
+
+
+def advance_alerts(state: AlertState, above: np.ndarray, times_ns: np.ndarray) -> Tuple[AlertState, np.ndarray]:
+    """Feed newly appended rows through the alert scan.
+
+    Returns the new state and the global positions of alerts fired among the
+    new rows. Feeding a series in any number of batches yields the same alerts
+    as :func:`fire_indices` over the whole series.
+    """
+    above = np.asarray(above, dtype=bool)
+    times_ns = np.asarray(times_ns, dtype=np.int64)
+    m = len(above)
+    if not m:
+        return state, np.empty(0, dtype=np.int64)
+
+    cooldown = cooldown_ns(state.cooldown_h)
+    done = replace(state, processed=state.processed + m, last_ts=int(times_ns[-1]))
+    pos = 0
+
+    if state.in_fired_run:
+        pos = int(np.argmin(above)) if not above.all() else m
+        if pos == m:
+            return done, np.empty(0, dtype=np.int64)
+    if state.cool_until is not None:
+        pos = _first_at_or_after(times_ns, pos, state.cool_until)
+        if pos == m:
+            return replace(done, run_length=0, in_fired_run=False), np.empty(0, dtype=np.int64)
+
+    # A pending run is replayed as ``run_length`` leading True points; it is
+    # shorter than persist_k, so no alert can fire inside the padding.
+    pad = state.run_length if pos == 0 else 0
+    seg_above = np.concatenate((np.ones(pad, dtype=bool), above[pos:]))
+    seg_times = np.concatenate((np.full(pad, np.iinfo(np.int64).min), times_ns[pos:]))
+    starts, ends = run_bounds(seg_above)
+    fires = fire_indices_from_runs(starts, ends, seg_times, state.persist_k, cooldown)
+
+    new_fires = fires - pad + pos + state.processed
+
+    # Work out where the scan stopped, exactly as fire_indices would have.
+    n = len(seg_above)
+    tail = replace(done, run_length=0, in_fired_run=False, cool_until=None)
+    scan_from = 0
+    if len(fires):
+        fire = int(fires[-1])
+        run_end = int(ends[np.searchsorted(ends, fire, side="right")])
+        cool_until = int(seg_times[fire]) + cooldown
+        if run_end == n:
+            return replace(tail, in_fired_run=True, cool_until=cool_until), new_fires
+        scan_from = _first_at_or_after(seg_times, run_end, cool_until)
+        if scan_from == n:
+            return replace(tail, cool_until=cool_until), new_fires
+    if n and seg_above[-1]:
+        tail = replace(tail, run_length=n - max(int(starts[-1]), scan_from))
+    return tail, new_fires
@@ -0,0 +1,78 @@
+# Per-asset KPI partitions: outputs/assets/<asset_id>/kpis_breach7d.{parquet,feather,csv}
+#
+#   python -m backend.assets add --id C-101 --src outputs/kpis_breach7d.csv
+#   python -m backend.assets split --src fleet_kpis.parquet --column asset_id
+from __future__ import annotations
+
+import argparse
+import re
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from . import kpi_store
+
+ASSET_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+# Same preference as the single-asset store: columnar first, the notebook's CSV last.
+STORE_SUFFIXES = (".parquet", ".feather", ".csv")
+
+
+def valid_id(asset_id: str) -> bool:
+    return bool(ASSET_ID.match(asset_id)) and asset_id not in (".", "..")
+
+
+def asset_store(root: Path, asset_id: str) -> Optional[Path]:
+    """The KPI store of ``asset_id``, or ``None`` for unknown (or malformed) ids."""
+    if not valid_id(asset_id):
+        return None
+    for suffix in STORE_SUFFIXES:
+        path = kpi_store.store_path(root / asset_id, suffix)
+        if kpi_store.readable(path):
+            return path
+    return None
+
+
+def asset_ids(root: Path) -> List[str]:
+    """Ids of every partition under ``root`` holding a readable KPI store, sorted.
+
+    Only directory names are listed; no store is opened until an asset is requested.
+    """
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir() and asset_store(root, p.name) is not None)
+
+
+def add_asset(root: Path, asset_id: str, df: pd.DataFrame, suffix: str = ".parquet") -> Path:
+    if not valid_id(asset_id):
+        raise ValueError(f"Invalid asset id {asset_id!r}; use letters, digits, '_', '-' or '.'.")
+    return kpi_store.write_kpis(df, kpi_store.store_path(root / asset_id, suffix))
+
+
+def main() -> None:
+    from .server import ASSETS_DIR
+
+    parser = argparse.ArgumentParser(description="Manage the per-asset KPI partitions.")
+    parser.add_argument("--root", type=Path, default=ASSETS_DIR)
+    parser.add_argument("--format", choices=["parquet", "feather", "csv"], default="parquet")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Copy one asset's KPI file into its partition.")
+    add.add_argument("--id", required=True)
+    add.add_argument("--src", type=Path, required=True)
+    split = sub.add_parser("split", help="Partition a long-format KPI file by an asset column.")
+    split.add_argument("--src", type=Path, required=True)
+    split.add_argument("--column", default="asset_id")
+    args = parser.parse_args()
+
+    suffix = f".{args.format}"
+    if args.command == "add":
+        print(f"Wrote {add_asset(args.root, args.id, kpi_store.read_kpis(args.src), suffix)}")
+    else:
+        df = kpi_store.read_kpis(args.src)
+        for asset_id, part in df.groupby(args.column, observed=True, sort=True):
+            path = add_asset(args.root, str(asset_id), part.drop(columns=args.column), suffix)
+            print(f"Wrote {len(part):,d} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# Batched CPU scoring with the LSTM autoencoder (score_ae)
+#
+#   python -m backend.autoencoder --out outputs/ae_errors.npy
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+WINDOW = 64
+BATCH_SIZE = 512
+
+Progress = Callable[[int, int], None]
+
+
+def load_keras_model(path: Path) -> Any:
+    """Load the ``.keras`` artifact on the CPU (Keras/TensorFlow are imported only here)."""
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    import keras
+
+    return keras.models.load_model(path, compile=False)
+
+
+def window_view(X: np.ndarray, window: int) -> np.ndarray:
+    """All ``window``-long windows of the rows of ``X`` as a zero-copy ``(n - window + 1, window, cols)`` view."""
+    return sliding_window_view(X, window, axis=0).transpose(0, 2, 1)
+
+
+class AutoencoderScorer:
+    """Reconstruction-error scoring over 64-step windows, one batch of windows at a time.
+
+    Windows are views into the scaled input, so only the batch being scored is
+    ever copied; memory stays at ``batch_size * window * cols`` floats however
+    long the series is.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[np.ndarray], np.ndarray],
+        scaler: Any,
+        minmax: Any,
+        cols: Sequence[str],
+        window: int = WINDOW,
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
+        self.predict = predict
+        self.scaler = scaler
+        self.minmax = minmax
+        self.cols = list(cols)
+        self.window = window
+        self.batch_size = batch_size
+
+    @classmethod
+    def load(cls, art_dir: Path, manifest: dict, batch_size: int = BATCH_SIZE) -> "AutoencoderScorer":
+        import joblib
+
+        model = load_keras_model(art_dir / "lstm_autoencoder.keras")
+        return cls(
+            model.predict_on_batch,
+            joblib.load(art_dir / "lstm_scaler.joblib"),
+            joblib.load(art_dir / "lstm_minmax.joblib"),
+            manifest["lstm_cols"],
+            int(manifest.get("lstm_window", WINDOW)),
+            batch_size,
+        )
+
+    def prepare(self, frame: pd.DataFrame) -> np.ndarray:
+        """Gap-fill and standardise the AE columns into a contiguous float32 array, as in training."""
+        values = frame[self.cols].ffill().bfill().to_numpy(dtype=float)
+        return np.ascontiguousarray(self.scaler.transform(values), dtype=np.float32)
+
+    def n_windows(self, n_rows: int) -> int:
+        return max(0, n_rows - self.window + 1)
+
+    def errors(
+        self,
+        X: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        start: int = 0,
+        progress: Optional[Progress] = None,
+    ) -> np.ndarray:
+        """Mean squared reconstruction error of every window of ``X``, aligned to window ends.
+
+        Results go into ``out`` batch by batch (an ``np.memmap`` makes the
+        writes land on disk as they happen); ``start`` resumes from that window.
+        """
+        windows = window_view(X, self.window)
+        total = len(windows)
+        if out is None:
+            out = np.empty(total, dtype=np.float32)
+        for lo in range(start, total, self.batch_size):
+            hi = min(lo + self.batch_size, total)
+            batch = np.ascontiguousarray(windows[lo:hi])
+            recon = np.asarray(self.predict(batch))
+            out[lo:hi] = np.square(batch - recon).mean(axis=(1, 2))
+            if progress is not None:
+                progress(hi, total)
+        return out
+
+    def normalise(self, errors: np.ndarray) -> np.ndarray:
+        return self.minmax.transform(np.asarray(errors, dtype=float).reshape(-1, 1)).ravel()
+
+    def score(self, frame: pd.DataFrame) -> pd.Series:
+        """``score_ae`` for every row of ``frame``; rows before the first full window are NaN."""
+        errors = self.errors(self.prepare(frame))
+        out = np.full(len(frame), np.nan)
+        out[self.window - 1 :] = self.normalise(errors)
+        return pd.Series(out, index=frame.index, name="score_ae")
+
+
+def open_errors(path: Path, n_windows: int) -> np.ndarray:
+    """A float32 ``.npy`` memmap for ``n_windows`` errors, reopened in place when the shape matches."""
+    if path.exists():
+        existing = np.load(path, mmap_mode="r+")
+        if existing.shape == (n_windows,) and existing.dtype == np.float32:
+            return existing
+    return np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n_windows,))
+
+
+def main() -> None:
+    from .server import ART_DIR, load_manifest
+
+    parser = argparse.ArgumentParser(description="Score the raw time series with the LSTM autoencoder.")
+    parser.add_argument("--src", type=Path, default=ART_DIR / "base_timeseries.parquet")
+    parser.add_argument("--out", type=Path, required=True, help=".npy file receiving the raw errors")
+    parser.add_argument("--artifacts", type=Path, default=ART_DIR)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--start", type=int, default=0, help="window to resume from")
+    args = parser.parse_args()
+
+    scorer = AutoencoderScorer.load(args.artifacts, load_manifest(args.artifacts), args.batch_size)
+    X = scorer.prepare(pd.read_parquet(args.src))
+    out = open_errors(args.out, scorer.n_windows(len(X)))
+
+    began = time.perf_counter()
+
+    def report(done: int, total: int) -> None:
+        if done == total or (done // args.batch_size) % 20 == 0:
+            rate = (done - args.start) / (time.perf_counter() - began)
+            print(f"{done:,d}/{total:,d} windows  {rate:,.0f} windows/s", flush=True)
+
+    scorer.errors(X, out, args.start, report)
+    out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Benchmark: vectorised derive_alerts vs the original per-row loop
+#
+#   python -m backend.benchmarks.bench_alerts --years 1 10
+from __future__ import annotations
+
+import argparse
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.alerts import AlertState, advance_alerts, index_ns
+from backend.server import derive_alerts
+
+from .synthetic import make_kpi_frame
+
+MULTIPLIERS = {"normal": 1.0, "post_startup": 1.1, "low_load": 1.2, "shutdown": 1.3}
+
+
+def reference_derive_alerts(prob_s: pd.Series, thr_s: pd.Series, persist_k: int, cooldown_h: int) -> pd.Series:
+    """The original while-loop implementation, kept as the correctness oracle."""
+    above = (prob_s >= thr_s).astype(int)
+    alerts = np.zeros(len(above), dtype=int)
+    times = prob_s.index
+    i = 0
+
+    while i < len(above):
+        if above.iloc[i]:
+            j = i
+            while j < len(above) and above.iloc[j]:
+                j += 1
+
+            length = j - i
+            if length >= persist_k:
+                fire_idx = i + persist_k - 1
+                alerts[fire_idx] = 1
+                cool_until = times[fire_idx] + pd.Timedelta(hours=cooldown_h)
+
+                while j < len(times) and times[j] < cool_until:
+                    j += 1
+            i = j
+        else:
+            i += 1
+
+    return pd.Series(alerts, index=prob_s.index, name="alert_flag")
+
+
+def _best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def check_incremental(prob: pd.Series, thr: pd.Series, persist_k: int, cooldown_h: int, seed: int = 0) -> float:
+    """Feed the series through advance_alerts in random batches; assert it matches a full recompute.
+
+    Returns the mean time of a single one-row append once the history has been processed.
+    """
+    expected = np.flatnonzero(derive_alerts(prob, thr, persist_k, cooldown_h).to_numpy())
+    above = (prob >= thr).to_numpy()
+    times = index_ns(prob.index)
+    rng = np.random.default_rng(seed)
+    state, fired, pos = AlertState(persist_k, cooldown_h), [], 0
+    while pos < len(above):
+        step = int(rng.integers(1, 2000))
+        state, fires = advance_alerts(state, above[pos : pos + step], times[pos : pos + step])
+        fired.append(fires)
+        pos += step
+    np.testing.assert_array_equal(np.concatenate(fired), expected)
+
+    # Replay the final 500 rows one at a time to time the steady-state append path.
+    state, _ = advance_alerts(AlertState(persist_k, cooldown_h), above[:-500], times[:-500])
+    start = time.perf_counter()
+    for i in range(len(above) - 500, len(above)):
+        state, _ = advance_alerts(state, above[i : i + 1], times[i : i + 1])
+    return (time.perf_counter() - start) / 500
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark derive_alerts against the per-row loop.")
+    parser.add_argument("--years", type=float, nargs="+", default=[1.0, 10.0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for years in args.years:
+        df = make_kpi_frame(years)
+        prob = df["prob_breach7d"]
+        thr = 0.10 * df["regime"].map(MULTIPLIERS).astype(float)
+
+        # Equivalence over a parameter grid on (at most) the first year before timing anything.
+        head_p, head_t = prob.iloc[:35040], thr.iloc[:35040]
+        for scale, k, cd in itertools.product([0.5, 1.0, 2.0], [1, 3, 5, 12], [1, 48, 168]):
+            expected = reference_derive_alerts(head_p, head_t * scale, k, cd)
+            pd.testing.assert_series_equal(derive_alerts(head_p, head_t * scale, k, cd), expected)
+
+        t_ref, expected = _best_of(lambda: reference_derive_alerts(prob, thr, 5, 48), 1)
+        t_new, actual = _best_of(lambda: derive_alerts(prob, thr, 5, 48), args.repeat)
+        pd.testing.assert_series_equal(actual, expected)
+        print(
+            f"{years:>5.1f}y rows={len(df):>8,d}  loop={t_ref * 1e3:9.1f} ms  "
+            f"vectorised={t_new * 1e3:7.2f} ms  speedup={t_ref / t_new:8.1f}x"
+        )
+
+        t_append = min(check_incremental(prob, thr * scale, k, 48, seed=k) for scale in (0.5, 1.0) for k in (1, 5))
+        print(f"{'':>6s} incremental append of one row: {t_append * 1e6:7.1f} us (matches full recompute)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Benchmark: LSTM autoencoder scoring over a year, sliding-window views vs stacked window copies
+#
+#   python -m backend.benchmarks.bench_autoencoder --batch-sizes 128 512 2048
+from __future__ import annotations
+
+import argparse
+import resource
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.autoencoder import AutoencoderScorer
+from backend.server import ART_DIR, load_manifest
+
+
+def stacked_windows(X: np.ndarray, window: int) -> np.ndarray:
+    """The notebook's ``make_windows``: every window copied into one array."""
+    return np.stack([X[start : start + window] for start in range(len(X) - window + 1)])
+
+
+def _measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Throughput and memory of AE scoring.")
+    parser.add_argument("--src", default=str(ART_DIR / "base_timeseries.parquet"))
+    parser.add_argument("--artifacts", type=Path, default=ART_DIR)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[128, 512, 2048])
+    parser.add_argument("--skip-reference", action="store_true", help="skip the stacked-copy baseline")
+    args = parser.parse_args()
+
+    scorer = AutoencoderScorer.load(args.artifacts, load_manifest(args.artifacts))
+    X = scorer.prepare(pd.read_parquet(args.src))
+    n = scorer.n_windows(len(X))
+    scorer.predict(np.ascontiguousarray(X[None, : scorer.window]))  # warm-up
+    print(f"{len(X):,d} rows -> {n:,d} windows of {scorer.window}x{len(scorer.cols)}")
+
+    reference = None
+    if not args.skip_reference:
+        model = scorer.predict.__self__
+        windows, build, build_peak = _measure(lambda: stacked_windows(X, scorer.window))
+        recon, elapsed, _ = _measure(lambda: model.predict(windows, verbose=0))
+        reference = np.square(windows - recon).mean(axis=(1, 2))
+        print(
+            f"  {'stacked copy + predict':<24s} {n / (build + elapsed):8,.0f} windows/s"
+            f"  window memory {build_peak / 1e6:8.1f} MB"
+        )
+        del windows, recon
+
+    for size in args.batch_sizes:
+        scorer.batch_size = size
+        errors, elapsed, peak = _measure(lambda: scorer.errors(X))
+        line = f"  {f'views, batch {size}':<24s} {n / elapsed:8,.0f} windows/s  window memory {peak / 1e6:8.1f} MB"
+        if reference is not None:
+            line += f"  max |diff| {float(np.max(np.abs(errors - reference))):.1e}"
+        print(line)
+
+    print(f"process peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
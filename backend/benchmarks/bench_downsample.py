@@ -0,0 +1,45 @@
+# Benchmark: /api/kpis payload size and build time with and without max_points downsampling
+#
+#   python -m backend.benchmarks.bench_downsample --years 1 --lookback-days 365 --max-points 1000 5000
+from __future__ import annotations
+
+import argparse
+import time
+
+from backend.serialization import dumps
+from backend.server import build_kpis_payload
+
+from .synthetic import make_kpi_frame
+
+PARAMS = dict(base_thr=0.10, persist_k=5, cooldown_h=48)
+MULTIPLIERS = dict(m_normal=1.0, m_post=1.1, m_low=1.2, m_shut=1.3)
+
+
+def _measure(df, lookback_days: int, max_points, repeat: int) -> tuple[int, int, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = build_kpis_payload(df, **PARAMS, **MULTIPLIERS, lookback_days=lookback_days, max_points=max_points)
+        body = dumps(payload)
+        best = min(best, time.perf_counter() - start)
+    return len(payload["items"]), len(body), best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Downsampled vs full /api/kpis payloads.")
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--lookback-days", type=int, default=365)
+    parser.add_argument("--max-points", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_kpi_frame(args.years)
+    print(f"{len(df):,d} rows, lookback {args.lookback_days} days")
+    for max_points in [None, *args.max_points]:
+        points, size, secs = _measure(df, args.lookback_days, max_points, args.repeat)
+        label = "full" if max_points is None else f"max_points={max_points}"
+        print(f"  {label:18s} {points:8,d} points  {size / 1e6:7.2f} MB  {secs * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
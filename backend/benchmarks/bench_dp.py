@@ -0,0 +1,85 @@
+# Benchmark: streaming DP baseline/excess/AUC/smoothing vs recomputing the pandas windows per sample
+#
+#   python -m backend.benchmarks.bench_dp --years 1 --samples 500
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.dp import BASELINE_SMOOTH_STEPS, BASELINE_STEPS, DP_COLUMNS, StreamingDP, dp_features
+
+from .synthetic import DP_COL, make_kpi_frame
+
+
+def check(dp: pd.Series, splits: int, checkpoint: Path) -> None:
+    """Stream ``dp`` in ``splits`` batches, restarting from the checkpoint between them; compare to pandas."""
+    expected = dp_features(dp)
+    state, parts = StreamingDP(), []
+    for batch in np.array_split(np.arange(len(dp)), splits):
+        # Overlap the previous batch: already-seen samples must be skipped.
+        parts.append(state.run(dp.iloc[max(batch[0] - 10, 0) : batch[-1] + 1]))
+        state.save(checkpoint)
+        state = StreamingDP.load(checkpoint)
+    streamed = pd.concat(parts)
+    if not streamed.index.equals(expected.index):
+        raise AssertionError("streamed rows do not line up with the series")
+    for col in DP_COLUMNS:
+        if not np.array_equal(streamed[col].to_numpy(), expected[col].to_numpy(), equal_nan=True):
+            raise AssertionError(f"streamed {col} differs from pandas")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-sample cost of the streaming DP auxiliaries.")
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--samples", type=int, default=500, help="live samples to time")
+    parser.add_argument("--splits", type=int, default=7, help="checkpoint/restart points in the parity check")
+    args = parser.parse_args()
+
+    dp = make_kpi_frame(years=args.years)[DP_COL]
+    # Sensor dropouts and an outage, so NaN handling is part of the check.
+    rng = np.random.default_rng(0)
+    dp[rng.random(len(dp)) < 0.02] = np.nan
+    dp.iloc[len(dp) // 3 : len(dp) // 3 + 300] = np.nan
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = Path(tmp) / "dp_state.pkl"
+        start = time.perf_counter()
+        check(dp, args.splits, checkpoint)
+        print(f"{len(dp):,d} samples, {args.splits} restarts: identical to pandas ({time.perf_counter() - start:.1f} s)")
+
+        history, live = dp.iloc[: -args.samples], dp.iloc[-args.samples :]
+        state = StreamingDP()
+        state.run(history)
+        values = live.tolist()
+        start = time.perf_counter()
+        for value in values:
+            state.update(value)
+        streaming = (time.perf_counter() - start) / len(values)
+
+        start = time.perf_counter()
+        state.save(checkpoint)
+        save = time.perf_counter() - start
+        start = time.perf_counter()
+        StreamingDP.load(checkpoint)
+        load = time.perf_counter() - start
+        size = checkpoint.stat().st_size
+
+    # What a batch costs without the state: the baseline's look-back recomputed in pandas.
+    span = BASELINE_STEPS + BASELINE_SMOOTH_STEPS
+    start = time.perf_counter()
+    for end in range(len(history) + 1, len(dp) + 1):
+        dp_features(dp.iloc[end - span : end]).iloc[-1]
+    recompute = (time.perf_counter() - start) / len(values)
+
+    print(f"  streaming update      {streaming * 1e6:9.1f} us/sample")
+    print(f"  pandas recompute      {recompute * 1e6:9.1f} us/sample  ({recompute / streaming:.0f}x slower)")
+    print(f"  checkpoint            {size / 1e3:9.1f} kB  save {save * 1e3:.2f} ms  load {load * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Benchmark: peak memory and time of /api/export_kpis, whole-frame CSV vs chunked streaming encoders
+#
+#   python -m backend.benchmarks.bench_export --years 1 5
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from backend import export, kpi_store
+from backend.server import _export_frames, load_kpis_versioned, regime_multipliers, tuned_alerts
+
+from .synthetic import make_kpi_frame
+
+PARAMS = dict(base_thr=0.10, persist_k=5, cooldown_h=48)
+MULTIPLIERS = dict(m_normal=1.0, m_post=1.1, m_low=1.2, m_shut=1.3)
+MODES = (("whole frame", "csv", None), ("csv", "csv", None), ("csv gzip", "csv", "gzip"),
+         ("csv zstd", "csv", "zstd"), ("parquet", "parquet", None), ("parquet zstd", "parquet", "zstd"))
+
+
+def _export(store: Path, mode: str, file_format: str, compression) -> int:
+    mult_map = regime_multipliers(*MULTIPLIERS.values())
+    if mode == "whole frame":
+        # What the endpoint did before: copy the cached full frame and render it in one go.
+        cached, _ = load_kpis_versioned(None, store)
+        df = cached.copy()
+        df["threshold_eff"], df["alert_flag"] = tuned_alerts(df, None, **PARAMS, mult_map=mult_map)
+        return len(df.to_csv(index=True).encode("utf-8"))
+    frames = _export_frames([(None, store)], **PARAMS, mult_map=mult_map, start=None, end=None)
+    return sum(len(data) for data in export.encode(frames, file_format, compression))
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as handle:
+        return int(handle.read().split()[1]) * resource.getpagesize() / 1e6
+
+
+def _run(store: Path, mode: str, file_format: str, compression, results) -> None:
+    # Export once first, so imports and the caches a running server holds are in place.
+    _export(store, mode, file_format, compression)
+    # ru_maxrss already holds the import-time peak, so sample the current RSS instead (Linux).
+    base = peak = _rss_mb()
+    done = threading.Event()
+
+    def sample() -> None:
+        nonlocal peak
+        while not done.wait(0.002):
+            peak = max(peak, _rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    size = _export(store, mode, file_format, compression)
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    results.put((size, elapsed, max(peak, _rss_mb()) - base))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export memory and time by encoder.")
+    parser.add_argument("--years", type=float, nargs="+", default=[1.0, 5.0])
+    args = parser.parse_args()
+
+    # A fresh process per run keeps the peak-RSS figures independent.
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for years in args.years:
+            store = kpi_store.write_kpis(make_kpi_frame(years), Path(tmp) / f"kpis_{years:g}y.parquet")
+            print(f"{years:g} year(s), Parquet store {store.stat().st_size / 1e6:.1f} MB")
+            for mode, file_format, compression in MODES:
+                results = ctx.Queue()
+                proc = ctx.Process(target=_run, args=(store, mode, file_format, compression, results))
+                proc.start()
+                size, elapsed, peak = results.get()
+                proc.join()
+                print(f"  {mode:<13s} {size / 1e6:8.1f} MB  {elapsed * 1e3:8.0f} ms  peak RSS +{peak:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Benchmark: streaming rolling features vs recomputing the pandas windows for every new sample
+#
+#   python -m backend.benchmarks.bench_features --samples 500
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from backend.features import WINDOWS, StreamingFeatures, offline_features
+
+from .synthetic import make_kpi_frame
+
+TAGS = ("75PDI853.pv", "dp_smooth_mbar", "dp_excess_mbar", "dp_auc_cum_mbar_h", "health_score", "score_blended")
+
+
+def check(df, tol: float) -> float:
+    """Largest difference between the streamed and pandas features, relative to each tag's spread.
+
+    Near-constant windows put both sides' std at the square root of round-off,
+    so differences are scaled by the tag's standard deviation rather than the
+    feature value alone.
+    """
+    streamed = StreamingFeatures(TAGS).run(df)
+    expected = offline_features(df, TAGS)
+    if not (streamed.isna() == expected.isna()).all().all():
+        raise AssertionError("streamed and pandas features disagree on missing values")
+    scale = np.concatenate(
+        [np.full(len(expected.columns) // len(TAGS), df[tag].std()) for tag in TAGS]
+    )
+    worst = float(np.nanmax(((streamed - expected).abs() / (expected.abs() + scale)).to_numpy()))
+    if worst > tol:
+        raise AssertionError(f"streamed features differ from pandas by {worst:.2e} (> {tol:.0e})")
+    return worst
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-sample cost of live rolling features.")
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--samples", type=int, default=500, help="live samples to time")
+    parser.add_argument("--tol", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    df = make_kpi_frame(years=args.years)
+    # Sprinkle in sensor dropouts so NaN handling is part of the check.
+    rng = np.random.default_rng(0)
+    for tag in TAGS:
+        df.loc[rng.random(len(df)) < 0.02, tag] = np.nan
+
+    start = time.perf_counter()
+    worst = check(df, args.tol)
+    print(f"{len(df):,d} rows x {len(TAGS)} tags: max scaled difference vs pandas {worst:.1e} "
+          f"({time.perf_counter() - start:.1f} s)")
+
+    history, live = df.iloc[: -args.samples], df.iloc[-args.samples :]
+    engine = StreamingFeatures(TAGS)
+    engine.run(history)
+    samples = live[list(TAGS)].to_dict("records")
+    start = time.perf_counter()
+    for sample in samples:
+        engine.update(sample)
+    streaming = (time.perf_counter() - start) / len(samples)
+
+    span = max(WINDOWS) + 1
+    frame = df[list(TAGS)]
+    start = time.perf_counter()
+    for end in range(len(history) + 1, len(df) + 1):
+        offline_features(frame.iloc[end - span : end], TAGS).iloc[-1]
+    recompute = (time.perf_counter() - start) / len(samples)
+
+    print(f"  streaming update      {streaming * 1e6:9.1f} us/sample")
+    print(f"  pandas recompute      {recompute * 1e6:9.1f} us/sample  ({recompute / streaming:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Benchmark: fleet summary in one vectorised pass vs one /api/kpis payload per asset
+#
+#   python -m backend.benchmarks.bench_fleet --assets 10 50 --years 1
+from __future__ import annotations
+
+import argparse
+import time
+
+from backend.server import _fleet_arrays, build_fleet_summary, build_kpis_payload, regime_multipliers
+
+from .synthetic import make_kpi_frame
+
+PARAMS = dict(base_thr=0.10, persist_k=5, cooldown_h=48)
+MULTIPLIERS = dict(m_normal=1.0, m_post=1.1, m_low=1.2, m_shut=1.3)
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fleet summary: vectorised vs per-asset.")
+    parser.add_argument("--assets", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--lookback-days", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    mult_map = regime_multipliers(*MULTIPLIERS.values())
+    for n_assets in args.assets:
+        frames = {f"A-{i:03d}": make_kpi_frame(args.years, seed=i) for i in range(n_assets)}
+        rows = sum(len(df) for df in frames.values())
+
+        def per_asset() -> None:
+            for df in frames.values():
+                build_kpis_payload(df, **PARAMS, **MULTIPLIERS, lookback_days=args.lookback_days)
+
+        def vectorised() -> None:
+            build_fleet_summary(_fleet_arrays(frames), **PARAMS, mult_map=mult_map, lookback_days=args.lookback_days)
+
+        arrays = _fleet_arrays(frames)
+        loop = _best_of(per_asset, args.repeat)
+        fleet = _best_of(vectorised, args.repeat)
+        cached = _best_of(
+            lambda: build_fleet_summary(arrays, **PARAMS, mult_map=mult_map, lookback_days=args.lookback_days), args.repeat
+        )
+        print(
+            f"{n_assets:3d} assets, {rows:,d} rows  per-asset payloads {loop * 1e3:8.1f} ms"
+            f"  one pass {fleet * 1e3:7.1f} ms ({loop / fleet:4.1f}x)  with cached arrays {cached * 1e3:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
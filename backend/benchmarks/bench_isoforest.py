@@ -0,0 +1,50 @@
+# Benchmark: IsolationForest rescoring of base_timeseries.parquet on 1..N processes
+#
+#   python -m backend.benchmarks.bench_isoforest --jobs 1 2 4 8
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.dp import manifest_smooth_steps
+from backend.isoforest import CHUNK_ROWS, if_input, load_model, model_features, score_raw
+from backend.server import ART_DIR, load_manifest
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Scaling of chunked IsolationForest scoring.")
+    parser.add_argument("--src", type=Path, default=ART_DIR / "base_timeseries.parquet")
+    parser.add_argument("--artifacts", type=Path, default=ART_DIR)
+    parser.add_argument("--jobs", type=int, nargs="+", default=sorted({1, 2, max(1, cores // 2), cores}))
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.artifacts)
+    model = args.artifacts / "isoforest_pipeline.joblib"
+    features = model_features(load_model(str(model)), manifest)
+    dt_hours = float(manifest.get("dt_hours", 0.25))
+    X = if_input(pd.read_parquet(args.src), features, manifest["dp_column"], dt_hours, manifest_smooth_steps(manifest))
+    print(f"{len(X):,d} rows x {X.shape[1]} features, chunks of {args.chunk_rows:,d} rows, {cores} cores")
+
+    baseline = reference = None
+    for n_jobs in args.jobs:
+        start = time.perf_counter()
+        scores = score_raw(model, X, n_jobs, args.chunk_rows)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            baseline, reference = elapsed, scores
+        elif not np.allclose(scores, reference):
+            raise AssertionError(f"scores on {n_jobs} processes differ from {args.jobs[0]}")
+        speedup = baseline / elapsed
+        print(f"  {n_jobs:3d} process(es) {elapsed:7.2f} s  {len(X) / elapsed:9,.0f} rows/s  "
+              f"{speedup:5.2f}x  efficiency {speedup / n_jobs * args.jobs[0]:4.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Benchmark: incremental KPI pipeline, per-batch latency against a full recompute
+#
+#   python -m backend.benchmarks.bench_pipeline --bootstrap 8000 --batches 1 4 96 672
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.pipeline import KPIPipeline, PipelineModels
+from backend.server import ART_DIR, load_manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-batch cost of the incremental raw -> KPI pipeline.")
+    parser.add_argument("--src", type=Path, default=ART_DIR / "base_timeseries.parquet")
+    parser.add_argument("--artifacts", type=Path, default=ART_DIR)
+    parser.add_argument("--bootstrap", type=int, default=8000, help="rows processed before timing batches")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 4, 96, 672])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.artifacts)
+    models = PipelineModels.load(args.artifacts, manifest)
+    raw = pd.read_parquet(args.src)
+    needed = args.bootstrap + args.repeat * sum(args.batches)
+    if needed > len(raw):
+        raise SystemExit(f"need {needed:,d} rows, {args.src} has {len(raw):,d}")
+
+    pipeline = KPIPipeline(models, manifest)
+    start = time.perf_counter()
+    pipeline.process(raw.iloc[: args.bootstrap])
+    full = time.perf_counter() - start
+    print(f"bootstrap {args.bootstrap:,d} rows in {full:.2f} s ({full / args.bootstrap * 1e3:.2f} ms/row)")
+
+    pos = args.bootstrap
+    pipeline.process(raw.iloc[pos : pos + 1])  # warm-up (Keras traces its first call)
+    pos += 1
+    for size in args.batches:
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pipeline.process(raw.iloc[pos : pos + size])
+            times.append(time.perf_counter() - start)
+            pos += size
+        median = float(np.median(times))
+        print(f"  batch {size:5d} rows  {median * 1e3:8.1f} ms  {median / size * 1e3:8.3f} ms/row")
+
+
+if __name__ == "__main__":
+    main()
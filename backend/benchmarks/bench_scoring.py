@@ -0,0 +1,72 @@
+# Benchmark: row-at-a-time vs batched predict_proba with the calibrated classifiers
+#
+#   python -m backend.benchmarks.bench_scoring --rows 4096
+#
+# Needs artifacts loadable by the installed scikit-learn (see /api/score/stats for load errors).
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.scoring import MODEL_NAMES, load_scorers
+from backend.server import ART_DIR
+
+REGIMES = ("normal", "post_startup", "low_load", "shutdown")
+
+
+def make_rows(features, n: int, seed: int = 42):
+    """Random feature rows keyed like API requests, with a regime label instead of the one-hot columns."""
+    rng = np.random.default_rng(seed)
+    names = [f for f in dict.fromkeys(features) if not f.startswith("regime_")]
+    values = rng.normal(size=(n, len(names)))
+    regimes = rng.choice(REGIMES, size=n)
+    return [{**dict(zip(names, row)), "regime": str(regime)} for row, regime in zip(values.tolist(), regimes)]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare single-row and batched scoring throughput.")
+    parser.add_argument("--artifacts", type=Path, default=ART_DIR)
+    parser.add_argument("--rows", type=int, default=4096)
+    parser.add_argument("--single-rows", type=int, default=256, help="rows scored one call at a time")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 256, 4096])
+    args = parser.parse_args()
+
+    scorers, errors = load_scorers(args.artifacts)
+    for name, error in errors.items():
+        print(f"{name}: could not load ({error})", file=sys.stderr)
+    if not scorers:
+        sys.exit(1)
+
+    for name in MODEL_NAMES:
+        if name not in scorers:
+            continue
+        scorer = scorers[name]
+        rows = make_rows(scorer.features, args.rows)
+        print(f"{name}: {len(scorer.features)} features")
+
+        single = _timed(lambda: [scorer.score(rows[i : i + 1]) for i in range(args.single_rows)])
+        base_rate = args.single_rows / single
+        print(f"  {'1 row/call':<16s} {base_rate:10,.0f} rows/s  {single / args.single_rows * 1e3:8.2f} ms/call")
+        for size in args.batch_sizes:
+            size = min(size, len(rows))
+            calls = max(1, len(rows) // size)
+            elapsed = _timed(lambda: [scorer.score(rows[i * size : (i + 1) * size]) for i in range(calls)])
+            rate = calls * size / elapsed
+            print(
+                f"  {f'{size} rows/call':<16s} {rate:10,.0f} rows/s  {elapsed / calls * 1e3:8.2f} ms/call"
+                f"  {rate / base_rate:6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Benchmark: FastAPI's jsonable_encoder path vs FastJSONResponse for a 365-day /api/kpis payload
+#
+#   python -m backend.benchmarks.bench_serialization
+from __future__ import annotations
+
+import argparse
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend import serialization
+from backend.server import build_kpis_payload
+
+from .synthetic import make_kpi_frame
+
+DEFAULTS = dict(base_thr=0.10, persist_k=5, cooldown_h=48, m_normal=1.0, m_post=1.1, m_low=1.2, m_shut=1.3)
+
+
+def _best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _without_orjson(fn):
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return fn()
+    finally:
+        serialization.orjson = orjson
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare JSON serialisation paths for /api/kpis.")
+    parser.add_argument("--lookback-days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_kpi_frame(years=max(1.0, args.lookback_days / 365))
+    items = build_kpis_payload(df, lookback_days=args.lookback_days, **DEFAULTS)
+    columnar = build_kpis_payload(df, lookback_days=args.lookback_days, response_format="columnar", **DEFAULTS)
+    # The pre-orjson handlers returned ISO strings and None in place of NaN.
+    legacy = serialization.to_builtin(items)
+
+    cases = {
+        "jsonable_encoder + JSONResponse (items)": lambda: JSONResponse(jsonable_encoder(legacy)).body,
+        "FastJSONResponse (items)": lambda: serialization.FastJSONResponse(items).body,
+        "FastJSONResponse (columnar)": lambda: serialization.FastJSONResponse(columnar).body,
+    }
+    if serialization.orjson is not None:
+        cases["stdlib fallback (items)"] = lambda: _without_orjson(lambda: serialization.dumps(items))
+
+    baseline = None
+    print(f"{len(items['items']):,d} points")
+    for name, fn in cases.items():
+        elapsed, body = _best_of(fn, args.repeat)
+        baseline = baseline or elapsed
+        print(f"  {name:<42s} {elapsed * 1e3:8.1f} ms  {len(body) / 1e6:6.2f} MB  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
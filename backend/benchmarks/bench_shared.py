@@ -0,0 +1,75 @@
+# Benchmark: per-worker memory of the /api/kpis columns, parsed per process vs memory-mapped and shared
+#
+#   python -m backend.benchmarks.bench_shared --years 5 --workers 1 2 4 8
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from backend import kpi_store, shared_kpis
+
+from .synthetic import make_kpi_frame
+
+
+def _memory_kb() -> Dict[str, int]:
+    """Rss, Pss and private (unshared) memory of this process, from /proc (Linux only)."""
+    out = {}
+    with open("/proc/self/smaps_rollup") as handle:
+        for line in handle:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                out[parts[0].rstrip(":")] = int(parts[1])
+    return {"rss": out["Rss"], "pss": out["Pss"], "private": out["Private_Clean"] + out["Private_Dirty"]}
+
+
+def _worker(mode: str, store: str, barrier, results) -> None:
+    before = _memory_kb()
+    if mode == "shared":
+        frame, _ = shared_kpis.open_shared(shared_kpis.shared_path(Path(store)))
+    else:
+        frame = kpi_store.read_kpis(Path(store), shared_kpis.SHARED_COLUMNS)
+    # Touch every page, as a request over the full history would.
+    frame["prob_breach7d"].sum(), frame["dp_excess_mbar"].sum(), frame["health_score"].sum()
+    frame["regime"].cat.codes.sum(), frame.index.asi8.sum()
+    barrier.wait()  # everyone holds the data at once, so Pss reflects the sharing
+    after = _memory_kb()
+    results.put({key: after[key] - before[key] for key in after})
+    barrier.wait()
+
+
+def _run(mode: str, store: Path, workers: int) -> Dict[str, float]:
+    ctx = mp.get_context("spawn")
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(mode, str(store), barrier, results)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    deltas = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return {key: sum(d[key] for d in deltas) / 1024 for key in deltas[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory of N workers holding the KPI view columns.")
+    parser.add_argument("--years", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--format", choices=["feather", "parquet", "csv"], default="feather")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = make_kpi_frame(years=args.years)
+        store = kpi_store.write_kpis(df, Path(tmp) / f"kpis.{args.format}")
+        path = shared_kpis.refresh(store)
+        print(f"{args.years:g} year(s), {len(df):,d} rows; shared file {path.stat().st_size / 1e6:.1f} MB")
+        print("  totals over all workers (MB): private = not shared with anyone, pss = proportional share")
+        for workers in args.workers:
+            for mode in ("per-process", "shared"):
+                mem = _run(mode, store, workers)
+                print(f"  {workers:2d} worker(s) {mode:<11s}  private {mem['private']:7.1f}  pss {mem['pss']:7.1f}  rss {mem['rss']:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Benchmark: cold reads of the KPI store as CSV, Parquet and Feather: full, projected, last 7 days
+#
+#   python -m backend.benchmarks.bench_store --years 1 5
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from backend import kpi_store
+from backend.server import KPI_VIEW_COLUMNS
+
+from .synthetic import make_kpi_frame
+
+SUFFIXES = (".csv", ".parquet", ".feather")
+
+
+def _best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare KPI store formats.")
+    parser.add_argument("--years", type=float, nargs="+", default=[1.0, 5.0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for years in args.years:
+            df = make_kpi_frame(years=years)
+            print(f"{years:g} year(s), {len(df):,d} rows")
+            week = df.index.max() - pd.Timedelta(days=7)
+            baseline = None
+            for suffix in SUFFIXES:
+                path = kpi_store.write_kpis(df, Path(tmp) / f"kpis_{years:g}y{suffix}")
+                size = path.stat().st_size / 1e6
+                full, _ = _best_of(lambda: kpi_store.read_kpis(path), args.repeat)
+                view, _ = _best_of(lambda: kpi_store.read_kpis(path, KPI_VIEW_COLUMNS), args.repeat)
+                recent, _ = _best_of(lambda: kpi_store.read_kpis(path, KPI_VIEW_COLUMNS, start=week), args.repeat)
+                baseline = baseline or full
+                print(
+                    f"  {suffix[1:]:<8s} {size:7.1f} MB  full {full * 1e3:8.1f} ms ({baseline / full:5.1f}x)"
+                    f"  /api/kpis columns {view * 1e3:7.1f} ms ({baseline / view:5.1f}x)"
+                    f"  last 7 days {recent * 1e3:6.1f} ms ({baseline / recent:6.1f}x)"
+                )
+
+
+if __name__ == "__main__":
+    main()
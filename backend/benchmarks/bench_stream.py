@@ -0,0 +1,49 @@
+# Benchmark: bytes and server time per new 15-minute point, /api/kpis re-fetch vs one SSE push
+#
+#   python -m backend.benchmarks.bench_stream --years 1 --lookback-days 60
+from __future__ import annotations
+
+import argparse
+import time
+
+from backend.serialization import dumps, sse_event
+from backend.server import build_kpis_delta, build_kpis_payload, regime_multipliers
+
+from .synthetic import make_kpi_frame
+
+PARAMS = dict(base_thr=0.10, persist_k=5, cooldown_h=48)
+MULTIPLIERS = dict(m_normal=1.0, m_post=1.1, m_low=1.2, m_shut=1.3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cost of delivering one new KPI point.")
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--lookback-days", type=int, default=60)
+    parser.add_argument("--points", type=int, default=96, help="appends to simulate")
+    args = parser.parse_args()
+
+    df = make_kpi_frame(args.years)
+    mult_map = regime_multipliers(*MULTIPLIERS.values())
+    start_at = len(df) - args.points
+
+    refetch_bytes = push_bytes = 0
+    refetch_s = push_s = 0.0
+    for n in range(start_at, len(df)):
+        # version=None bypasses the alert cache in both paths, so neither gets incremental scans for free.
+        view = df.iloc[: n + 1]
+        t0 = time.perf_counter()
+        refetch_bytes += len(dumps(build_kpis_payload(view, **PARAMS, **MULTIPLIERS, lookback_days=args.lookback_days)))
+        t1 = time.perf_counter()
+        delta = build_kpis_delta(view, None, view.index[-2], **PARAMS, mult_map=mult_map)
+        push_bytes += len(sse_event(delta, "kpis", view.index[-1].isoformat()))
+        t2 = time.perf_counter()
+        refetch_s += t1 - t0
+        push_s += t2 - t1
+
+    print(f"{len(df):,d} rows, {args.points} appended points, lookback {args.lookback_days} days")
+    print(f"  re-fetch /api/kpis  {refetch_bytes / args.points / 1e3:9.1f} kB/point  {refetch_s / args.points * 1e3:7.2f} ms/point")
+    print(f"  SSE push            {push_bytes / args.points / 1e3:9.1f} kB/point  {push_s / args.points * 1e3:7.2f} ms/point")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Load test: latency percentiles and status counts for concurrent requests against a running API
+#
+#   uvicorn backend.server:app --port 8000 &
+#   python -m backend.benchmarks.load_test --path /api/kpis --concurrency 32 --requests 640 --distinct 4
+#
+# Requests cycle through ``--distinct`` parameter sets (different base_thr values), so identical
+# requests overlap in flight the way many dashboards on the same view do.
+from __future__ import annotations
+
+import argparse
+import http.client
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+
+def _get(conn: http.client.HTTPConnection, target: str) -> Tuple[int, bytes]:
+    conn.request("GET", target)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def _compute_stats(host: str, port: int) -> Optional[Dict[str, int]]:
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        status, body = _get(conn, "/api/compute_stats")
+    except OSError:
+        return None
+    finally:
+        conn.close()
+    return json.loads(body) if status == 200 else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent GETs against the API, with p50/p99 latency.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/api/kpis")
+    parser.add_argument("--query", default="", help="extra query string, e.g. 'lookback_days=365&max_points=2000'")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=640)
+    parser.add_argument("--distinct", type=int, default=4, help="distinct parameter sets to cycle through")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    thresholds = np.linspace(0.02, 0.98, args.distinct) if args.distinct > 1 else [0.10]
+    extra = f"&{args.query}" if args.query else ""
+    targets = [f"{args.path}?{urlencode({'base_thr': round(float(thr), 6)})}{extra}" for thr in thresholds]
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    def client() -> None:
+        conn = http.client.HTTPConnection(host, port, timeout=args.timeout)
+        while True:
+            with lock:
+                i = next(counter)
+            if i >= args.requests:
+                break
+            start = time.perf_counter()
+            try:
+                status, _ = _get(conn, targets[i % len(targets)])
+            except (OSError, http.client.HTTPException):
+                status = "error"
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=args.timeout)
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(elapsed)
+        conn.close()
+
+    before = _compute_stats(host, port)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for _ in range(args.concurrency):
+            pool.submit(client)
+    wall = time.perf_counter() - start
+    after = _compute_stats(host, port)
+
+    print(
+        f"{args.requests} x GET {args.path} ({args.distinct} parameter sets), concurrency {args.concurrency}: "
+        f"{wall:.1f} s, {args.requests / wall:.1f} req/s"
+    )
+    print("  status  " + "  ".join(f"{status}: {n}" for status, n in sorted(statuses.items(), key=str)))
+    if latencies:
+        ms = np.asarray(latencies) * 1e3
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        print(f"  200 latency ms  p50 {p50:8.1f}  p90 {p90:8.1f}  p99 {p99:8.1f}  max {ms.max():8.1f}")
+    if before is not None and after is not None:
+        delta = {k: after[k] - before[k] for k in ("submitted", "coalesced", "rejected")}
+        sizing = f"{after['workers']} workers, queue {after['queue_limit']}"
+        print(f"  compute pool ({sizing}): " + ", ".join(f"{k} +{v}" for k, v in delta.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+# Benchmark suite: backend hot paths at 1, 5 and 20 years of data, saved as JSON for comparing commits
+#
+#   python -m backend.benchmarks.suite run                  # -> backend/benchmarks/results/<commit>.json
+#   python -m backend.benchmarks.suite run --years 1 --bench get_kpis --out /tmp/kpis.json
+#   python -m backend.benchmarks.suite compare results/a1b2c3d.json results/e4f5a6b.json --threshold 0.10
+#
+# Every size is generated from a fixed seed (same rows and regime mix on every run and machine)
+# and written as the Parquet and CSV stores the API reads. Each case runs once to warm up, then
+# repeats until it has both --min-repeat samples and --min-time seconds of them. ``compare``
+# exits with status 1 when a case's median slowed down by more than the threshold.
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+from backend import kpi_store, server
+
+from .synthetic import make_kpi_frame
+
+SEED = 42
+YEARS = (1, 5, 20)
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+PARAMS = dict(base_thr=0.10, persist_k=5, cooldown_h=48)
+MULTIPLIERS = dict(m_normal=1.0, m_post=1.1, m_low=1.2, m_shut=1.3)
+# Environment variables that change how fast numpy and the API run; recorded with the results.
+ENV_KEYS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "JAZAN_COMPUTE_WORKERS", "JAZAN_SHARED_KPIS")
+
+
+class Dataset(NamedTuple):
+    years: int
+    frame: pd.DataFrame
+    parquet: Path
+    csv: Path
+
+
+class Case(NamedTuple):
+    name: str
+    description: str
+    # Prepares a dataset (outside the timing) and returns the call to time.
+    setup: Callable[[Dataset], Callable[[], Any]]
+
+
+def make_dataset(years: int, data_dir: Path) -> Dataset:
+    frame = make_kpi_frame(years, SEED)
+    out = data_dir / f"{years}y"
+    parquet, csv = kpi_store.store_path(out, ".parquet"), kpi_store.store_path(out, ".csv")
+    if not parquet.exists():
+        kpi_store.write_kpis(frame, parquet)
+    if not csv.exists():
+        kpi_store.write_kpis(frame, csv)
+    return Dataset(years, frame, parquet, csv)
+
+
+def _use_store(data: Dataset, store: Path) -> None:
+    """Point the API at ``store`` and drop everything it cached from the previous one."""
+    server.OUT_DIR = store.parent
+    server.KPIS_PARQUET = store if store.suffix == ".parquet" else store.with_suffix(".parquet.missing")
+    server.KPIS_FEATHER = store.with_suffix(".feather.missing")
+    server.KPIS_CSV = data.csv
+    server._kpis_cache.clear()
+    server._alert_cache.clear()
+    server._priors_cache.clear()
+
+
+class _Client:
+    """Drive the ASGI app in-process: routing, validation, the compute pool and the full response body."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+
+    def get(self, path: str, **query: Any) -> int:
+        return self.loop.run_until_complete(self._get(path, query))
+
+    async def _get(self, path: str, query: Dict[str, Any]) -> int:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": urlencode(query, doseq=True).encode(),
+            "headers": [(b"host", b"benchmark")],
+            "client": ("127.0.0.1", 0),
+            "server": ("benchmark", 80),
+        }
+        status, size = 0, 0
+        requested = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Streaming responses listen for a disconnect until they finish; the client never leaves.
+            await asyncio.Event().wait()
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+
+        await server.app(scope, receive, send)
+        if status != 200:
+            raise RuntimeError(f"GET {path} answered {status}")
+        return size
+
+
+_client: Optional[_Client] = None
+
+
+def client() -> _Client:
+    global _client
+    if _client is None:
+        _client = _Client()
+    return _client
+
+
+def _load_kpis(suffix: str) -> Callable[[Dataset], Callable[[], Any]]:
+    def setup(data: Dataset) -> Callable[[], Any]:
+        store = data.parquet if suffix == ".parquet" else data.csv
+        _use_store(data, store)
+
+        def run() -> pd.DataFrame:
+            server._kpis_cache.clear()
+            return server.load_kpis()
+
+        return run
+
+    return setup
+
+
+def _derive_alerts(data: Dataset) -> Callable[[], Any]:
+    mult_map = server.regime_multipliers(*MULTIPLIERS.values())
+    prob = data.frame["prob_breach7d"]
+    thr = pd.Series(PARAMS["base_thr"], index=data.frame.index) * data.frame["regime"].map(mult_map).astype(float)
+    return lambda: server.derive_alerts(prob, thr, PARAMS["persist_k"], PARAMS["cooldown_h"])
+
+
+def _priors(data: Dataset) -> Tuple[np.ndarray, np.ndarray]:
+    priors = data.frame.groupby("regime")["prob_breach7d"].mean()
+    return data.frame["prob_breach7d"].to_numpy(dtype=float), data.frame["regime"].map(priors).to_numpy(dtype=float)
+
+
+def _adjust_probability(data: Dataset) -> Callable[[], Any]:
+    prob, prior = _priors(data)
+    pairs = list(zip(prob.tolist(), prior.tolist()))
+    return lambda: [server.adjust_probability(p, q) for p, q in pairs]
+
+
+def _adjust_probabilities(data: Dataset) -> Callable[[], Any]:
+    prob, prior = _priors(data)
+    return lambda: server.adjust_probabilities(prob, prior)
+
+
+def _get_kpis(cached_alerts: bool, **query: Any) -> Callable[[Dataset], Callable[[], Any]]:
+    def setup(data: Dataset) -> Callable[[], Any]:
+        _use_store(data, data.parquet)
+        params = {**PARAMS, **MULTIPLIERS, **query}
+
+        def run() -> int:
+            if not cached_alerts:
+                server._alert_cache.clear()
+                server._priors_cache.clear()
+            return client().get("/api/kpis", **params)
+
+        return run
+
+    return setup
+
+
+def _export_kpis(file_format: str, compression: Optional[str] = None) -> Callable[[Dataset], Callable[[], Any]]:
+    def setup(data: Dataset) -> Callable[[], Any]:
+        _use_store(data, data.parquet)
+        query = {**PARAMS, **MULTIPLIERS, "download": "true", "format": file_format}
+        if compression:
+            query["compression"] = compression
+        return lambda: client().get("/api/export_kpis", **query)
+
+    return setup
+
+
+CASES = (
+    Case("load_kpis.parquet", "parse the whole Parquet store (cache cleared)", _load_kpis(".parquet")),
+    Case("load_kpis.csv", "parse the whole CSV store (cache cleared)", _load_kpis(".csv")),
+    Case("derive_alerts", "persistence/cooldown alerts over the whole history", _derive_alerts),
+    Case("adjust_probability", "scalar calibration, one call per point", _adjust_probability),
+    Case("adjust_probabilities", "vectorised calibration over the whole history", _adjust_probabilities),
+    Case("get_kpis", "GET /api/kpis, 60-day window, alerts cached", _get_kpis(True)),
+    Case("get_kpis.uncached", "GET /api/kpis, 60-day window, alerts and priors recomputed", _get_kpis(False)),
+    Case("get_kpis.365d", "GET /api/kpis, 365-day window, alerts cached", _get_kpis(True, lookback_days=365)),
+    Case("export_kpis.csv", "GET /api/export_kpis?download=true, whole history as CSV", _export_kpis("csv")),
+    Case("export_kpis.parquet", "GET /api/export_kpis?download=true, whole history as Parquet", _export_kpis("parquet")),
+)
+
+
+def measure(fn: Callable[[], Any], min_repeat: int, min_time: float, max_repeat: int) -> List[float]:
+    fn()  # warm-up: imports, caches the API would already hold, first-touch allocations
+    samples: List[float] = []
+    while len(samples) < max_repeat and (len(samples) < min_repeat or sum(samples) < min_time):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    q1, _, q3 = statistics.quantiles(samples, n=4) if len(samples) > 1 else (samples[0],) * 3
+    return {
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "iqr_s": q3 - q1,
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", *args], cwd=Path(__file__).parent, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as handle:
+            for line in handle:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def environment() -> Dict[str, Any]:
+    import fastapi
+    import pyarrow
+
+    affinity = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {
+            "hostname": platform.node(),
+            "platform": platform.platform(),
+            "cpu": _cpu_model(),
+            "cpu_count": os.cpu_count(),
+            "usable_cpus": affinity,
+        },
+        "versions": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "pyarrow": pyarrow.__version__,
+            "fastapi": fastapi.__version__,
+        },
+        "env": {key: os.environ[key] for key in ENV_KEYS if key in os.environ},
+    }
+
+
+def _dataset_info(data: Dataset) -> Dict[str, Any]:
+    mix = data.frame["regime"].value_counts(normalize=True).sort_index()
+    return {
+        "years": data.years,
+        "rows": len(data.frame),
+        "seed": SEED,
+        "regime_mix": {str(k): round(float(v), 4) for k, v in mix.items()},
+        # Same checksum on two machines means the same input rows.
+        "checksum": int(pd.util.hash_pandas_object(data.frame, index=True).sum()) & 0xFFFFFFFFFFFF,
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    cases = [case for case in CASES if not args.bench or any(case.name.startswith(b) for b in args.bench)]
+    if not cases:
+        raise SystemExit(f"No case matches {args.bench}; choose from {[case.name for case in CASES]}.")
+
+    settings = {key: getattr(args, key) for key in ("years", "bench", "min_repeat", "max_repeat", "min_time")}
+    report = {**environment(), "settings": settings, "datasets": [], "results": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(args.data_dir) if args.data_dir else Path(tmp)
+        for years in args.years:
+            start = time.perf_counter()
+            data = make_dataset(years, data_dir)
+            report["datasets"].append(_dataset_info(data))
+            print(f"{years:>3} y  {len(data.frame):>9,} rows  (data ready in {time.perf_counter() - start:.1f} s)")
+            for case in cases:
+                samples = measure(case.setup(data), args.min_repeat, args.min_time, args.max_repeat)
+                stats = summarize(samples)
+                report["results"].append(
+                    {
+                        "name": case.name,
+                        "description": case.description,
+                        "years": years,
+                        "rows": len(data.frame),
+                        "repeat": len(samples),
+                        **stats,
+                        "samples_s": samples,
+                    }
+                )
+                print(
+                    f"        {case.name:<22} median {stats['median_s'] * 1e3:10.2f} ms  "
+                    f"min {stats['min_s'] * 1e3:10.2f} ms  iqr {stats['iqr_s'] * 1e3:8.2f} ms  x{len(samples)}"
+                )
+
+    commit = (report["commit"] or "unknown")[:10] + ("-dirty" if report["dirty"] else "")
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"wrote {out}")
+
+
+def compare(args: argparse.Namespace) -> None:
+    old, new = (json.loads(Path(path).read_text()) for path in (args.old, args.new))
+    print(f"old {old['commit'] and old['commit'][:10]} ({old['created']})  new {new['commit'] and new['commit'][:10]} "
+          f"({new['created']})")
+    if old["machine"] != new["machine"] or old["versions"] != new["versions"]:
+        print("note: machine or library versions differ between the two runs")
+
+    before = {(r["name"], r["years"]): r for r in old["results"]}
+    regressions = 0
+    for result in new["results"]:
+        base = before.get((result["name"], result["years"]))
+        if base is None:
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        # A change inside both runs' spread is noise, whatever the ratio says.
+        noise = max(base["iqr_s"], result["iqr_s"])
+        changed = abs(result["median_s"] - base["median_s"]) > noise
+        if changed and ratio > 1.0 + args.threshold:
+            verdict = "REGRESSION"
+            regressions += 1
+        elif changed and ratio < 1.0 / (1.0 + args.threshold):
+            verdict = "faster"
+        else:
+            verdict = ""
+        print(
+            f"  {result['name']:<22} {result['years']:>3} y  {base['median_s'] * 1e3:10.2f} ms -> "
+            f"{result['median_s'] * 1e3:10.2f} ms  x{ratio:5.2f}  {verdict}"
+        )
+    if regressions:
+        print(f"{regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backend hot-path benchmark suite with JSON results.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = commands.add_parser("run", help="run the suite and write a JSON report")
+    run_cmd.add_argument("--years", type=int, nargs="+", default=list(YEARS))
+    run_cmd.add_argument("--bench", nargs="*", default=[], help="case name prefixes to run (default: all)")
+    run_cmd.add_argument("--min-repeat", type=int, default=5)
+    run_cmd.add_argument("--max-repeat", type=int, default=50)
+    run_cmd.add_argument("--min-time", type=float, default=1.0, help="seconds of samples to collect per case")
+    run_cmd.add_argument("--data-dir", default=None, help="keep the generated stores here and reuse them")
+    run_cmd.add_argument("--out", default=None, help=f"report path (default: {RESULTS_DIR}/<commit>.json)")
+    run_cmd.set_defaults(func=run)
+
+    compare_cmd = commands.add_parser("compare", help="compare two reports by median time")
+    compare_cmd.add_argument("old")
+    compare_cmd.add_argument("new")
+    compare_cmd.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression")
+    compare_cmd.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Synthetic KPI series shaped like outputs/kpis_breach7d.csv, for benchmarks
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+STEPS_PER_DAY = 96  # 15-minute cadence
+DP_COL = "75PDI853.pv"
+
+# Mean segment length in days and the regimes that may follow each regime.
+_REGIME_DAYS = {"normal": 4.0, "low_load": 1.5, "shutdown": 0.5}
+_REGIME_NEXT = {
+    "normal": (["low_load", "shutdown"], [0.8, 0.2]),
+    "low_load": (["normal", "shutdown"], [0.85, 0.15]),
+    "shutdown": (["normal", "low_load"], [0.7, 0.3]),
+}
+
+
+def _smooth_noise(n: int, rng: np.random.Generator, span: int) -> np.ndarray:
+    kernel = np.exp(-np.arange(span * 4) / span)
+    kernel /= kernel.sum()
+    noise = rng.normal(0.0, 1.0, n + len(kernel))
+    out = np.convolve(noise, kernel, mode="valid")[:n]
+    return out / (out.std() or 1.0)
+
+
+def regime_sequence(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Markov-chain regime labels with a 24h ``post_startup`` block after every shutdown."""
+    labels = []
+    state = "normal"
+    total = 0
+    while total < n:
+        steps = max(4, int(rng.exponential(_REGIME_DAYS[state]) * STEPS_PER_DAY))
+        labels.append(np.full(steps, state, dtype=object))
+        total += steps
+        nxt, p = _REGIME_NEXT[state]
+        following = rng.choice(nxt, p=p)
+        if state == "shutdown":
+            labels.append(np.full(STEPS_PER_DAY, "post_startup", dtype=object))
+            total += STEPS_PER_DAY
+        state = following
+    return np.concatenate(labels)[:n]
+
+
+def make_kpi_frame(years: float = 1.0, seed: int = 42, start: str = "2022-01-01") -> pd.DataFrame:
+    """Build a KPI frame covering ``years`` of 15-minute data, indexed by ``ts``."""
+    n = int(round(years * 365 * STEPS_PER_DAY))
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n, freq="15min", name="ts")
+    regime = regime_sequence(n, rng)
+
+    # Fouling builds up as a saw-tooth between cleanings, on top of slow process drift.
+    cleaning_every = int(30 * STEPS_PER_DAY)
+    fouling = (np.arange(n) % cleaning_every) / cleaning_every
+    drift = _smooth_noise(n, rng, span=STEPS_PER_DAY // 2)
+    running = regime != "shutdown"
+
+    baseline = 1.2 + 0.05 * _smooth_noise(n, rng, span=STEPS_PER_DAY * 7)
+    excess = np.clip(0.6 * fouling ** 3 + 0.05 * drift + rng.normal(0, 0.02, n), 0.0, None) * running
+    dp = baseline + excess + rng.normal(0, 0.01, n)
+    dp_smooth = pd.Series(dp).rolling(8, min_periods=4).median().to_numpy()
+
+    warmup = STEPS_PER_DAY
+    excess_out = excess.copy()
+    excess_out[:warmup] = np.nan
+    auc = np.nancumsum(excess_out * 0.25)
+
+    health = np.clip(98.0 - 60.0 * excess - 4.0 * np.abs(drift) + rng.normal(0, 1.5, n), 0.0, 100.0)
+    logit = -3.2 + 6.0 * fouling ** 2 + 0.8 * drift + rng.normal(0, 0.35, n)
+    prob = 1.0 / (1.0 + np.exp(-logit))
+
+    return pd.DataFrame(
+        {
+            DP_COL: dp,
+            "dp_smooth_mbar": dp_smooth,
+            "dp_excess_mbar": excess_out,
+            "dp_auc_cum_mbar_h": auc,
+            "health_score": health,
+            "score_blended": 1.0 - health / 100.0,
+            "regime": regime,
+            "prob_breach7d": prob,
+            "threshold_eff": 0.10,
+            "alert_flag": 0,
+        },
+        index=index,
+    )
+
+
+def write_kpi_csv(path: Path, years: float = 1.0, seed: int = 42) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    make_kpi_frame(years, seed).to_csv(path, index=True)
+    return path
@@ -0,0 +1,151 @@
+# In-process caches shared by the API handlers
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# (st_mtime_ns, st_size) of a file at the time it was parsed
+FileVersion = Tuple[int, int]
+
+
+def file_version(path: Path) -> FileVersion:
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class FileCache:
+    """Keep the parsed contents of files in memory until their mtime or size changes.
+
+    Concurrent misses on the same key and file version share one load (the
+    same coalescing :class:`~backend.compute.ComputeExecutor` does for
+    requests); the loader runs outside the cache lock, so a slow parse never
+    holds up hits or loads for other keys.
+    """
+
+    def __init__(self, loader: Callable[..., Any]) -> None:
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[Hashable, ...], Tuple[FileVersion, Any]] = {}
+        self._inflight: Dict[Tuple[Hashable, ...], Tuple[FileVersion, Future]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, path: Path, *args: Hashable) -> Tuple[Any, FileVersion]:
+        """Return ``(value, version)`` for ``loader(path, *args)``, re-running it only when the file changed.
+
+        Extra ``args`` (e.g. a column projection) are part of the cache key.
+        A loader error is raised to every caller waiting on that load and
+        nothing is cached, so the next call tries again.
+        """
+        key = (path, *args)
+        version = file_version(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1], version
+            pending = self._inflight.get(key)
+            if pending is not None and pending[0] == version:
+                self.coalesced += 1
+                shared = pending[1]
+            else:
+                self.misses += 1
+                shared = None
+                mine: Future = Future()
+                self._inflight[key] = (version, mine)
+        if shared is not None:
+            return shared.result(), version
+
+        try:
+            value = self._loader(path, *args)
+        except BaseException as exc:
+            self._release(key, mine)
+            mine.set_exception(exc)
+            raise
+        with self._lock:
+            # A load for a newer version that started meanwhile takes precedence.
+            if self._inflight.get(key, (None, None))[1] is mine:
+                self._entries[key] = (version, value)
+        self._release(key, mine)
+        mine.set_result(value)
+        return value, version
+
+    def _release(self, key: Tuple[Hashable, ...], future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key, (None, None))[1] is future:
+                del self._inflight[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "entries": len(self._entries)}
+
+
+class LRUCache:
+    """Bounded least-recently-used cache whose entries also expire ``ttl`` seconds after insertion."""
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the live value for ``key`` (refreshing its LRU position), or ``None``."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key`` or compute, store and return it.
+
+        ``compute`` runs outside the lock, so two concurrent misses on the same
+        key may both compute; the later result wins.
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+            }
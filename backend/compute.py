@@ -0,0 +1,106 @@
+# Bounded thread pool for the API's pandas work, with coalescing of identical in-flight requests
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class Overloaded(Exception):
+    """Every worker is busy and the queue is full; the caller should retry later."""
+
+
+class ComputeExecutor:
+    """Run blocking work on ``workers`` threads, admitting at most ``queue_limit`` tasks beyond them.
+
+    Work submitted with a ``key`` while an identical key is still running is
+    not queued again: the later callers await the first caller's result. When
+    ``workers + queue_limit`` tasks are already pending, new work is refused
+    with :class:`Overloaded` instead of waiting. All bookkeeping happens on the
+    event loop, so no locks are needed. Work runs in a copy of the submitting
+    task's context, through ``runner(fn, *args)`` when one is given.
+    """
+
+    def __init__(self, workers: int, queue_limit: int, runner: Optional[Callable[..., Any]] = None) -> None:
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._runner = runner
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compute")
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._pending = 0
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    def _admit(self) -> None:
+        if self._pending >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise Overloaded(f"{self._pending} compute tasks pending; limit {self.workers + self.queue_limit}.")
+
+    def _submit(self, fn: Callable[..., T], *args: Any) -> "asyncio.Future[T]":
+        self._pending += 1
+        self.submitted += 1
+        call = functools.partial(self._runner, fn, *args) if self._runner is not None else functools.partial(fn, *args)
+        context = contextvars.copy_context()
+        future = asyncio.get_running_loop().run_in_executor(self._pool, context.run, call)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future: asyncio.Future) -> None:
+        self._pending -= 1
+
+    def _release(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    async def run(self, key: Optional[Hashable], fn: Callable[..., T], *args: Any) -> T:
+        """``fn(*args)`` on the pool, shared with any in-flight call under the same ``key``.
+
+        ``key=None`` never coalesces. A caller that is cancelled (client gone)
+        does not cancel the work other callers are waiting on.
+        """
+        if key is not None:
+            shared = self._inflight.get(key)
+            if shared is not None:
+                self.coalesced += 1
+                return await asyncio.shield(shared)
+        self._admit()
+        future = self._submit(fn, *args)
+        if key is not None:
+            self._inflight[key] = future
+            future.add_done_callback(functools.partial(self._release, key))
+        return await asyncio.shield(future)
+
+    def iterate(self, iterator: Iterator[T]) -> AsyncIterator[T]:
+        """Drain a blocking iterator on the pool, one item per task.
+
+        Admission is checked now rather than on the first item, so a streaming
+        response can still answer 503; once admitted the stream is never cut off.
+        """
+        self._admit()
+        return self._drain(iterator)
+
+    async def _drain(self, iterator: Iterator[T]) -> AsyncIterator[T]:
+        while True:
+            item = await asyncio.shield(self._submit(next, iterator, _DONE))
+            if item is _DONE:
+                return
+            yield item
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "running": min(self._pending, self.workers),
+            "queued": max(self._pending - self.workers, 0),
+            "inflight_keys": len(self._inflight),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
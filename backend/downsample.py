@@ -0,0 +1,48 @@
+# Chart downsampling for long KPI windows: per-bucket min/max that never drops flagged points
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+
+def minmax_indices(series: Sequence[np.ndarray], n_buckets: int) -> np.ndarray:
+    """Sorted positions of the minimum and maximum of every series in each of ``n_buckets`` buckets.
+
+    Buckets hold equal numbers of consecutive points. NaNs are ignored; a
+    bucket that is all NaN for a series contributes its first position, so the
+    gap still reaches the chart.
+    """
+    n = len(series[0])
+    size = -(-n // max(1, n_buckets))
+    n_buckets = -(-n // size)
+    starts = np.arange(n_buckets) * size
+    pad = n_buckets * size - n
+
+    keep = []
+    for values in series:
+        grid = np.concatenate((np.asarray(values, dtype=float), np.full(pad, np.nan))).reshape(n_buckets, size)
+        missing = np.isnan(grid)
+        lo = np.where(missing, np.inf, grid).argmin(axis=1)
+        hi = np.where(missing, -np.inf, grid).argmax(axis=1)
+        # argmin/argmax of an all-NaN bucket fall on 0, its first position.
+        keep += [starts + lo, starts + hi]
+    return np.unique(np.minimum(np.concatenate(keep), n - 1))
+
+
+def downsample_indices(series: Sequence[np.ndarray], max_points: int, keep: np.ndarray) -> np.ndarray:
+    """Positions to draw ``series`` with about ``max_points`` points.
+
+    Every position where ``keep`` is set, plus the first and last, is always
+    included; the rest of the budget goes to min/max bucketing, which spends
+    two points per series per bucket. The result exceeds ``max_points`` only
+    when the forced points alone do.
+    """
+    n = len(series[0])
+    if n <= max_points:
+        return np.arange(n)
+    forced = np.union1d(np.flatnonzero(keep), [0, n - 1])
+    n_buckets = (max_points - len(forced)) // (2 * len(series))
+    if n_buckets < 1:
+        return forced
+    return np.union1d(forced, minmax_indices(series, n_buckets))
@@ -0,0 +1,157 @@
+# Differential-pressure derived series: baseline, excess, cumulative AUC, smoothing
+from __future__ import annotations
+
+import math
+import pickle
+from bisect import bisect_left, insort
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+import pandas as pd
+
+DT_HOURS = 0.25
+STEPS_PER_DAY = 96
+# Robust baseline: 14-day rolling median, then smoothed with a 1-day rolling median.
+BASELINE_STEPS = 14 * STEPS_PER_DAY
+BASELINE_MIN_PERIODS = STEPS_PER_DAY
+BASELINE_SMOOTH_STEPS = STEPS_PER_DAY
+BASELINE_SMOOTH_MIN_PERIODS = 4
+# dp_smooth_mbar: 2-hour rolling median.
+SMOOTH_STEPS = 8
+DP_COLUMNS = ("dp_baseline_mbar", "dp_excess_mbar", "dp_auc_cum_mbar_h", "dp_smooth_mbar", "dp_auc_rate_mbarph")
+
+NAN = float("nan")
+
+
+def dp_features(dp: pd.Series, dt_hours: float = DT_HOURS, smooth_steps: int = SMOOTH_STEPS) -> pd.DataFrame:
+    """The notebook's DP auxiliaries for a 15-minute DP series (mbar)."""
+    baseline = (
+        dp.rolling(BASELINE_STEPS, min_periods=BASELINE_MIN_PERIODS)
+        .median()
+        .rolling(BASELINE_SMOOTH_STEPS, min_periods=BASELINE_SMOOTH_MIN_PERIODS)
+        .median()
+    )
+    excess = (dp - baseline).clip(lower=0)
+    auc = (excess * dt_hours).cumsum()
+    return pd.DataFrame(
+        {
+            "dp_baseline_mbar": baseline,
+            "dp_excess_mbar": excess,
+            "dp_auc_cum_mbar_h": auc,
+            "dp_smooth_mbar": dp.rolling(smooth_steps, min_periods=max(1, smooth_steps // 2)).median(),
+            "dp_auc_rate_mbarph": auc.diff().fillna(0) / max(dt_hours, 1e-6),
+        },
+        index=dp.index,
+    )
+
+
+def manifest_smooth_steps(manifest: Mapping[str, object]) -> int:
+    """``dp_smooth_mbar``'s window in samples, from the manifest's ``labeling_params.dp_smooth_hours``."""
+    dt_hours = float(manifest.get("dt_hours", DT_HOURS))
+    smooth_hours = manifest.get("labeling_params", {}).get("dp_smooth_hours")
+    return max(1, round(float(smooth_hours) / dt_hours)) if smooth_hours is not None else SMOOTH_STEPS
+
+
+class RollingMedian:
+    """Median of the last ``window`` samples, matching ``Series.rolling(window, min_periods).median()``.
+
+    NaN samples occupy a slot but are not counted. The finite values are kept
+    sorted, so a push is a binary search plus a bounded list insert/delete:
+    the cost depends on the window, never on how many samples came before.
+    """
+
+    __slots__ = ("window", "min_periods", "_recent", "_sorted")
+
+    def __init__(self, window: int, min_periods: int) -> None:
+        self.window = window
+        self.min_periods = min_periods
+        self._recent: deque = deque()
+        self._sorted: List[float] = []
+
+    def push(self, value: float) -> float:
+        """Add ``value`` (dropping the sample ``window`` steps back) and return the current median."""
+        if len(self._recent) == self.window:
+            leaving = self._recent.popleft()
+            if not math.isnan(leaving):
+                del self._sorted[bisect_left(self._sorted, leaving)]
+        self._recent.append(value)
+        if not math.isnan(value):
+            insort(self._sorted, value)
+        n = len(self._sorted)
+        if n < self.min_periods:
+            return NAN
+        mid = n // 2
+        return self._sorted[mid] if n % 2 else (self._sorted[mid] + self._sorted[mid - 1]) / 2
+
+
+class StreamingDP:
+    """:func:`dp_features` one sample at a time, with the state checkpointed between runs.
+
+    The smoothing, both baseline medians and the running AUC total are carried
+    as state, so each sample costs the same however long the history is, and
+    the outputs equal :func:`dp_features` over the whole series. ``save`` and
+    ``load`` pickle the state (about 1,500 floats), so a restarted process
+    resumes from the checkpoint instead of replaying the history.
+    """
+
+    def __init__(self, dt_hours: float = DT_HOURS, smooth_steps: int = SMOOTH_STEPS) -> None:
+        self.dt_hours = dt_hours
+        self.smooth = RollingMedian(smooth_steps, max(1, smooth_steps // 2))
+        self.baseline_raw = RollingMedian(BASELINE_STEPS, BASELINE_MIN_PERIODS)
+        self.baseline = RollingMedian(BASELINE_SMOOTH_STEPS, BASELINE_SMOOTH_MIN_PERIODS)
+        # Like pandas' cumsum, rows without excess read NaN but do not reset the total.
+        self.auc_total = 0.0
+        self.last_auc = NAN
+        self.last_ts: Optional[pd.Timestamp] = None
+        self.samples = 0
+
+    @classmethod
+    def from_manifest(cls, manifest: Mapping[str, object]) -> "StreamingDP":
+        """Use ``dt_hours`` and ``labeling_params.dp_smooth_hours`` from the notebook's ``manifest.json``."""
+        return cls(float(manifest.get("dt_hours", DT_HOURS)), manifest_smooth_steps(manifest))
+
+    def update(self, value: Optional[float], ts: Optional[pd.Timestamp] = None) -> Dict[str, float]:
+        """Push one DP sample (``None`` counts as NaN) and return its row of :data:`DP_COLUMNS`."""
+        x = NAN if value is None else float(value)
+        baseline = self.baseline.push(self.baseline_raw.push(x))
+        excess = max(x - baseline, 0.0) if not (math.isnan(x) or math.isnan(baseline)) else NAN
+        if math.isnan(excess):
+            auc = NAN
+        else:
+            self.auc_total += excess * self.dt_hours
+            auc = self.auc_total
+        rate = 0.0 if math.isnan(auc) or math.isnan(self.last_auc) else (auc - self.last_auc) / max(self.dt_hours, 1e-6)
+        self.last_auc = auc
+        self.samples += 1
+        if ts is not None:
+            self.last_ts = ts
+        return {
+            "dp_baseline_mbar": baseline,
+            "dp_excess_mbar": excess,
+            "dp_auc_cum_mbar_h": auc,
+            "dp_smooth_mbar": self.smooth.push(x),
+            "dp_auc_rate_mbarph": rate,
+        }
+
+    def run(self, dp: pd.Series) -> pd.DataFrame:
+        """Stream ``dp`` through the state; samples at or before :attr:`last_ts` were already seen and are skipped."""
+        if self.last_ts is not None:
+            dp = dp[dp.index > self.last_ts]
+        rows = [self.update(x) for x in dp.to_numpy(dtype=float).tolist()]
+        if len(dp):
+            self.last_ts = dp.index[-1]
+        return pd.DataFrame(rows, index=dp.index, columns=list(DP_COLUMNS))
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as handle:
+            pickle.dump(self, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(path)
+
+    @staticmethod
+    def load(path: Path) -> Optional["StreamingDP"]:
+        if not path.exists():
+            return None
+        with path.open("rb") as handle:
+            return pickle.load(handle)
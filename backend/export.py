@@ -0,0 +1,122 @@
+# Chunked CSV/Parquet encoders for streaming KPI exports
+from __future__ import annotations
+
+import io
+import zlib
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; CSV and gzip exports work without it
+    pa = None
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "gzip": "application/gzip",
+    "zstd": "application/zstd",
+    "parquet": "application/vnd.apache.parquet",
+}
+SUFFIXES = {"csv": ".csv", "parquet": ".parquet", "gzip": ".gz", "zstd": ".zst"}
+
+
+def unsupported(file_format: str, compression: Optional[str]) -> Optional[str]:
+    """Why ``file_format``/``compression`` cannot be produced here, or ``None`` when they can."""
+    if (file_format == "parquet" or compression == "zstd") and pa is None:
+        return f"{'Parquet' if file_format == 'parquet' else 'zstd'} exports need pyarrow."
+    if compression == "zstd" and not pa.Codec.is_available("zstd"):
+        return "This pyarrow build has no zstd codec."
+    return None
+
+
+def filename(stem: str, file_format: str, compression: Optional[str]) -> str:
+    # Parquet compresses its column chunks internally, so the file keeps its suffix.
+    name = stem + SUFFIXES[file_format]
+    return name + SUFFIXES[compression] if compression and file_format == "csv" else name
+
+
+def media_type(file_format: str, compression: Optional[str]) -> str:
+    return MEDIA_TYPES[compression] if compression and file_format == "csv" else MEDIA_TYPES[file_format]
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last :meth:`drain`."""
+
+    def __init__(self) -> None:
+        self._parts: list = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _compressed(chunks: Iterator[bytes], compression: Optional[str]) -> Iterator[bytes]:
+    if compression is None:
+        yield from chunks
+    elif compression == "gzip":
+        gz = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip framing
+        for chunk in chunks:
+            data = gz.compress(chunk)
+            if data:
+                yield data
+        yield gz.flush()
+    else:
+        sink = _Sink()
+        stream = pa.CompressedOutputStream(pa.PythonFile(sink, mode="w"), compression)
+        for chunk in chunks:
+            stream.write(chunk)
+            data = sink.drain()
+            if data:
+                yield data
+        stream.close()
+        yield sink.drain()
+
+
+def _csv_chunks(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    header = True
+    for frame in frames:
+        yield frame.to_csv(header=header, index=True).encode("utf-8")
+        header = False
+
+
+def _parquet_chunks(frames: Iterable[pd.DataFrame], compression: Optional[str]) -> Iterator[bytes]:
+    import pyarrow.parquet as pq
+
+    sink = _Sink()
+    writer = None
+    for frame in frames:
+        if "regime" in frame.columns:
+            # Categories differ from chunk to chunk; strings keep one schema (even when all missing).
+            frame = frame.assign(regime=frame["regime"].astype("string"))
+        if writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=True)
+            schema = table.schema
+            writer = pq.ParquetWriter(sink, schema, compression=compression or "snappy")
+        else:
+            table = pa.Table.from_pandas(frame, schema=schema, preserve_index=True)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def encode(frames: Iterable[pd.DataFrame], file_format: str, compression: Optional[str] = None) -> Iterator[bytes]:
+    """Encode a stream of ``ts``-indexed frames as one CSV or Parquet file, chunk by chunk.
+
+    Only the frame being encoded is held in memory. CSV output is wrapped in
+    gzip or zstd framing; Parquet uses ``compression`` as its column codec
+    (Snappy when unset), one row group per frame.
+    """
+    if file_format == "parquet":
+        return _parquet_chunks(frames, compression)
+    return _compressed(_csv_chunks(frames), compression)
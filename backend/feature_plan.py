@@ -0,0 +1,208 @@
+# Compile feature_list_*.csv into a deduplicated plan of (tag, stat, window) nodes
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .features import DT_HOURS, STATS, StreamingFeatures, TagFeatures, min_periods
+from .scoring import REGIME_PREFIX, load_feature_list
+
+_ROLLING = re.compile(r"^(?P<tag>.+)_(?P<stat>%s)_w(?P<window>\d+)$" % "|".join(STATS))
+_LAG = re.compile(r"^(?P<tag>.+)_lag(?P<lag>\d+)$")
+
+# Rolling reductions each statistic needs; ptp reuses min and max.
+_REDUCTIONS = {"mean": ("mean",), "std": ("std",), "min": ("min",), "max": ("max",), "ptp": ("min", "max"), "slope": ("shift",)}
+
+
+class Node(NamedTuple):
+    """One feature to compute. ``kind`` is ``rolling``, ``lag``, ``regime`` or ``raw``."""
+
+    kind: str
+    tag: str
+    stat: str = ""
+    window: int = 0
+
+    @property
+    def name(self) -> str:
+        if self.kind == "rolling":
+            return f"{self.tag}_{self.stat}_w{self.window}"
+        if self.kind == "lag":
+            return f"{self.tag}_lag{self.window}"
+        if self.kind == "regime":
+            return f"{REGIME_PREFIX}{self.tag}"
+        return self.tag
+
+
+def parse_feature(name: str) -> Node:
+    match = _ROLLING.match(name)
+    if match:
+        return Node("rolling", match["tag"], match["stat"], int(match["window"]))
+    match = _LAG.match(name)
+    if match:
+        return Node("lag", match["tag"], window=int(match["lag"]))
+    if name.startswith(REGIME_PREFIX):
+        return Node("regime", name[len(REGIME_PREFIX) :])
+    return Node("raw", name)
+
+
+@dataclass
+class FeaturePlan:
+    """Unique feature nodes plus the mapping back to the classifier's column order.
+
+    ``columns`` is the requested list, repeats included; ``positions[i]`` is the
+    index into ``nodes`` that fills column ``i``.
+    """
+
+    columns: List[str]
+    nodes: List[Node]
+    positions: np.ndarray
+    dt_hours: float = DT_HOURS
+    counters: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def compile(cls, columns: Sequence[str], dt_hours: float = DT_HOURS) -> "FeaturePlan":
+        index: Dict[Node, int] = {}
+        positions = [index.setdefault(parse_feature(name), len(index)) for name in columns]
+        return cls(list(columns), list(index), np.asarray(positions, dtype=np.intp), dt_hours)
+
+    @classmethod
+    def from_csv(cls, path: Path, dt_hours: float = DT_HOURS) -> "FeaturePlan":
+        return cls.compile(load_feature_list(path), dt_hours)
+
+    def windows(self) -> Dict[str, Dict[int, Tuple[str, ...]]]:
+        """``tag -> window -> statistics`` for every rolling window the plan needs."""
+        out: Dict[str, Dict[int, Tuple[str, ...]]] = {}
+        for node in self.nodes:
+            if node.kind == "rolling":
+                stats = out.setdefault(node.tag, {}).setdefault(node.window, ())
+                out[node.tag][node.window] = stats + (node.stat,)
+        return out
+
+    def lags(self) -> Dict[str, Tuple[int, ...]]:
+        out: Dict[str, Tuple[int, ...]] = {}
+        for node in self.nodes:
+            if node.kind == "lag":
+                out[node.tag] = out.get(node.tag, ()) + (node.window,)
+        return out
+
+    def summary(self) -> Dict[str, int]:
+        """How much work deduplication and buffer sharing save, in rolling reductions."""
+        naive = sum(len(_REDUCTIONS[n.stat]) if n.kind == "rolling" else n.kind == "lag" for n in map(parse_feature, self.columns))
+        planned = sum(len({r for s in stats for r in _REDUCTIONS[s]}) for w in self.windows().values() for stats in w.values())
+        planned += sum(len(lags) for lags in self.lags().values())
+        return {
+            "columns": len(self.columns),
+            "unique_nodes": len(self.nodes),
+            "duplicate_columns": len(self.columns) - len(self.nodes),
+            "window_buffers": sum(len(w) for w in self.windows().values()),
+            "naive_reductions": int(naive),
+            "planned_reductions": int(planned),
+            **self.counters,
+        }
+
+    def _count(self, key: str, n: int = 1) -> None:
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def evaluate(self, frame: pd.DataFrame) -> np.ndarray:
+        """Compute every unique node once over ``frame`` and return the matrix in column order.
+
+        ``frame`` holds the raw tags and a ``regime`` label column; tags it lacks
+        come out as NaN. Each ``(tag, window, reduction)`` is computed once, so
+        repeated columns are copies and ``ptp`` reuses ``min``/``max``.
+        """
+        n = len(frame)
+        missing = np.full(n, np.nan)
+        reduced: Dict[Tuple[str, int, str], np.ndarray] = {}
+        values = np.empty((n, len(self.nodes)))
+
+        def series(tag: str) -> Optional[pd.Series]:
+            return frame[tag].astype(float) if tag in frame.columns else None
+
+        def reduction(s: pd.Series, tag: str, window: int, op: str) -> np.ndarray:
+            key = (tag, window, op)
+            if key not in reduced:
+                self._count("reductions_computed")
+                if op == "shift":
+                    reduced[key] = s.shift(window).to_numpy()
+                else:
+                    rolling = s.rolling(window, min_periods=min_periods(window))
+                    reduced[key] = getattr(rolling, op)().to_numpy()
+            else:
+                self._count("reductions_reused")
+            return reduced[key]
+
+        for j, node in enumerate(self.nodes):
+            if node.kind == "regime":
+                labels = frame["regime"].astype(str).to_numpy() if "regime" in frame.columns else None
+                values[:, j] = missing if labels is None else (labels == node.tag)
+                continue
+            s = series(node.tag)
+            if s is None:
+                values[:, j] = missing
+            elif node.kind == "raw":
+                values[:, j] = s.to_numpy()
+            elif node.kind == "lag":
+                values[:, j] = reduction(s, node.tag, node.window, "shift")
+            elif node.stat == "ptp":
+                values[:, j] = reduction(s, node.tag, node.window, "max") - reduction(s, node.tag, node.window, "min")
+            elif node.stat == "slope":
+                values[:, j] = (s.to_numpy() - reduction(s, node.tag, node.window, "shift")) / (node.window * self.dt_hours)
+            else:
+                values[:, j] = reduction(s, node.tag, node.window, node.stat)
+
+        return values[:, self.positions]
+
+    def streaming(self) -> StreamingFeatures:
+        """A streaming engine with one history buffer per tag and only the windows and statistics the plan uses."""
+        windows, lags = self.windows(), self.lags()
+        return StreamingFeatures.from_tag_features(
+            TagFeatures(tag, tuple(windows.get(tag, {})), lags.get(tag, ()), self.dt_hours, windows.get(tag, {}))
+            for tag in dict.fromkeys([*windows, *lags])
+        )
+
+    def run(self, engine: StreamingFeatures, frame: pd.DataFrame) -> np.ndarray:
+        """Stream every row of ``frame`` through ``engine`` (from :meth:`streaming`) and return the matrix.
+
+        The result has :meth:`evaluate`'s layout, but ``engine`` carries the
+        windows over from earlier calls, so ``frame`` only needs the new rows.
+        Raw and regime columns are copied from ``frame`` directly.
+        """
+        n = len(frame)
+        tags = list(engine.tags)
+        names = engine.names()
+        rows = [engine.update(dict(zip(tags, row))) for row in frame.reindex(columns=tags).to_numpy(dtype=float).tolist()]
+        # Every update fills the same keys in the same order as ``names()``.
+        streamed = np.array([list(row.values()) for row in rows], dtype=float).reshape(n, len(names))
+        position = {name: j for j, name in enumerate(names)}
+        labels = frame["regime"].astype(str).to_numpy() if "regime" in frame.columns else None
+
+        values = np.full((n, len(self.nodes)), np.nan)
+        for j, node in enumerate(self.nodes):
+            if node.kind == "regime":
+                if labels is not None:
+                    values[:, j] = labels == node.tag
+            elif node.kind == "raw":
+                if node.tag in frame.columns:
+                    values[:, j] = frame[node.tag].to_numpy(dtype=float)
+            elif node.name in position:
+                values[:, j] = streamed[:, position[node.name]]
+        return values[:, self.positions]
+
+    def row(self, sample: Mapping[str, object], computed: Mapping[str, float]) -> np.ndarray:
+        """Assemble one feature vector from a raw ``sample`` and the engine's ``computed`` features."""
+        regime = sample.get("regime")
+        unique = np.empty(len(self.nodes))
+        for j, node in enumerate(self.nodes):
+            if node.kind == "regime":
+                unique[j] = np.nan if regime is None else float(str(regime) == node.tag)
+            elif node.kind == "raw":
+                value = sample.get(node.tag)
+                unique[j] = np.nan if value is None else float(value)
+            else:
+                unique[j] = computed.get(node.name, np.nan)
+        return unique[self.positions]
@@ -0,0 +1,252 @@
+# Streaming rolling features (mean/std/min/max/ptp/slope over w8/w32/w96, lags 1/4/8)
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+WINDOWS = (8, 32, 96)
+LAGS = (1, 4, 8)
+DT_HOURS = 0.25
+STATS = ("mean", "std", "min", "max", "ptp", "slope")
+# Running mean/variance are rebuilt from the window this often to bound round-off drift.
+RESYNC_EVERY = 10_000
+
+NAN = float("nan")
+
+
+def min_periods(window: int) -> int:
+    return max(2, window // 2)
+
+
+def feature_name(tag: str, stat: str, window: int) -> str:
+    return f"{tag}_{stat}_w{window}"
+
+
+def lag_name(tag: str, lag: int) -> str:
+    return f"{tag}_lag{lag}"
+
+
+class RollingWindow:
+    """Rolling statistics over the last ``window`` samples, updated in O(1) per sample.
+
+    Matches ``Series.rolling(window, min_periods=max(2, window // 2))``: NaN
+    samples occupy a slot but are not counted, and each statistic is NaN until
+    ``min_periods`` valid samples are in the window. Mean and variance use
+    Welford add/remove updates; min and max use monotonic deques.
+    """
+
+    __slots__ = ("window", "min_periods", "count", "_mean", "_m2", "_mins", "_maxs", "_seq", "_since_resync")
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.min_periods = min_periods(window)
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._mins: deque = deque()  # (seq, value), values increasing
+        self._maxs: deque = deque()  # (seq, value), values decreasing
+        self._seq = -1
+        self._since_resync = 0
+
+    def push(self, value: float, leaving: Optional[float], history: Sequence[float] = ()) -> None:
+        """Add ``value``; ``leaving`` is the sample ``window`` steps back, which drops out.
+
+        ``history`` (oldest first, ending with ``value``) is only read for the
+        periodic resync.
+        """
+        self._seq += 1
+        if leaving is not None and not math.isnan(leaving):
+            self._remove(leaving)
+        if not math.isnan(value):
+            self._add(value)
+            while self._mins and self._mins[-1][1] >= value:
+                self._mins.pop()
+            self._mins.append((self._seq, value))
+            while self._maxs and self._maxs[-1][1] <= value:
+                self._maxs.pop()
+            self._maxs.append((self._seq, value))
+        oldest = self._seq - self.window
+        while self._mins and self._mins[0][0] <= oldest:
+            self._mins.popleft()
+        while self._maxs and self._maxs[0][0] <= oldest:
+            self._maxs.popleft()
+
+        self._since_resync += 1
+        if self._since_resync >= RESYNC_EVERY and history:
+            self._resync(list(history)[-self.window :])
+
+    def _add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (x - self._mean)
+
+    def _remove(self, x: float) -> None:
+        if self.count <= 1:
+            self.count, self._mean, self._m2 = 0, 0.0, 0.0
+            return
+        self.count -= 1
+        delta = x - self._mean
+        self._mean -= delta / self.count
+        self._m2 -= delta * (x - self._mean)
+
+    def _resync(self, values: Sequence[float]) -> None:
+        valid = np.asarray(values, dtype=float)
+        valid = valid[~np.isnan(valid)]
+        self.count = len(valid)
+        self._mean = float(valid.mean()) if self.count else 0.0
+        self._m2 = float(((valid - self._mean) ** 2).sum()) if self.count else 0.0
+        self._since_resync = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.min_periods
+
+    def mean(self) -> float:
+        return self._mean if self.ready else NAN
+
+    def std(self) -> float:
+        if not self.ready:
+            return NAN
+        if self._maxs[0][1] == self._mins[0][1]:
+            return 0.0  # constant window; avoids sqrt of round-off, as pandas does
+        return math.sqrt(max(self._m2, 0.0) / (self.count - 1))
+
+    def min(self) -> float:
+        return self._mins[0][1] if self.ready else NAN
+
+    def max(self) -> float:
+        return self._maxs[0][1] if self.ready else NAN
+
+    def ptp(self) -> float:
+        return self._maxs[0][1] - self._mins[0][1] if self.ready else NAN
+
+
+class TagFeatures:
+    """Rolling windows and lags for one tag, sharing a single history buffer."""
+
+    def __init__(
+        self,
+        tag: str,
+        windows: Sequence[int] = WINDOWS,
+        lags: Sequence[int] = LAGS,
+        dt_hours: float = DT_HOURS,
+        stats: Union[Sequence[str], Mapping[int, Sequence[str]]] = STATS,
+    ) -> None:
+        self.tag = tag
+        self.windows = {w: RollingWindow(w) for w in windows}
+        self.lags = tuple(lags)
+        self.dt_hours = dt_hours
+        # Either one set of statistics for every window or a set per window.
+        self.stats = {w: tuple(stats[w] if isinstance(stats, Mapping) else stats) for w in windows}
+        self._names = {w: [(stat, feature_name(tag, stat, w)) for stat in self.stats[w]] for w in windows}
+        self._lag_names = [(lag, lag_name(tag, lag)) for lag in self.lags]
+        # Enough history for the value leaving the longest window and the deepest lag.
+        self._history: deque = deque(maxlen=max([*windows, *lags, 0]) + 1)
+
+    def _back(self, steps: int) -> Optional[float]:
+        return self._history[-1 - steps] if steps < len(self._history) else None
+
+    def update(self, value: Optional[float], out: Dict[str, float]) -> None:
+        """Push one sample and write this tag's features into ``out``."""
+        x = NAN if value is None else float(value)
+        self._history.append(x)
+        for w, roll in self.windows.items():
+            leaving = self._back(w)
+            roll.push(x, leaving, self._history)
+            for stat, name in self._names[w]:
+                if stat == "slope":
+                    # The notebook's slope: change over the window per hour, not a regression fit.
+                    out[name] = NAN if leaving is None else (x - leaving) / (w * self.dt_hours)
+                else:
+                    out[name] = getattr(roll, stat)()
+        for lag, name in self._lag_names:
+            past = self._back(lag)
+            out[name] = NAN if past is None else past
+
+    def names(self) -> List[str]:
+        return [name for w in self.windows for _, name in self._names[w]] + [name for _, name in self._lag_names]
+
+
+class StreamingFeatures:
+    """Rolling features for many tags, updated once per 15-minute sample.
+
+    ``update`` returns the same columns, with the same values, as
+    :func:`offline_features` produces for the latest row, without re-reading
+    the window.
+    """
+
+    def __init__(
+        self,
+        tags: Iterable[str],
+        windows: Sequence[int] = WINDOWS,
+        lags: Sequence[int] = LAGS,
+        dt_hours: float = DT_HOURS,
+        stats: Sequence[str] = STATS,
+    ) -> None:
+        self.tags = {tag: TagFeatures(tag, windows, lags, dt_hours, stats) for tag in dict.fromkeys(tags)}
+
+    @classmethod
+    def from_tag_features(cls, tag_features: Iterable[TagFeatures]) -> "StreamingFeatures":
+        """Build an engine from individually configured tags (see :mod:`backend.feature_plan`)."""
+        engine = cls(())
+        engine.tags = {state.tag: state for state in tag_features}
+        return engine
+
+    @classmethod
+    def from_manifest(cls, manifest: Mapping[str, object], tags: Iterable[str]) -> "StreamingFeatures":
+        """Use ``feature_windows`` and ``dt_hours`` from the notebook's ``manifest.json``."""
+        fw = dict(manifest.get("feature_windows") or {})
+        windows = tuple(fw[k] for k in ("short", "med", "long") if k in fw) or WINDOWS
+        lags = tuple(fw.get("lags", LAGS))
+        return cls(tags, windows, lags, float(manifest.get("dt_hours", DT_HOURS)))
+
+    def update(self, sample: Mapping[str, Optional[float]]) -> Dict[str, float]:
+        """Push one sample (tag -> value; missing tags count as NaN) and return the current features."""
+        out: Dict[str, float] = {}
+        for tag, state in self.tags.items():
+            state.update(sample.get(tag), out)
+        return out
+
+    def names(self) -> List[str]:
+        return [name for state in self.tags.values() for name in state.names()]
+
+    def run(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Stream every row of ``frame`` through the engine (for replays and checks against pandas)."""
+        tags = list(self.tags)
+        values = frame.reindex(columns=tags).to_numpy(dtype=float)
+        rows = [self.update(dict(zip(tags, row))) for row in values.tolist()]
+        return pd.DataFrame(rows, index=frame.index, columns=self.names())
+
+
+def offline_features(
+    frame: pd.DataFrame,
+    tags: Iterable[str],
+    windows: Sequence[int] = WINDOWS,
+    lags: Sequence[int] = LAGS,
+    dt_hours: float = DT_HOURS,
+    stats: Sequence[str] = STATS,
+) -> pd.DataFrame:
+    """The notebook's pandas definition of the same features (``add_roll_features`` plus lags)."""
+    out: Dict[str, pd.Series] = {}
+    for tag in dict.fromkeys(tags):
+        s = frame[tag].astype(float)
+        for w in windows:
+            roll = s.rolling(w, min_periods=min_periods(w))
+            cols = {
+                "mean": roll.mean,
+                "std": roll.std,
+                "min": roll.min,
+                "max": roll.max,
+                "ptp": lambda roll=roll: roll.max() - roll.min(),
+                "slope": lambda w=w, s=s: (s - s.shift(w)) / (w * dt_hours),
+            }
+            for stat in stats:
+                out[feature_name(tag, stat, w)] = cols[stat]()
+        for lag in lags:
+            out[lag_name(tag, lag)] = s.shift(lag)
+    return pd.DataFrame(out, index=frame.index)
@@ -0,0 +1,255 @@
+# Request instrumentation: per-stage Server-Timing, Prometheus histograms and a slow-request stack sampler
+from __future__ import annotations
+
+import bisect
+import contextvars
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Upper bounds (seconds) of the latency histogram buckets.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class RequestTrace:
+    """Stage timings of one request, plus the stack samples taken while its work ran on pool threads."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.threads: set = set()
+        self.samples: Counter = Counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value: each stage so far, then the total, in milliseconds."""
+        total = time.perf_counter() - self.start
+        parts = [f"{name};dur={seconds * 1e3:.2f}" for name, seconds in self.stages.items()]
+        return ", ".join(parts + [f"total;dur={total * 1e3:.2f}"])
+
+
+_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("request_trace", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as stage ``name`` of the current request; a no-op outside requests."""
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator form of :func:`stage`."""
+
+    def decorate(fn: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def run_traced(fn: Callable[..., T], *args: Any) -> T:
+    """Call ``fn`` with this thread attributed to the current request, so the sampler can see it."""
+    trace = _trace.get()
+    if trace is None:
+        return fn(*args)
+    ident = threading.get_ident()
+    trace.threads.add(ident)
+    try:
+        return fn(*args)
+    finally:
+        trace.threads.discard(ident)
+
+
+class Histogram:
+    """Cumulative Prometheus histogram keyed by a fixed tuple of label names."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float] = BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, values: Sequence[str], seconds: float) -> None:
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.setdefault(tuple(values), [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][i] += 1
+            series[1] += seconds
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key))
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {running}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {running}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_values(name: str, help_text: str, kind: str, values: Dict[Tuple[Tuple[str, str], ...], float]) -> List[str]:
+    """A gauge or counter family; ``values`` maps ``((label, value), ...)`` to the sample."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in values.items():
+        text = ",".join(f'{label}="{_escape(str(v))}"' for label, v in labels)
+        lines.append(f"{name}{{{text}}} {value}" if text else f"{name} {value}")
+    return lines
+
+
+REQUESTS = Histogram("jazan_request_duration_seconds", "Request latency by route and status.", ("route", "status"))
+STAGES = Histogram(
+    "jazan_stage_duration_seconds", "Time spent in each stage of the work behind a request.", ("route", "stage")
+)
+
+
+class SlowRequestProfiler:
+    """Sample the stacks of pool threads working for a request; keep the samples of slow requests.
+
+    A daemon thread reads ``sys._current_frames()`` every ``interval_s`` for
+    the threads registered by :func:`run_traced`, so only requests whose work
+    runs through it are profiled, and there is no per-call tracing overhead.
+    Requests taking at least ``threshold_s`` are written to ``out_dir`` as
+    folded stacks (one ``frame;frame;... count`` line per stack), which
+    speedscope and flamegraph.pl read; only the newest ``keep`` files are kept.
+    """
+
+    def __init__(self, threshold_s: float, out_dir: Path, interval_s: float = 0.005, keep: int = 50) -> None:
+        self.threshold_s = threshold_s
+        self.out_dir = out_dir
+        self.interval_s = interval_s
+        self.keep = keep
+        self.dumped = 0
+        self._lock = threading.Lock()
+        self._active: set = set()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, trace: RequestTrace) -> None:
+        with self._lock:
+            self._active.add(trace)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def finish(self, trace: RequestTrace, route: str, seconds: float) -> Optional[Path]:
+        with self._lock:
+            self._active.discard(trace)
+        if seconds < self.threshold_s or not trace.samples:
+            return None
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        path = self.out_dir / f"{time.strftime('%Y%m%dT%H%M%S')}-{slug}-{seconds * 1e3:.0f}ms-{os.getpid()}.folded"
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in trace.samples.most_common()))
+        self.dumped += 1
+        old = sorted(self.out_dir.glob("*.folded"), key=lambda p: p.stat().st_mtime)[: -self.keep]
+        for stale in old:
+            stale.unlink(missing_ok=True)
+        return path
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                traces = [trace for trace in self._active if trace.threads]
+                idle = not self._active
+            if idle:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            if traces:
+                frames = sys._current_frames()
+                for trace in traces:
+                    for ident in list(trace.threads):
+                        frame = frames.get(ident)
+                        if frame is not None:
+                            trace.samples[_folded(frame)] += 1
+            time.sleep(self.interval_s)
+
+
+def _folded(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class TimingMiddleware:
+    """ASGI middleware that traces every HTTP request.
+
+    Adds a ``Server-Timing`` header with the stages recorded so far, feeds the
+    request and stage histograms (labelled by route template, not raw path),
+    and hands the trace to the optional :class:`SlowRequestProfiler`.
+    """
+
+    def __init__(self, app, profiler: Optional[SlowRequestProfiler] = None) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _trace.set(trace)
+        if self.profiler is not None:
+            self.profiler.watch(trace)
+        status = 500
+
+        async def send_timed(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _trace.reset(token)
+            seconds = time.perf_counter() - trace.start
+            # The router stores the matched route in the scope; unmatched paths share one label.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUESTS.observe((route, str(status)), seconds)
+            for name, spent in list(trace.stages.items()):
+                STAGES.observe((route, name), spent)
+            if self.profiler is not None:
+                self.profiler.finish(trace, route, seconds)
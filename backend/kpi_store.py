@@ -0,0 +1,339 @@
+# KPI time-series storage: Parquet/Feather with the notebook's CSV as fallback
+#
+#   python -m backend.kpi_store convert                      # CSV -> Parquet next to it
+#   python -m backend.kpi_store convert --format feather
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (pandas' Parquet/Feather engine)
+except ImportError:  # pyarrow is optional; only the CSV store is readable without it
+    pyarrow = None
+
+KPI_STEM = "kpis_breach7d"
+# One Parquet row group / Feather record batch per week of 15-minute data keeps
+# time-range reads selective.
+ROW_GROUP_ROWS = 7 * 96
+
+
+def store_path(out_dir: Path, suffix: str) -> Path:
+    return out_dir / f"{KPI_STEM}{suffix}"
+
+
+def readable(path: Path) -> bool:
+    return path.exists() and (path.suffix == ".csv" or pyarrow is not None)
+
+
+def available_columns(path: Path) -> List[str]:
+    """Column names in the store, without reading any data."""
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return list(pq.read_schema(path).names)
+    if path.suffix == ".feather":
+        import pyarrow.ipc as ipc
+
+        with ipc.open_file(path) as reader:
+            return list(reader.schema.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def column_dtypes(path: Path, sample_rows: int = 1000) -> Dict[str, Any]:
+    """Value column dtypes of the store; CSV types are inferred from its first ``sample_rows`` rows."""
+    if path.suffix == ".csv":
+        frame = pd.read_csv(path, parse_dates=["ts"], nrows=sample_rows)
+    else:
+        frame = _empty_frame(path)
+    return {name: dtype for name, dtype in frame.dtypes.items() if name != "ts"}
+
+
+def read_kpis(
+    path: Path,
+    columns: Optional[Sequence[str]] = None,
+    start: Optional[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    """Read a KPI store into a ``ts``-indexed, time-sorted frame.
+
+    ``columns`` limits the read to those value columns (``ts`` is always
+    included); names missing from the store are skipped. ``start`` keeps only
+    rows at or after that time: Parquet skips row groups whose ``ts``
+    statistics end before it and Feather skips whole record batches, both
+    relying on the time-sorted layout :func:`write_kpis` produces. ``regime``
+    comes back as a categorical.
+    """
+    wanted = None
+    if columns is not None:
+        present = set(available_columns(path))
+        wanted = ["ts"] + [c for c in dict.fromkeys(columns) if c in present and c != "ts"]
+
+    if path.suffix == ".parquet":
+        df = _read_parquet(path, wanted, start)
+    elif path.suffix == ".feather":
+        df = _read_feather(path, wanted, start)
+    else:
+        df = pd.read_csv(path, usecols=wanted, parse_dates=["ts"])
+
+    if "ts" not in df.columns:
+        raise ValueError("Expected a 'ts' column in KPI data.")
+    df = df.set_index("ts")
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    df.index.name = "ts"
+    if start is not None:
+        df = since(df, start)
+    if "regime" in df.columns and not isinstance(df["regime"].dtype, pd.CategoricalDtype):
+        df["regime"] = df["regime"].astype("category")
+    return df
+
+
+def _read_parquet(path: Path, columns: Optional[List[str]], start: Optional[pd.Timestamp]) -> pd.DataFrame:
+    if start is None:
+        return pd.read_parquet(path, columns=columns)
+
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    return pf.read_row_groups(_row_groups(pf, start), columns=columns).to_pandas()
+
+
+def _row_groups(pf, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp] = None) -> List[int]:
+    """Row groups of a Parquet file whose ``ts`` statistics overlap ``[start, end]``."""
+    ts_col = pf.schema_arrow.get_field_index("ts")
+    groups = []
+    for i in range(pf.metadata.num_row_groups):
+        stats = pf.metadata.row_group(i).column(ts_col).statistics
+        # Row groups without statistics have to be read to be safe.
+        if stats is None or not stats.has_min_max:
+            groups.append(i)
+        elif (start is None or pd.Timestamp(stats.max) >= start) and (end is None or pd.Timestamp(stats.min) <= end):
+            groups.append(i)
+    return groups
+
+
+def _read_feather(path: Path, columns: Optional[List[str]], start: Optional[pd.Timestamp]) -> pd.DataFrame:
+    if start is None:
+        return pd.read_feather(path, columns=columns)
+
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    cutoff = pd.Timestamp(start)
+    with pa.memory_map(str(path)) as source:
+        reader = ipc.open_file(source)
+        # Walk back from the newest batch until one starts before the cutoff.
+        batches = []
+        for i in reversed(range(reader.num_record_batches)):
+            batch = reader.get_batch(i)
+            if columns is not None:
+                batch = batch.select(columns)
+            batches.append(batch)
+            if batch.num_rows and pd.Timestamp(batch.column("ts").slice(0, 1).to_numpy()[0]) < cutoff:
+                break
+        schema = batches[0].schema if batches else reader.schema
+        table = pa.Table.from_batches(batches[::-1], schema=schema)
+    return table.to_pandas()
+
+
+def iter_kpis(
+    path: Path,
+    chunk_rows: int,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> Iterator[pd.DataFrame]:
+    """Read a time-sorted KPI store as ``ts``-indexed frames of about ``chunk_rows`` rows.
+
+    Only rows with ``start <= ts <= end`` are returned. Parquet skips row groups
+    outside the range and Feather skips record batches; the CSV store is parsed
+    chunk by chunk and reading stops past ``end``. Memory stays at about one
+    chunk whatever the store's size. At least one (possibly empty) frame is
+    yielded, so callers always see the columns.
+    """
+    if path.suffix == ".parquet":
+        chunks = _parquet_chunks(path, chunk_rows, start, end)
+    elif path.suffix == ".feather":
+        chunks = _feather_chunks(path, chunk_rows, start, end)
+    else:
+        chunks = pd.read_csv(path, parse_dates=["ts"], chunksize=chunk_rows)
+
+    empty = True
+    for chunk in chunks:
+        chunk = chunk.set_index("ts")
+        if end is not None and len(chunk) and chunk.index[0] > end:
+            break
+        lo = int(chunk.index.searchsorted(start, side="left")) if start is not None else 0
+        hi = int(chunk.index.searchsorted(end, side="right")) if end is not None else len(chunk)
+        if hi > lo:
+            empty = False
+            yield chunk.iloc[lo:hi]
+    if empty:
+        yield _empty_frame(path).set_index("ts")
+
+
+def _parquet_chunks(
+    path: Path, chunk_rows: int, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]
+) -> Iterator[pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    for batch in pf.iter_batches(batch_size=chunk_rows, row_groups=_row_groups(pf, start, end)):
+        yield batch.to_pandas()
+
+
+def _feather_chunks(
+    path: Path, chunk_rows: int, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]
+) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    with pa.memory_map(str(path)) as source:
+        reader = ipc.open_file(source)
+        pending, rows = [], 0
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if not batch.num_rows:
+                continue
+            ts = batch.column("ts")
+            if start is not None and pd.Timestamp(ts[-1].as_py()) < start:
+                continue
+            if end is not None and pd.Timestamp(ts[0].as_py()) > end:
+                break
+            pending.append(batch)
+            rows += batch.num_rows
+            if rows >= chunk_rows:
+                yield pa.Table.from_batches(pending).to_pandas()
+                pending, rows = [], 0
+        if pending:
+            yield pa.Table.from_batches(pending).to_pandas()
+
+
+def _empty_frame(path: Path) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(path).empty_table().to_pandas()
+    if path.suffix == ".feather":
+        import pyarrow.ipc as ipc
+
+        with ipc.open_file(path) as reader:
+            return reader.schema.empty_table().to_pandas()
+    return pd.read_csv(path, parse_dates=["ts"], nrows=0)
+
+
+def since(df: pd.DataFrame, start: pd.Timestamp) -> pd.DataFrame:
+    """Rows of a time-sorted frame at or after ``start``, found by binary search."""
+    return df.iloc[int(df.index.searchsorted(start, side="left")) :]
+
+
+def write_kpis(df: pd.DataFrame, path: Path) -> Path:
+    """Write a ``ts``-indexed KPI frame in the format implied by ``path``'s suffix."""
+    out = df.sort_index().reset_index()
+    if "regime" in out.columns:
+        out["regime"] = out["regime"].astype("category")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    if path.suffix == ".parquet":
+        out.to_parquet(tmp, index=False, row_group_size=ROW_GROUP_ROWS)
+    elif path.suffix == ".feather":
+        out.to_feather(tmp, chunksize=ROW_GROUP_ROWS)
+    else:
+        out.to_csv(tmp, index=False)
+    # Swap in atomically so readers never see a half-written store.
+    tmp.replace(path)
+    return path
+
+
+def append_kpis(df: pd.DataFrame, path: Path) -> int:
+    """Append the rows of ``df`` later than any already stored to the store at ``path``.
+
+    Rows at or before the store's last ``ts`` are dropped, so re-appending a
+    batch (e.g. after a crash between the append and the pipeline's state
+    save) adds nothing twice. The CSV store is appended in place (in the
+    header's column order), so the cost is proportional to the new rows; a
+    partial last line left by an interrupted append is cut off first.
+    Parquet/Feather files cannot be extended, so they are read, extended and
+    rewritten atomically. Returns the number of rows appended.
+    """
+    df = df.sort_index()
+    if not path.exists():
+        write_kpis(df, path)
+        return len(df)
+    if path.suffix == ".csv":
+        df = _after(df, _csv_last_ts(path))
+        if df.empty:
+            return 0
+        header = available_columns(path)
+        out = df.reset_index().reindex(columns=header)
+        # One write per batch keeps the window for a torn row small.
+        text = out.to_csv(header=False, index=False)
+        with path.open("a", newline="") as handle:
+            handle.write(text)
+        return len(df)
+    stored = read_kpis(path)
+    df = _after(df, stored.index[-1] if len(stored) else None)
+    if not df.empty:
+        write_kpis(pd.concat([stored, df]), path)
+    return len(df)
+
+
+def _after(df: pd.DataFrame, last: Optional[pd.Timestamp]) -> pd.DataFrame:
+    return df if last is None else df.iloc[int(df.index.searchsorted(last, side="right")) :]
+
+
+def _csv_last_ts(path: Path, block: int = 1 << 16) -> Optional[pd.Timestamp]:
+    """``ts`` of the CSV store's last complete row, read from the end of the file.
+
+    A trailing line without its newline is what an interrupted append leaves
+    behind; it is truncated away so the next append starts on a fresh line.
+    """
+    ts_col = available_columns(path).index("ts")
+    with path.open("rb+") as handle:
+        pos = handle.seek(0, os.SEEK_END)
+        tail = b""
+        # Read back until the tail holds the last complete line and the newline before it.
+        while pos > 0 and tail.count(b"\n") < 2:
+            step = min(block, pos)
+            pos -= step
+            handle.seek(pos)
+            tail = handle.read(step) + tail
+            if not tail.endswith(b"\n"):
+                cut = tail.rfind(b"\n")
+                if cut >= 0:
+                    handle.truncate(pos + cut + 1)
+                    tail = tail[: cut + 1]
+    lines = tail.split(b"\n")[:-1]
+    if len(lines) < 2 and pos == 0:
+        return None  # header only
+    row = next(csv.reader([lines[-1].rstrip(b"\r").decode("utf-8")]))
+    return pd.Timestamp(row[ts_col])
+
+
+def convert(src: Path, dst: Path) -> Path:
+    return write_kpis(read_kpis(src), dst)
+
+
+def main() -> None:
+    from .server import OUT_DIR
+
+    parser = argparse.ArgumentParser(description="Manage the KPI time-series store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="Convert the KPI CSV into a columnar store.")
+    conv.add_argument("--src", type=Path, default=store_path(OUT_DIR, ".csv"))
+    conv.add_argument("--dst", type=Path, default=None)
+    conv.add_argument("--format", choices=["parquet", "feather"], default="parquet")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        dst = args.dst or args.src.with_suffix(f".{args.format}")
+        print(f"Wrote {convert(args.src, dst)}")
+
+
+if __name__ == "__main__":
+    main()
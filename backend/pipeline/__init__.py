@@ -0,0 +1,15 @@
+# Incremental raw-tag -> KPI pipeline
+from .regime import RegimeState, RegimeThresholds, label_regimes
+from .runner import KPI_COLUMNS, TAIL_ROWS, KPIPipeline, PipelineModels, PipelineState, alerting_params
+
+__all__ = [
+    "KPI_COLUMNS",
+    "TAIL_ROWS",
+    "KPIPipeline",
+    "PipelineModels",
+    "PipelineState",
+    "RegimeState",
+    "RegimeThresholds",
+    "alerting_params",
+    "label_regimes",
+]
@@ -0,0 +1,92 @@
+# Operating-regime tagging (normal / low_load / shutdown / post_startup), batch by batch
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, replace
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+SPEED_PATTERN = r"SI865R|speed|rpm"
+POUT_PATTERN = r"PI870|disch"
+# The first 24h of 15-minute samples after a shutdown -> running transition.
+POST_STARTUP_STEPS = 96
+RUNNING = ("low_load", "normal")
+
+
+def find_column(columns: Iterable[str], pattern: str) -> Optional[str]:
+    return next((c for c in columns if re.search(pattern, str(c), re.I)), None)
+
+
+@dataclass(frozen=True)
+class RegimeThresholds:
+    """Speed/discharge-pressure cut-offs, fitted once on history and then frozen.
+
+    The notebook took the quantiles over the whole year; live batches reuse the
+    values fitted at bootstrap so a label never changes after it is written.
+    """
+
+    speed_col: Optional[str] = None
+    pout_col: Optional[str] = None
+    speed_shutdown: float = float("nan")
+    pout_shutdown: float = float("nan")
+    speed_low: float = float("nan")
+
+    @classmethod
+    def fit(cls, frame: pd.DataFrame) -> "RegimeThresholds":
+        speed_col = find_column(frame.columns, SPEED_PATTERN)
+        pout_col = find_column(frame.columns, POUT_PATTERN)
+        out = cls(speed_col, pout_col)
+        if speed_col:
+            speed = frame[speed_col]
+            out = replace(out, speed_shutdown=min(1000.0, speed.quantile(0.10)), speed_low=speed.quantile(0.25))
+        if pout_col:
+            out = replace(out, pout_shutdown=frame[pout_col].quantile(0.10))
+        return out
+
+    def base_regimes(self, frame: pd.DataFrame) -> np.ndarray:
+        """Labels before the post-startup pass: shutdown, then low_load, else normal."""
+        shutdown = np.zeros(len(frame), dtype=bool)
+        low = np.zeros(len(frame), dtype=bool)
+        if self.speed_col:
+            speed = frame[self.speed_col].to_numpy(dtype=float)
+            shutdown |= speed <= self.speed_shutdown
+            low = speed <= self.speed_low
+        if self.pout_col:
+            shutdown |= frame[self.pout_col].to_numpy(dtype=float) <= self.pout_shutdown
+        return np.select([shutdown, low], ["shutdown", "low_load"], "normal").astype(object)
+
+
+@dataclass(frozen=True)
+class RegimeState:
+    """``prev_base`` is the last base label seen; ``post_left`` the rows left in an open post-startup block."""
+
+    prev_base: str = "shutdown"
+    post_left: int = 0
+
+
+def label_regimes(base: np.ndarray, state: RegimeState) -> Tuple[np.ndarray, RegimeState]:
+    """Overlay post-startup blocks on ``base`` labels, carrying open blocks across batches.
+
+    A block starts at a shutdown -> running transition and covers
+    ``POST_STARTUP_STEPS`` rows; transitions inside a block do not restart it.
+    """
+    labels = base.copy()
+    n = len(base)
+    if not n:
+        return labels, state
+    prev = np.concatenate(([state.prev_base], base[:-1]))
+    transitions = np.flatnonzero((prev == "shutdown") & np.isin(base, RUNNING))
+
+    pos = min(state.post_left, n)
+    labels[:pos] = "post_startup"
+    left = state.post_left - pos
+    for i in transitions:
+        if i < pos:
+            continue
+        end = int(i) + POST_STARTUP_STEPS
+        labels[i : min(end, n)] = "post_startup"
+        pos = end
+        left = max(0, end - n)
+    return labels, RegimeState(str(base[-1]), left)
@@ -0,0 +1,128 @@
+# Online scoring with the notebook's calibrated breach classifiers
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import joblib
+except ImportError:  # joblib ships with scikit-learn; scoring is disabled without it
+    joblib = None
+
+MODEL_NAMES = ("breach7d", "degraded")
+REGIME_PREFIX = "regime_"
+# Recent batch latencies kept for the percentile summary.
+LATENCY_WINDOW = 1024
+
+
+def load_feature_list(path: Path) -> List[str]:
+    """Feature names in training order (the notebook saved them under a stray ``0`` header)."""
+    names = pd.read_csv(path, header=None)[0].astype(str).tolist()
+    if names and names[0] == "0":
+        names = names[1:]
+    return names
+
+
+def feature_matrix(rows: Sequence[Mapping[str, Any]], features: Sequence[str]) -> pd.DataFrame:
+    """Arrange feature rows into the model's column order.
+
+    Features absent from a row are NaN (the pipelines impute them). A row may
+    give its ``regime`` label instead of the ``regime_*`` one-hot columns.
+    """
+    frame = pd.DataFrame.from_records(list(rows))
+    if "regime" in frame.columns:
+        regime = frame.pop("regime")
+        for name in dict.fromkeys(features):
+            if name.startswith(REGIME_PREFIX) and name not in frame.columns:
+                frame[name] = (regime == name[len(REGIME_PREFIX) :]).astype(float)
+    # reindex tolerates the repeated names in the breach7d list; every copy gets the same values.
+    return frame.reindex(columns=list(features)).astype(float)
+
+
+class LatencyStats:
+    """Batch counters plus a sliding window of recent latencies."""
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self._lock = threading.Lock()
+        self._recent: deque = deque(maxlen=window)
+        self.batches = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def record(self, rows: int, seconds: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.rows += rows
+            self.seconds += seconds
+            self._recent.append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = np.asarray(self._recent, dtype=float) * 1e3
+            batches, rows, seconds = self.batches, self.rows, self.seconds
+        out: Dict[str, Any] = {
+            "batches": batches,
+            "rows": rows,
+            "rows_per_s": rows / seconds if seconds else None,
+        }
+        for label, q in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99)):
+            out[label] = float(np.percentile(recent, q)) if len(recent) else None
+        out["max_ms"] = float(recent.max()) if len(recent) else None
+        return out
+
+
+class ModelScorer:
+    """A calibrated classifier and its feature list, loaded once and reused for every batch."""
+
+    def __init__(self, name: str, model: Any, features: Sequence[str]) -> None:
+        self.name = name
+        self.model = model
+        self.features = list(features)
+        # Models fitted on DataFrames check the column names; others take a plain
+        # array, as do lists with repeated names, which newer pandas/sklearn reject.
+        self._wants_frame = hasattr(model, "feature_names_in_") and len(set(self.features)) == len(self.features)
+        self.latency = LatencyStats()
+
+    @classmethod
+    def load(cls, art_dir: Path, name: str) -> "ModelScorer":
+        if joblib is None:
+            raise RuntimeError("joblib/scikit-learn are not installed.")
+        model = joblib.load(art_dir / f"clf_calibrated_{name}.joblib")
+        return cls(name, model, load_feature_list(art_dir / f"feature_list_{name}.csv"))
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """Positive-class probabilities for an already-arranged feature matrix, in one call."""
+        start = time.perf_counter()
+        proba = self.model.predict_proba(X if self._wants_frame else X.to_numpy())[:, 1]
+        self.latency.record(len(X), time.perf_counter() - start)
+        return proba
+
+    def score(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        return self.predict(feature_matrix(rows, self.features))
+
+    def warm_up(self) -> None:
+        """Run one throwaway prediction so the first request does not pay for lazy initialisation."""
+        X = pd.DataFrame(np.zeros((1, len(self.features))), columns=self.features)
+        self.model.predict_proba(X if self._wants_frame else X.to_numpy())
+
+
+def load_scorers(art_dir: Path, names: Sequence[str] = MODEL_NAMES) -> Tuple[Dict[str, ModelScorer], Dict[str, str]]:
+    """Load and warm up each model; returns ``(scorers, errors)`` so one bad artifact does not block the rest."""
+    scorers: Dict[str, ModelScorer] = {}
+    errors: Dict[str, str] = {}
+    for name in names:
+        try:
+            scorer = ModelScorer.load(art_dir, name)
+            scorer.warm_up()
+        except Exception as exc:  # unpickling failures surface as many different types
+            errors[name] = f"{type(exc).__name__}: {exc}"
+            continue
+        scorers[name] = scorer
+    return scorers, errors
+
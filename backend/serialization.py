@@ -0,0 +1,75 @@
+# JSON rendering that bypasses FastAPI's jsonable_encoder
+from __future__ import annotations
+
+import datetime as dt
+import json
+import math
+from typing import Any, Optional
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    # Called by orjson for anything it cannot serialise natively (str/object arrays, pandas Timestamps).
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (dt.date, dt.datetime)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_builtin(obj: Any) -> Any:
+    """Recursively convert NumPy values and datetimes to JSON-ready builtins, mapping NaN/inf to ``None``."""
+    if isinstance(obj, dict):
+        return {key: to_builtin(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_builtin(value) for value in obj]
+    if isinstance(obj, np.ndarray):
+        return to_builtin(obj.tolist())
+    if isinstance(obj, np.generic):
+        return to_builtin(obj.item())
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, (dt.date, dt.datetime)):
+        return obj.isoformat()
+    return obj
+
+
+def dumps(content: Any) -> bytes:
+    """Serialise ``content`` to JSON bytes; NaN and infinities are written as ``null``."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        to_builtin(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def sse_event(data: Any, event: Optional[str] = None, event_id: Optional[str] = None) -> bytes:
+    """One Server-Sent Events message with ``data`` as a single line of JSON."""
+    head = b""
+    if event_id is not None:
+        head += b"id: " + event_id.encode() + b"\n"
+    if event is not None:
+        head += b"event: " + event.encode() + b"\n"
+    return head + b"data: " + dumps(data) + b"\n\n"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that serialises NumPy arrays and datetimes directly.
+
+    Return an instance from a handler so FastAPI skips ``jsonable_encoder``.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,26 +1,96 @@
 # FastAPI backend for the Jazan POC dashboard
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
+import asyncio
+import copy
 import json
 import math
+import os
+import threading
+import time
 
 import numpy as np
 import pandas as pd
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from pandas.api.types import union_categoricals
+from pydantic import BaseModel
+
+from .alerts import (
+    AlertState,
+    advance_alerts,
+    breach_events,
+    cooldown_ns,
+    covered_events,
+    fire_indices,
+    index_ns,
+    lead_times_ns,
+    segmented_fire_indices,
+    sweep_fire_indices,
+)
+from . import assets, export, kpi_store, shared_kpis
+from .caching import FileCache, FileVersion, LRUCache, file_version
+from .compute import ComputeExecutor, Overloaded
+from .downsample import downsample_indices
+from .instrumentation import REQUESTS, STAGES, SlowRequestProfiler, TimingMiddleware, render_values, run_traced, stage, timed
+from .scoring import MODEL_NAMES, ModelScorer, feature_matrix, load_scorers
+from .serialization import FastJSONResponse, dumps, sse_event
 
 
 BASE_DIR = Path(__file__).resolve().parent
 OUT_DIR = BASE_DIR / "outputs"
 ART_DIR = OUT_DIR / "artifacts"
 KPIS_CSV = OUT_DIR / "kpis_breach7d.csv"
+KPIS_PARQUET = OUT_DIR / "kpis_breach7d.parquet"
+KPIS_FEATHER = OUT_DIR / "kpis_breach7d.feather"
 SUMMARY_JSON = OUT_DIR / "kpis_summary.json"
+MANIFEST_JSON = ART_DIR / "manifest.json"
+ASSETS_DIR = Path(os.environ.get("JAZAN_ASSETS_DIR", OUT_DIR / "assets"))
+
+# Columns each endpoint reads; columnar stores skip everything else.
+KPI_VIEW_COLUMNS = ("prob_breach7d", "regime", "dp_excess_mbar", "health_score")
+SWEEP_COLUMNS = ("prob_breach7d", "regime", "dp_smooth_mbar")
+
+BREACH_HORIZON_DAYS = 7
+SWEEP_MAX_COMBINATIONS = 5000
+SCORE_MAX_ROWS = 10_000
+
+# Alert results per (KPI file version, tuning parameters); see tuned_alerts().
+ALERT_CACHE_SIZE = int(os.environ.get("JAZAN_ALERT_CACHE_SIZE", "128"))
+ALERT_CACHE_TTL_S = float(os.environ.get("JAZAN_ALERT_CACHE_TTL_S", "900"))
+# /api/kpis/stream: store polling interval, keep-alive interval, rows per event.
+STREAM_POLL_S = float(os.environ.get("JAZAN_STREAM_POLL_S", "2"))
+STREAM_HEARTBEAT_S = 15.0
+STREAM_MAX_ROWS = 2000
+# /api/export_kpis: rows read and encoded per chunk, and the exported file's name.
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_STEM = "kpis_breach7d_tuned"
+# Threads for the pandas-heavy endpoints, and how many more requests may queue for them before 503s.
+COMPUTE_WORKERS = int(os.environ.get("JAZAN_COMPUTE_WORKERS", str(min(4, os.cpu_count() or 1))))
+COMPUTE_QUEUE = int(os.environ.get("JAZAN_COMPUTE_QUEUE", "32"))
+# Serve the /api/kpis columns from one memory-mapped file all workers share.
+SHARED_KPIS = os.environ.get("JAZAN_SHARED_KPIS", "1") != "0"
+# Server-Timing headers and /metrics histograms; set JAZAN_METRICS=0 to leave requests untraced.
+METRICS = os.environ.get("JAZAN_METRICS", "1") != "0"
+# Opt-in: keep sampled stacks of requests slower than this many milliseconds (0 disables).
+PROFILE_SLOW_MS = float(os.environ.get("JAZAN_PROFILE_SLOW_MS", "0"))
+PROFILE_DIR = Path(os.environ.get("JAZAN_PROFILE_DIR", OUT_DIR / "profiles"))
 
 
-app = FastAPI(title="Jazan POC API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm up the classifiers before the first request arrives.
+    scoring_models()
+    yield
+
+
+app = FastAPI(title="Jazan POC API", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -28,29 +98,132 @@ app.add_middleware(
     allow_headers=["*"],
     allow_credentials=True,
 )
+if METRICS:
+    profiler = SlowRequestProfiler(PROFILE_SLOW_MS / 1e3, PROFILE_DIR) if PROFILE_SLOW_MS > 0 else None
+    app.add_middleware(TimingMiddleware, profiler=profiler)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded) -> FastJSONResponse:
+    return FastJSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "1"})
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _read_kpis(path: Path, columns: Optional[Tuple[str, ...]]) -> pd.DataFrame:
+    try:
+        return kpi_store.read_kpis(path, columns)
+    except ValueError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+_summary_cache = FileCache(_read_json)
+_manifest_cache = FileCache(_read_json)
+_kpis_cache = FileCache(_read_kpis)
+_shared_cache = FileCache(shared_kpis.open_shared)
+_alert_cache = LRUCache(ALERT_CACHE_SIZE, ALERT_CACHE_TTL_S)
+# Per-regime probability totals per store; see regime_priors().
+_priors_cache = LRUCache(ALERT_CACHE_SIZE, ALERT_CACHE_TTL_S)
+# Concatenated fleet arrays per set of asset store versions; see load_fleet().
+_fleet_cache = LRUCache(4, ALERT_CACHE_TTL_S)
+_alert_updates = {"full": 0, "incremental": 0}
+_priors_updates = {"full": 0, "incremental": 0}
+_compute = ComputeExecutor(COMPUTE_WORKERS, COMPUTE_QUEUE, runner=run_traced)
 
 
 def load_summary() -> Dict[str, Any]:
     if not SUMMARY_JSON.exists():
         raise HTTPException(status_code=404, detail="Summary data not found.")
-    with SUMMARY_JSON.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+    summary, _ = _summary_cache.get(SUMMARY_JSON)
+    return copy.deepcopy(summary)
 
 
-def load_kpis() -> pd.DataFrame:
-    """Load the KPI time-series that powers the dashboard."""
-    if not KPIS_CSV.exists():
-        raise HTTPException(status_code=500, detail=f"Missing KPI data CSV at {KPIS_CSV}")
+def load_manifest(art_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Return the notebook manifest (from ``art_dir``, default the API's), or an empty dict when it is absent."""
+    path = MANIFEST_JSON if art_dir is None else art_dir / "manifest.json"
+    if not path.exists():
+        return {}
+    manifest, _ = _manifest_cache.get(path)
+    return copy.deepcopy(manifest)
 
-    df = pd.read_csv(KPIS_CSV, parse_dates=["ts"])
-    if "ts" not in df.columns:
-        raise HTTPException(status_code=500, detail="Expected a 'ts' column in KPI data.")
 
-    df = df.set_index("ts").sort_index()
-    df.index.name = "ts"
+def kpis_store_path() -> Path:
+    """Prefer a columnar KPI store when one exists; the notebook's CSV is the fallback."""
+    for path in (KPIS_PARQUET, KPIS_FEATHER, KPIS_CSV):
+        if kpi_store.readable(path):
+            return path
+    raise HTTPException(status_code=500, detail=f"Missing KPI data CSV at {KPIS_CSV}")
+
+
+def _load_shared(store: Path) -> Optional[Tuple[pd.DataFrame, FileVersion]]:
+    """The shared memory-mapped KPI columns, rebuilt (and atomically swapped) when the store changed."""
+    path = shared_kpis.shared_path(store)
+    try:
+        version = file_version(store)
+        if not path.exists():
+            shared_kpis.refresh(store, path)
+        (frame, source), _ = _shared_cache.get(path)
+        if source != version:
+            shared_kpis.refresh(store, path)
+            (frame, source), _ = _shared_cache.get(path)
+    except OSError:
+        # Read-only output directory or a swap racing a stat: serve this process's own copy.
+        return None
+    return frame, source
+
+
+@timed("load")
+def load_kpis_versioned(
+    columns: Optional[Sequence[str]] = None,
+    store: Optional[Path] = None,
+) -> Tuple[pd.DataFrame, FileVersion]:
+    """Return the cached KPI frame together with the file version it was parsed from.
+
+    ``columns`` projects the read onto those value columns; each projection is
+    cached separately. Projections within ``shared_kpis.SHARED_COLUMNS`` are
+    served zero-copy from the memory-mapped file every worker shares.
+    ``store`` selects another KPI store (an asset partition); it is read on
+    first use.
+    """
+    store = store or kpis_store_path()
+    if SHARED_KPIS and columns is not None and set(columns) <= set(shared_kpis.SHARED_COLUMNS):
+        shared = _load_shared(store)
+        if shared is not None:
+            return shared
+    return _kpis_cache.get(store, tuple(columns) if columns is not None else None)
+
+
+def load_kpis(columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Load the KPI time-series that powers the dashboard.
+
+    The parsed frame is cached per process and shared between requests, so
+    callers must copy it before mutating.
+    """
+    df, _ = load_kpis_versioned(columns)
     return df
 
 
+_scorers: Dict[str, ModelScorer] = {}
+_scorer_errors: Dict[str, str] = {}
+_scorers_lock = threading.Lock()
+_scorers_loaded = False
+
+
+def scoring_models() -> Tuple[Dict[str, ModelScorer], Dict[str, str]]:
+    """Return ``(scorers, load_errors)``, loading the artifacts on first use."""
+    global _scorers_loaded
+    with _scorers_lock:
+        if not _scorers_loaded:
+            scorers, errors = load_scorers(ART_DIR)
+            _scorers.update(scorers)
+            _scorer_errors.update(errors)
+            _scorers_loaded = True
+    return _scorers, _scorer_errors
+
+
 def derive_alerts(
     prob_s: pd.Series,
     thr_s: pd.Series,
@@ -58,30 +231,131 @@ def derive_alerts(
     cooldown_h: int,
 ) -> pd.Series:
     """Replicate the alerting logic with persistence and cooldown handling."""
-    above = (prob_s >= thr_s).astype(int)
+    above = (prob_s >= thr_s).to_numpy(dtype=bool)
     alerts = np.zeros(len(above), dtype=int)
-    times = prob_s.index
-    i = 0
-
-    while i < len(above):
-        if above.iloc[i]:
-            j = i
-            while j < len(above) and above.iloc[j]:
-                j += 1
-
-            length = j - i
-            if length >= persist_k:
-                fire_idx = i + persist_k - 1
-                alerts[fire_idx] = 1
-                cool_until = times[fire_idx] + pd.Timedelta(hours=cooldown_h)
-
-                while j < len(times) and times[j] < cool_until:
-                    j += 1
-            i = j
+    fires = fire_indices(above, index_ns(prob_s.index), persist_k, cooldown_ns(cooldown_h))
+    alerts[fires] = 1
+    return pd.Series(alerts, index=prob_s.index, name="alert_flag")
+
+
+def regime_multipliers(m_normal: float, m_post: float, m_low: float, m_shut: float) -> Dict[str, float]:
+    return {
+        "normal": m_normal,
+        "post_startup": m_post,
+        "low_load": m_low,
+        "shutdown": m_shut,
+    }
+
+
+class _AlertEntry(NamedTuple):
+    version: FileVersion
+    thr: np.ndarray
+    fires: np.ndarray
+    state: AlertState
+
+
+def _effective_thresholds(df: pd.DataFrame, base_thr: float, mult_map: Dict[str, float]) -> np.ndarray:
+    thr_eff = pd.Series(base_thr, index=df.index, dtype=float) * df["regime"].map(mult_map).astype(float).fillna(1.0)
+    return thr_eff.to_numpy(dtype=float)
+
+
+@timed("alerts")
+def tuned_alerts(
+    df: pd.DataFrame,
+    version: Optional[FileVersion],
+    base_thr: float,
+    persist_k: int,
+    cooldown_h: int,
+    mult_map: Dict[str, float],
+    source: Optional[Path] = None,
+) -> Tuple[pd.Series, pd.Series]:
+    """Return ``(threshold_eff, alert_flag)`` over the full history.
+
+    Results are kept in a bounded LRU keyed on the tuning parameters, so
+    slider positions that were already visited are not recomputed. When the
+    KPI file has only grown since a result was cached, just the appended rows
+    are fed through :func:`alerts.advance_alerts`; any other change triggers a
+    full recompute. Pass ``version=None`` to bypass the cache. ``source`` names
+    the store ``df`` came from when it is not the default one (asset stores).
+    """
+    key = (source, float(base_thr), int(persist_k), float(cooldown_h), tuple(sorted(mult_map.items())))
+    entry: Optional[_AlertEntry] = _alert_cache.get(key) if version is not None else None
+
+    if entry is None or entry.version != version:
+        times = index_ns(df.index)
+        state = AlertState(persist_k, cooldown_h)
+        old_thr, old_fires = np.empty(0), np.empty(0, dtype=np.int64)
+        if entry is not None and _is_append(entry.state.processed, entry.state.last_ts, times):
+            state, old_thr, old_fires = entry.state, entry.thr, entry.fires
+            _alert_updates["incremental"] += 1
         else:
-            i += 1
+            _alert_updates["full"] += 1
 
-    return pd.Series(alerts, index=prob_s.index, name="alert_flag")
+        start = state.processed
+        new_thr = _effective_thresholds(df.iloc[start:], base_thr, mult_map)
+        above = df["prob_breach7d"].to_numpy(dtype=float)[start:] >= new_thr
+        state, new_fires = advance_alerts(state, above, times[start:])
+
+        thr = np.concatenate((old_thr, new_thr))
+        thr.flags.writeable = False
+        entry = _AlertEntry(version, thr, np.concatenate((old_fires, new_fires)), state)
+        if version is not None:
+            _alert_cache.put(key, entry)
+
+    flags = np.zeros(len(df), dtype=int)
+    flags[entry.fires] = 1
+    return (
+        pd.Series(entry.thr, index=df.index, name="threshold_eff"),
+        pd.Series(flags, index=df.index, name="alert_flag"),
+    )
+
+
+def _is_append(done: int, last_ts: Optional[int], times: np.ndarray) -> bool:
+    """True when ``times`` extends a series of ``done`` rows ending at ``last_ts`` with at least one new row."""
+    return 0 < done < len(times) and int(times[done - 1]) == last_ts
+
+
+class _PriorsEntry(NamedTuple):
+    version: FileVersion
+    rows: int
+    last_ts: int
+    sums: Dict[Any, float]
+    counts: Dict[Any, int]
+
+
+def _regime_totals(df: pd.DataFrame) -> Tuple[Dict[Any, float], Dict[Any, int]]:
+    grouped = df.groupby("regime", observed=True)["prob_breach7d"]
+    return grouped.sum().to_dict(), grouped.count().to_dict()
+
+
+def regime_priors(df: pd.DataFrame, version: Optional[FileVersion], source: Optional[Path] = None) -> Dict[Any, float]:
+    """Mean ``prob_breach7d`` per regime over the full history.
+
+    Like :func:`tuned_alerts`, the per-regime sums and counts are cached per
+    store and version; when the store has only grown, just the appended rows
+    are grouped and added in. An appended row with a regime not seen before
+    (which would change the ordering) or any other change triggers a full
+    regroup. Pass ``version=None`` to bypass the cache.
+    """
+    entry: Optional[_PriorsEntry] = _priors_cache.get(source) if version is not None else None
+
+    if entry is None or entry.version != version:
+        times = index_ns(df.index)
+        sums, counts = None, None
+        if entry is not None and _is_append(entry.rows, entry.last_ts, times):
+            new_sums, new_counts = _regime_totals(df.iloc[entry.rows :])
+            if new_counts.keys() <= entry.counts.keys():
+                sums = {k: v + new_sums.get(k, 0.0) for k, v in entry.sums.items()}
+                counts = {k: v + new_counts.get(k, 0) for k, v in entry.counts.items()}
+                _priors_updates["incremental"] += 1
+        if sums is None:
+            sums, counts = _regime_totals(df)
+            _priors_updates["full"] += 1
+        entry = _PriorsEntry(version, len(df), int(times[-1]) if len(times) else None, sums, counts)
+        if version is not None:
+            _priors_cache.put(source, entry)
+
+    return {k: entry.sums[k] / n if n else math.nan for k, n in entry.counts.items()}
 
 
 def _format_pct(value: Optional[float]) -> str:
@@ -106,6 +380,44 @@ def adjust_probability(prob: float, prior: Optional[float], temperature: float =
     return float(min(max(adjusted, 0.0), 1.0))
 
 
+def adjust_probabilities(
+    prob: np.ndarray,
+    prior: np.ndarray,
+    temperature: float = 6.0,
+    mix: float = 0.5,
+) -> np.ndarray:
+    """Vectorised :func:`adjust_probability`; non-finite priors fall back to the clipped probability."""
+    prob = np.asarray(prob, dtype=float)
+    prior = np.asarray(prior, dtype=float)
+
+    eps = 1e-6
+    clipped = np.clip(prob, eps, 1.0 - eps)
+    logit = np.log(clipped / (1.0 - clipped))
+    cooled = 1.0 / (1.0 + np.exp(-logit / max(temperature, eps)))
+
+    prior_val = np.where(np.isfinite(prior), prior, clipped)
+    adjusted = np.clip((1.0 - mix) * cooled + mix * prior_val, 0.0, 1.0)
+    return np.where(np.isfinite(prob), adjusted, prob)
+
+
+RISK_BANDS = ("low", "medium", "high")
+
+
+def risk_bands(prob: np.ndarray, thr: np.ndarray) -> np.ndarray:
+    """Label each point high/medium/low relative to its effective threshold."""
+    has_thr = thr != 0
+    return np.select(
+        [has_thr & (prob >= thr), has_thr & (prob >= 0.6 * thr)],
+        ["high", "medium"],
+        default="low",
+    )
+
+
+def risk_ratios(prob: np.ndarray, thr: np.ndarray) -> np.ndarray:
+    """``prob / thr``, NaN where the threshold is zero."""
+    return np.divide(prob, thr, out=np.full(len(prob), np.nan), where=thr != 0)
+
+
 def build_explanation(row: pd.Series, threshold: float, summary: Dict[str, Any]) -> Dict[str, List[str]]:
     reasons: List[str] = []
     actions: List[str] = []
@@ -171,75 +483,122 @@ def build_explanation(row: pd.Series, threshold: float, summary: Dict[str, Any])
     return {"reasons": unique_reasons, "actions": unique_actions}
 
 
-@app.get("/api/summary")
-def get_summary() -> Dict[str, Any]:
-    return load_summary()
+def _point_columns(
+    tail: pd.DataFrame,
+    thr: np.ndarray,
+    alert_flag: np.ndarray,
+    regime_priors: Dict[Any, float],
+) -> Dict[str, np.ndarray]:
+    """Per-point /api/kpis values for ``tail``, given its effective thresholds and alert flags."""
+    prob_raw = tail["prob_breach7d"].to_numpy(dtype=float)
+    with stage("adjust"):
+        prob = adjust_probabilities(prob_raw, tail["regime"].map(regime_priors).to_numpy(dtype=float))
+    with stage("bands"):
+        bands, ratios = risk_bands(prob, thr), risk_ratios(prob, thr)
+    missing = np.full(len(tail), np.nan)
+    return {
+        "prob_breach7d": prob,
+        "prob_breach7d_raw": prob_raw,
+        "threshold_eff": thr,
+        "regime": tail["regime"].astype(str).to_numpy(),
+        "alert_flag": alert_flag,
+        "risk_band": bands,
+        "risk_ratio": ratios,
+        "dp_excess_mbar": tail["dp_excess_mbar"].to_numpy(dtype=float) if "dp_excess_mbar" in tail else missing,
+        "health_score": tail["health_score"].to_numpy(dtype=float) if "health_score" in tail else missing,
+    }
 
 
-@app.get("/api/kpis")
-def get_kpis(
-    base_thr: float = Query(0.10, ge=0.0, le=1.0),
-    persist_k: int = Query(5, ge=1, le=48),
-    cooldown_h: int = Query(48, ge=1, le=168),
-    m_normal: float = Query(1.0, ge=0.5, le=2.0),
-    m_post: float = Query(1.1, ge=0.5, le=2.0),
-    m_low: float = Query(1.2, ge=0.5, le=2.0),
-    m_shut: float = Query(1.3, ge=0.5, le=2.0),
-    lookback_days: int = Query(60, ge=1, le=365),
-):
-    df = load_kpis()
+def _items(index: pd.DatetimeIndex, points: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    columns = {"ts": index.to_pydatetime().tolist(), **{name: values.tolist() for name, values in points.items()}}
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
 
-    mult_map = {
-        "normal": m_normal,
-        "post_startup": m_post,
-        "low_load": m_low,
-        "shutdown": m_shut,
-    }
-    thr_eff = pd.Series(base_thr, index=df.index, dtype=float) * df["regime"].map(mult_map).astype(float).fillna(1.0)
-    alerts = derive_alerts(df["prob_breach7d"], thr_eff, persist_k, cooldown_h)
-
-    regime_priors = df.groupby("regime")["prob_breach7d"].mean().to_dict()
-
-    cutoff = df.index.max() - pd.Timedelta(days=lookback_days)
-    tail = df[df.index >= cutoff].copy()
-    tail["threshold_eff"] = thr_eff.loc[tail.index]
-    tail["alert_flag"] = alerts.loc[tail.index]
-    tail["prob_raw"] = tail["prob_breach7d"]
-    tail["prob_breach7d"] = [
-        adjust_probability(float(row["prob_breach7d"]), regime_priors.get(row["regime"]))
-        for _, row in tail.iterrows()
-    ]
-
-    def band_for(prob: float, thr: float) -> str:
-        if thr and prob >= thr:
-            return "high"
-        if thr and prob >= 0.6 * thr:
-            return "medium"
-        return "low"
-
-    tail["risk_band"] = [
-        band_for(float(row["prob_breach7d"]), float(row["threshold_eff"])) for _, row in tail.iterrows()
-    ]
-    tail["risk_ratio"] = [
-        (float(row["prob_breach7d"]) / float(row["threshold_eff"])) if row["threshold_eff"] else None
-        for _, row in tail.iterrows()
-    ]
-
-    items = [
-        {
-            "ts": ts.to_pydatetime().isoformat(),
-            "prob_breach7d": float(row["prob_breach7d"]),
-            "prob_breach7d_raw": float(row["prob_raw"]),
-            "threshold_eff": float(row["threshold_eff"]),
-            "regime": str(row["regime"]),
-            "alert_flag": int(row["alert_flag"]),
-            "risk_band": str(row["risk_band"]),
-            "risk_ratio": float(row["risk_ratio"]) if row["risk_ratio"] is not None else None,
-            "dp_excess_mbar": float(row["dp_excess_mbar"]) if pd.notna(row.get("dp_excess_mbar")) else None,
-            "health_score": float(row["health_score"]) if pd.notna(row.get("health_score")) else None,
+
+# Series whose extremes survive downsampling.
+DOWNSAMPLED_COLUMNS = ("prob_breach7d", "threshold_eff", "dp_excess_mbar", "health_score")
+
+
+def downsample_points(points: Dict[str, np.ndarray], max_points: int) -> np.ndarray:
+    """Positions of ``points`` to return when the window holds more than ``max_points``.
+
+    Min/max bucketing over :data:`DOWNSAMPLED_COLUMNS`, always keeping fired
+    alerts and both sides of every regime transition.
+    """
+    regimes = points["regime"]
+    keep = points["alert_flag"] == 1
+    changed = regimes[1:] != regimes[:-1]
+    keep[1:] |= changed
+    keep[:-1] |= changed
+    return downsample_indices([points[name] for name in DOWNSAMPLED_COLUMNS], max_points, keep)
+
+
+@timed("assemble")
+def _shaped(index: pd.DatetimeIndex, points: Dict[str, np.ndarray], response_format: str) -> Dict[str, Any]:
+    """The points part of the /api/kpis body: ``items`` records, or ``columnar`` arrays with dictionary codes."""
+    if response_format == "columnar":
+        regime_names, regime_codes = np.unique(points["regime"], return_inverse=True)
+        band_codes = np.select([points["risk_band"] == band for band in RISK_BANDS], range(len(RISK_BANDS)))
+        columns: Dict[str, Any] = {
+            "ts": index_ns(index) // 1_000_000,
+            **points,
+            "regime": regime_codes,
+            "risk_band": band_codes,
         }
-        for ts, row in tail.iterrows()
-    ]
+        return {
+            "format": "columnar",
+            "columns": columns,
+            "dictionaries": {"regime": regime_names.tolist(), "risk_band": list(RISK_BANDS)},
+        }
+    return {"items": _items(index, points)}
+
+
+def build_kpis_payload(
+    df: pd.DataFrame,
+    base_thr: float,
+    persist_k: int,
+    cooldown_h: int,
+    m_normal: float,
+    m_post: float,
+    m_low: float,
+    m_shut: float,
+    lookback_days: int,
+    response_format: str = "items",
+    version: Optional[FileVersion] = None,
+    source: Optional[Path] = None,
+    max_points: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Assemble the /api/kpis body.
+
+    Values are left as NumPy arrays, floats (NaN included) and datetimes;
+    :func:`serialization.dumps` turns them into JSON and maps NaN to null.
+    With ``max_points``, longer windows are thinned for charting (see
+    :func:`downsample_points`); ``meta`` still describes the full window.
+    """
+    mult_map = regime_multipliers(m_normal, m_post, m_low, m_shut)
+    thr_eff, alerts = tuned_alerts(df, version, base_thr, persist_k, cooldown_h, mult_map, source)
+
+    with stage("priors"):
+        priors = regime_priors(df, version, source)
+
+    # The frame is time-sorted, so the lookback window is a positional slice.
+    tail = kpi_store.since(df, df.index.max() - pd.Timedelta(days=lookback_days)) if len(df) else df
+    lo = len(df) - len(tail)
+
+    thr = thr_eff.to_numpy(dtype=float)[lo:]
+    alert_flag = alerts.to_numpy()[lo:]
+    points = _point_columns(tail, thr, alert_flag, priors)
+    prob, prob_raw, regimes = points["prob_breach7d"], points["prob_breach7d_raw"], points["regime"]
+    bands, ratios = points["risk_band"], points["risk_ratio"]
+    dp_excess, health = points["dp_excess_mbar"], points["health_score"]
+
+    shown_index, shown = tail.index, points
+    if max_points is not None and len(tail) > max_points:
+        with stage("downsample"):
+            keep = downsample_points(points, max_points)
+            shown_index, shown = tail.index[keep], {name: values[keep] for name, values in points.items()}
+
+    payload = _shaped(shown_index, shown, response_format)
 
     explanation: Optional[Dict[str, List[str]]] = None
     meta: Dict[str, Any] = {}
@@ -250,34 +609,610 @@ def get_kpis(
         except HTTPException:
             summary = {}
 
-        last_row = tail.iloc[-1]
-        explanation = build_explanation(last_row, float(last_row["threshold_eff"]), summary)
-        band_counts = tail["risk_band"].value_counts().to_dict()
+        last_row = pd.Series(
+            {
+                "prob_breach7d": prob[-1],
+                "regime": regimes[-1],
+                "risk_band": bands[-1],
+                "dp_excess_mbar": dp_excess[-1],
+                "health_score": health[-1],
+            }
+        )
+        explanation = build_explanation(last_row, float(thr[-1]), summary)
         meta = {
             "window_start": tail.index.min().to_pydatetime().isoformat(),
             "window_end": tail.index.max().to_pydatetime().isoformat(),
             "points": len(tail),
-            "risk_band_counts": {
-                "high": int(band_counts.get("high", 0)),
-                "medium": int(band_counts.get("medium", 0)),
-                "low": int(band_counts.get("low", 0)),
-            },
-            "alerts_fired": int((tail["alert_flag"] == 1).sum()),
+            "risk_band_counts": {band: int(np.count_nonzero(bands == band)) for band in ("high", "medium", "low")},
+            "alerts_fired": int(np.count_nonzero(alert_flag == 1)),
             "latest": {
-                "risk_band": str(last_row["risk_band"]),
-                "risk_ratio": float(last_row["risk_ratio"]) if last_row["risk_ratio"] is not None else None,
-                "prob_breach7d": float(last_row["prob_breach7d"]),
-                "prob_breach7d_raw": float(last_row["prob_raw"]),
-                "threshold_eff": float(last_row["threshold_eff"]),
+                "risk_band": str(bands[-1]),
+                "risk_ratio": float(ratios[-1]),
+                "prob_breach7d": float(prob[-1]),
+                "prob_breach7d_raw": float(prob_raw[-1]),
+                "threshold_eff": float(thr[-1]),
             },
-            "regime_priors": {k: float(v) for k, v in regime_priors.items()},
+            "regime_priors": {k: float(v) for k, v in priors.items()},
         }
+        if max_points is not None:
+            meta["returned_points"] = len(shown_index)
+
+    payload["explanation"] = explanation
+    payload["meta"] = meta
+    return payload
+
+
+def build_kpis_delta(
+    df: pd.DataFrame,
+    version: Optional[FileVersion],
+    after: pd.Timestamp,
+    base_thr: float,
+    persist_k: int,
+    cooldown_h: int,
+    mult_map: Dict[str, float],
+    max_rows: int = STREAM_MAX_ROWS,
+) -> Optional[Dict[str, Any]]:
+    """The first ``max_rows`` points after ``after``, as /api/kpis items plus a ``meta`` delta.
+
+    Alert flags come from the same cached, append-aware scan as /api/kpis, so
+    a pushed point carries the values a full re-fetch would show at that
+    moment (the adjusted probability uses the regime priors as of the push;
+    they are included in ``meta``). Returns ``None`` when nothing is newer
+    than ``after``.
+    """
+    lo = int(df.index.searchsorted(after, side="right"))
+    if lo >= len(df):
+        return None
+    hi = min(lo + max_rows, len(df))
+    thr_eff, alerts = tuned_alerts(df, version, base_thr, persist_k, cooldown_h, mult_map)
+    priors = regime_priors(df, version)
+
+    rows = df.iloc[lo:hi]
+    points = _point_columns(rows, thr_eff.to_numpy(dtype=float)[lo:hi], alerts.to_numpy()[lo:hi], priors)
+    bands = points["risk_band"]
+    meta = {
+        "window_end": rows.index[-1].to_pydatetime().isoformat(),
+        "points": len(rows),
+        "remaining": len(df) - hi,
+        "risk_band_counts": {band: int(np.count_nonzero(bands == band)) for band in ("high", "medium", "low")},
+        "alerts_fired": int(np.count_nonzero(points["alert_flag"] == 1)),
+        "latest": {
+            "risk_band": str(bands[-1]),
+            "risk_ratio": float(points["risk_ratio"][-1]),
+            "prob_breach7d": float(points["prob_breach7d"][-1]),
+            "prob_breach7d_raw": float(points["prob_breach7d_raw"][-1]),
+            "threshold_eff": float(points["threshold_eff"][-1]),
+        },
+        "regime_priors": {k: float(v) for k, v in priors.items()},
+    }
+    return {"items": _items(rows.index, points), "meta": meta}
+
+
+STATUS_BY_BAND = {"high": "alert", "medium": "warning", "low": "normal"}
 
-    return {"items": items, "explanation": explanation, "meta": meta}
+
+class _FleetArrays(NamedTuple):
+    ids: List[str]
+    offsets: np.ndarray  # asset i owns rows [offsets[i], offsets[i + 1])
+    times: np.ndarray
+    prob: np.ndarray
+    codes: np.ndarray  # regime codes into ``regimes``; -1 when missing
+    regimes: List[str]
+    dp_excess: np.ndarray
+    health: np.ndarray
+
+
+def _fleet_arrays(frames: Dict[str, pd.DataFrame]) -> _FleetArrays:
+    """Concatenate the non-empty assets' KPI columns into flat arrays, one segment per asset."""
+    ids = [asset_id for asset_id, df in frames.items() if len(df)]
+    dfs = [frames[asset_id] for asset_id in ids]
+
+    def column(name: str) -> np.ndarray:
+        return np.concatenate(
+            [df[name].to_numpy(dtype=float) if name in df else np.full(len(df), np.nan) for df in dfs]
+        )
+
+    regime = union_categoricals([pd.Categorical(df["regime"].astype(str)) for df in dfs])
+    return _FleetArrays(
+        ids,
+        np.concatenate(([0], np.cumsum([len(df) for df in dfs]))).astype(np.int64),
+        np.concatenate([index_ns(df.index) for df in dfs]),
+        column("prob_breach7d"),
+        np.asarray(regime.codes, dtype=np.int64),
+        [str(c) for c in regime.categories],
+        column("dp_excess_mbar"),
+        column("health_score"),
+    )
+
+
+def build_fleet_summary(
+    arrays: _FleetArrays,
+    base_thr: float,
+    persist_k: int,
+    cooldown_h: int,
+    mult_map: Dict[str, float],
+    lookback_days: int,
+) -> Dict[str, Any]:
+    """Latest risk, status and alert counts for every asset in one vectorised pass.
+
+    Per asset, the numbers match the ``meta`` of ``/api/assets/{id}/kpis``:
+    alerts run over the full history (without carrying across assets) and are
+    counted over the lookback window; the latest probability is adjusted with
+    that asset's regime priors.
+    """
+    n_assets = len(arrays.ids)
+    if not n_assets:
+        return {"assets": [], "totals": {"assets": 0, "status_counts": {}, "risk_band_counts": {}, "alerts_fired": 0}}
+
+    offsets, times, prob, codes = arrays.offsets, arrays.times, arrays.prob, arrays.codes
+    asset = np.repeat(np.arange(n_assets), np.diff(offsets))
+    # Missing regimes (code -1) pick the trailing 1.0, as fillna(1.0) does per asset.
+    mult = np.append([float(mult_map.get(name, 1.0)) for name in arrays.regimes], 1.0)
+    thr = base_thr * mult[codes]
+    fires = segmented_fire_indices(prob >= thr, times, offsets, persist_k, cooldown_ns(cooldown_h))
+
+    # Mean probability per (asset, regime): the /api/kpis priors, from one bincount.
+    n_regimes = max(len(arrays.regimes), 1)
+    valid = np.isfinite(prob) & (codes >= 0)
+    cell = asset[valid] * n_regimes + codes[valid]
+    sums = np.bincount(cell, weights=prob[valid], minlength=n_assets * n_regimes)
+    counts = np.bincount(cell, minlength=n_assets * n_regimes)
+    priors = np.divide(sums, counts, out=np.full(len(sums), np.nan), where=counts > 0)
+
+    last = offsets[1:] - 1
+    last_code = codes[last]
+    prior = np.where(last_code >= 0, priors[np.arange(n_assets) * n_regimes + np.maximum(last_code, 0)], np.nan)
+    prob_raw = prob[last]
+    prob_adj = adjust_probabilities(prob_raw, prior)
+    thr_last = thr[last]
+    bands = risk_bands(prob_adj, thr_last)
+    ratios = risk_ratios(prob_adj, thr_last)
+
+    cutoff = times[last] - int(pd.Timedelta(days=lookback_days).value)
+    in_window = times >= cutoff[asset]
+    fired = fires[in_window[fires]]
+    alerts_fired = np.bincount(asset[fired], minlength=n_assets)
+    peak = np.fmax.reduceat(np.where(in_window, prob, np.nan), offsets[:-1])
+    regimes = np.append(np.asarray(arrays.regimes, dtype=object), None)[last_code]
+    statuses = np.array([STATUS_BY_BAND[band] for band in bands])
+
+    columns = {
+        "asset_id": arrays.ids,
+        "status": statuses.tolist(),
+        "risk_band": bands.tolist(),
+        "risk_ratio": ratios.tolist(),
+        "prob_breach7d": prob_adj.tolist(),
+        "prob_breach7d_raw": prob_raw.tolist(),
+        "threshold_eff": thr_last.tolist(),
+        "regime": regimes.tolist(),
+        "health_score": arrays.health[last].tolist(),
+        "dp_excess_mbar": arrays.dp_excess[last].tolist(),
+        "alerts_fired": alerts_fired.tolist(),
+        "peak_prob_breach7d_raw": peak.tolist(),
+        "points": np.bincount(asset[in_window], minlength=n_assets).tolist(),
+        "last_ts": pd.DatetimeIndex(times[last].view("datetime64[ns]")).to_pydatetime().tolist(),
+    }
+    keys = list(columns)
+    return {
+        "assets": [dict(zip(keys, values)) for values in zip(*columns.values())],
+        "totals": {
+            "assets": n_assets,
+            "status_counts": {status: int(np.count_nonzero(statuses == status)) for status in STATUS_BY_BAND.values()},
+            "risk_band_counts": {band: int(np.count_nonzero(bands == band)) for band in ("high", "medium", "low")},
+            "alerts_fired": int(alerts_fired.sum()),
+        },
+    }
+
+
+@app.get("/api/summary", response_class=FastJSONResponse)
+def get_summary() -> FastJSONResponse:
+    return FastJSONResponse(load_summary())
+
+
+def _kpis_body(
+    store: Optional[Path],
+    asset_id: Optional[str],
+    base_thr: float,
+    persist_k: int,
+    cooldown_h: int,
+    m_normal: float,
+    m_post: float,
+    m_low: float,
+    m_shut: float,
+    lookback_days: int,
+    response_format: str,
+    max_points: Optional[int],
+) -> bytes:
+    df, version = load_kpis_versioned(KPI_VIEW_COLUMNS, store)
+    payload = build_kpis_payload(
+        df,
+        base_thr,
+        persist_k,
+        cooldown_h,
+        m_normal,
+        m_post,
+        m_low,
+        m_shut,
+        lookback_days,
+        response_format,
+        version,
+        store,
+        max_points,
+    )
+    if asset_id is not None:
+        payload["meta"]["asset_id"] = asset_id
+    with stage("serialize"):
+        return dumps(payload)
+
+
+@app.get("/api/kpis", response_class=FastJSONResponse)
+async def get_kpis(
+    base_thr: float = Query(0.10, ge=0.0, le=1.0),
+    persist_k: int = Query(5, ge=1, le=48),
+    cooldown_h: int = Query(48, ge=1, le=168),
+    m_normal: float = Query(1.0, ge=0.5, le=2.0),
+    m_post: float = Query(1.1, ge=0.5, le=2.0),
+    m_low: float = Query(1.2, ge=0.5, le=2.0),
+    m_shut: float = Query(1.3, ge=0.5, le=2.0),
+    lookback_days: int = Query(60, ge=1, le=365),
+    response_format: str = Query("items", alias="format", pattern="^(items|columnar)$"),
+    max_points: Optional[int] = Query(None, ge=100, le=100_000),
+) -> Response:
+    """KPI window with tuned alerts; concurrent requests for the same parameters share one computation."""
+    params = (base_thr, persist_k, cooldown_h, m_normal, m_post, m_low, m_shut, lookback_days, response_format, max_points)
+    body = await _compute.run(("kpis", *params), _kpis_body, None, None, *params)
+    return Response(body, media_type="application/json")
+
+
+def _asset_store(asset_id: str) -> Path:
+    store = assets.asset_store(ASSETS_DIR, asset_id)
+    if store is None:
+        raise HTTPException(status_code=404, detail=f"Unknown asset {asset_id!r}.")
+    return store
+
+
+def load_fleet() -> _FleetArrays:
+    """Every asset's /api/kpis columns as flat arrays, rebuilt only when some asset's store changed."""
+    frames: Dict[str, pd.DataFrame] = {}
+    versions = []
+    for asset_id in assets.asset_ids(ASSETS_DIR):
+        frames[asset_id], version = load_kpis_versioned(KPI_VIEW_COLUMNS, _asset_store(asset_id))
+        versions.append((asset_id, version))
+    return _fleet_cache.get_or_compute(tuple(versions), lambda: _fleet_arrays(frames))
+
+
+@app.get("/api/assets")
+def list_assets() -> Dict[str, List[str]]:
+    return {"assets": assets.asset_ids(ASSETS_DIR)}
+
+
+@app.get("/api/assets/{asset_id}/kpis", response_class=FastJSONResponse)
+async def get_asset_kpis(
+    asset_id: str,
+    base_thr: float = Query(0.10, ge=0.0, le=1.0),
+    persist_k: int = Query(5, ge=1, le=48),
+    cooldown_h: int = Query(48, ge=1, le=168),
+    m_normal: float = Query(1.0, ge=0.5, le=2.0),
+    m_post: float = Query(1.1, ge=0.5, le=2.0),
+    m_low: float = Query(1.2, ge=0.5, le=2.0),
+    m_shut: float = Query(1.3, ge=0.5, le=2.0),
+    lookback_days: int = Query(60, ge=1, le=365),
+    response_format: str = Query("items", alias="format", pattern="^(items|columnar)$"),
+    max_points: Optional[int] = Query(None, ge=100, le=100_000),
+) -> Response:
+    """``/api/kpis`` for one asset's partition, loaded on its first request."""
+    store = _asset_store(asset_id)
+    params = (base_thr, persist_k, cooldown_h, m_normal, m_post, m_low, m_shut, lookback_days, response_format, max_points)
+    body = await _compute.run(("asset_kpis", asset_id, *params), _kpis_body, store, asset_id, *params)
+    return Response(body, media_type="application/json")
+
+
+def _fleet_body(
+    base_thr: float, persist_k: int, cooldown_h: int, mult_map: Dict[str, float], lookback_days: int
+) -> bytes:
+    summary = build_fleet_summary(load_fleet(), base_thr, persist_k, cooldown_h, mult_map, lookback_days)
+    with stage("serialize"):
+        return dumps(summary)
+
+
+@app.get("/api/fleet/summary", response_class=FastJSONResponse)
+async def get_fleet_summary(
+    base_thr: float = Query(0.10, ge=0.0, le=1.0),
+    persist_k: int = Query(5, ge=1, le=48),
+    cooldown_h: int = Query(48, ge=1, le=168),
+    m_normal: float = Query(1.0, ge=0.5, le=2.0),
+    m_post: float = Query(1.1, ge=0.5, le=2.0),
+    m_low: float = Query(1.2, ge=0.5, le=2.0),
+    m_shut: float = Query(1.3, ge=0.5, le=2.0),
+    lookback_days: int = Query(60, ge=1, le=365),
+) -> Response:
+    mult_map = regime_multipliers(m_normal, m_post, m_low, m_shut)
+    key = ("fleet", base_thr, persist_k, cooldown_h, tuple(mult_map.values()), lookback_days)
+    body = await _compute.run(key, _fleet_body, base_thr, persist_k, cooldown_h, mult_map, lookback_days)
+    return Response(body, media_type="application/json")
+
+
+def _timestamp(name: str, value: Optional[str]) -> Optional[pd.Timestamp]:
+    """Parse a request timestamp into the stores' naive UTC form; an offset is converted, not dropped."""
+    if value is None:
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=f"Invalid {name} timestamp {value!r}.") from exc
+    if ts is pd.NaT:
+        raise HTTPException(status_code=422, detail=f"Invalid {name} timestamp {value!r}.")
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts
+
+
+async def _kpi_events(
+    request: Request,
+    cursor: pd.Timestamp,
+    base_thr: float,
+    persist_k: int,
+    cooldown_h: int,
+    mult_map: Dict[str, float],
+):
+    """Yield SSE messages for points appended after ``cursor`` until the client goes away.
+
+    There is no per-client queue: each poll re-reads from the client's cursor,
+    and a ``yield`` only returns once the previous message was handed to the
+    transport. A slow client therefore holds at most one message and gets
+    everything it missed, ``STREAM_MAX_ROWS`` points at a time, when it catches up.
+    """
+    yield f"retry: {int(STREAM_POLL_S * 1000)}\n\n".encode()
+    yield sse_event({"cursor": cursor.isoformat()}, "ready", cursor.isoformat())
+    seen: Optional[FileVersion] = None
+    quiet_since = time.monotonic()
+    while not await request.is_disconnected():
+        try:
+            df, version = await run_in_threadpool(load_kpis_versioned, KPI_VIEW_COLUMNS)
+        except HTTPException:
+            version = None
+        if version is not None and version != seen:
+            while True:
+                delta = await run_in_threadpool(
+                    build_kpis_delta, df, version, cursor, base_thr, persist_k, cooldown_h, mult_map
+                )
+                if delta is None:
+                    break
+                cursor = pd.Timestamp(delta["meta"]["window_end"])
+                yield sse_event(delta, "kpis", cursor.isoformat())
+                quiet_since = time.monotonic()
+            seen = version
+        if time.monotonic() - quiet_since >= STREAM_HEARTBEAT_S:
+            yield b": keep-alive\n\n"
+            quiet_since = time.monotonic()
+        await asyncio.sleep(STREAM_POLL_S)
+
+
+@app.get("/api/kpis/stream")
+def stream_kpis(
+    request: Request,
+    since: Optional[str] = Query(None, description="Resume after this timestamp (ISO 8601)"),
+    base_thr: float = Query(0.10, ge=0.0, le=1.0),
+    persist_k: int = Query(5, ge=1, le=48),
+    cooldown_h: int = Query(48, ge=1, le=168),
+    m_normal: float = Query(1.0, ge=0.5, le=2.0),
+    m_post: float = Query(1.1, ge=0.5, le=2.0),
+    m_low: float = Query(1.2, ge=0.5, le=2.0),
+    m_shut: float = Query(1.3, ge=0.5, le=2.0),
+) -> StreamingResponse:
+    """Server-sent events carrying only the KPI points appended since the last one the client saw.
+
+    Each ``kpis`` event holds /api/kpis-style ``items`` (with ``threshold_eff``,
+    ``alert_flag`` and ``risk_band``) and a ``meta`` delta; its id is the last
+    point's timestamp. Reconnecting browsers send it back as ``Last-Event-ID``
+    and resume from there; ``since`` does the same explicitly. Without either
+    the stream starts after the newest stored point.
+    """
+    resume = request.headers.get("last-event-id") or since
+    if resume:
+        cursor = _timestamp("resume", resume)
+    else:
+        df, _ = load_kpis_versioned(KPI_VIEW_COLUMNS)
+        cursor = df.index.max() if len(df) else pd.Timestamp.min
+    mult_map = regime_multipliers(m_normal, m_post, m_low, m_shut)
+    return StreamingResponse(
+        _kpi_events(request, cursor, base_thr, persist_k, cooldown_h, mult_map),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _grid(name: str, values: List[Any], low: float, high: float) -> List[Any]:
+    unique = list(dict.fromkeys(values))
+    bad = [v for v in unique if not low <= v <= high]
+    if bad:
+        raise HTTPException(status_code=422, detail=f"{name} values must lie in [{low}, {high}]; got {bad}.")
+    return unique
+
+
+def _sweep_body(
+    base_thrs: List[float],
+    persist_ks: List[int],
+    cooldowns: List[int],
+    mult_map: Dict[str, float],
+    lookback_days: int,
+) -> bytes:
+    combinations = len(base_thrs) * len(persist_ks) * len(cooldowns)
+    df, _ = load_kpis_versioned(SWEEP_COLUMNS)
+    if df.empty:
+        return dumps({"events": 0, "results": []})
+
+    mult = df["regime"].map(mult_map).astype(float).fillna(1.0).to_numpy()
+    prob = df["prob_breach7d"].to_numpy(dtype=float)
+    times = index_ns(df.index)
+    cutoff = int((df.index.max() - pd.Timedelta(days=lookback_days)).value)
+
+    limit = load_manifest().get("limits_mbar", {}).get("7d")
+    if limit is not None and "dp_smooth_mbar" in df:
+        event_ns = times[breach_events(df["dp_smooth_mbar"].to_numpy(dtype=float), float(limit))]
+    else:
+        event_ns = np.empty(0, dtype=np.int64)
+    window_events = event_ns[event_ns >= cutoff]
+    horizon = int(pd.Timedelta(days=BREACH_HORIZON_DAYS).value)
+    day_ns = int(pd.Timedelta(days=1).value)
+    hour_ns = float(pd.Timedelta(hours=1).value)
+
+    results = []
+    for thr, k, cd, fires in sweep_fire_indices(prob, mult, times, base_thrs, persist_ks, cooldowns):
+        fire_ns = times[fires]
+        fire_ns = fire_ns[fire_ns >= cutoff]
+        leads = lead_times_ns(fire_ns, event_ns, horizon) / hour_ns
+        results.append(
+            {
+                "base_thr": thr,
+                "persist_k": k,
+                "cooldown_h": cd,
+                "alerts": int(len(fire_ns)),
+                "alert_days": int(np.unique(fire_ns // day_ns).size),
+                "tp_alerts": int(len(leads)),
+                "lead_time_h_median": float(np.median(leads)) if len(leads) else None,
+                "lead_time_h_mean": float(leads.mean()) if len(leads) else None,
+                "lead_time_h_min": float(leads.min()) if len(leads) else None,
+                "events_covered": covered_events(fire_ns, window_events, horizon),
+            }
+        )
+
+    return dumps(
+        {
+            "window_start": pd.Timestamp(max(cutoff, int(times[0]))).isoformat(),
+            "window_end": df.index.max().isoformat(),
+            "breach_limit_mbar": float(limit) if limit is not None else None,
+            "events": int(len(window_events)),
+            "combinations": combinations,
+            "results": results,
+        }
+    )
+
+
+@app.get("/api/kpis/sweep", response_class=FastJSONResponse)
+async def sweep_kpis(
+    base_thr: List[float] = Query([0.10]),
+    persist_k: List[int] = Query([5]),
+    cooldown_h: List[int] = Query([48]),
+    m_normal: float = Query(1.0, ge=0.5, le=2.0),
+    m_post: float = Query(1.1, ge=0.5, le=2.0),
+    m_low: float = Query(1.2, ge=0.5, le=2.0),
+    m_shut: float = Query(1.3, ge=0.5, le=2.0),
+    lookback_days: int = Query(365, ge=1, le=3650),
+) -> Response:
+    """Evaluate alerting for every (base_thr, persist_k, cooldown_h) combination in one request.
+
+    Repeat a parameter to add grid values, e.g. ``?base_thr=0.05&base_thr=0.1&persist_k=3&persist_k=5``.
+    Alerts are derived over the full history and scored over the lookback
+    window; lead times are measured against breaches of the manifest's 7-day
+    DP limit by ``dp_smooth_mbar``.
+    """
+    base_thrs = _grid("base_thr", base_thr, 0.0, 1.0)
+    persist_ks = _grid("persist_k", persist_k, 1, 48)
+    cooldowns = _grid("cooldown_h", cooldown_h, 1, 168)
+    combinations = len(base_thrs) * len(persist_ks) * len(cooldowns)
+    if combinations > SWEEP_MAX_COMBINATIONS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Grid has {combinations} combinations; the limit is {SWEEP_MAX_COMBINATIONS}.",
+        )
+
+    mult_map = regime_multipliers(m_normal, m_post, m_low, m_shut)
+    key = ("sweep", tuple(base_thrs), tuple(persist_ks), tuple(cooldowns), tuple(mult_map.values()), lookback_days)
+    body = await _compute.run(key, _sweep_body, base_thrs, persist_ks, cooldowns, mult_map, lookback_days)
+    return Response(body, media_type="application/json")
+
+
+def _dtype_kind(dtype) -> str:
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "time"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "number"
+    return "text"
+
+
+# What a column is cast to when the stores disagree on its dtype or some lack it.
+_EXPORT_CASTS = {"number": "float64", "text": "string", "time": "datetime64[ns]"}
+
+
+def _export_columns(stores: Sequence[Tuple[Optional[str], Path]]) -> Dict[str, Optional[str]]:
+    """Union of the stores' value columns, in first-seen order, mapped to the dtype each chunk is cast to.
+
+    ``None`` leaves a column as read: every store has it with the same dtype.
+    A column that is numeric in one store and text or time in another cannot
+    share one file, so that is a 422 (raised before any byte is streamed).
+    """
+    found: Dict[str, Dict[str, Any]] = {}
+    for asset_id, store in stores:
+        for name, dtype in kpi_store.column_dtypes(store).items():
+            found.setdefault(name, {})[asset_id] = dtype
+    columns: Dict[str, Optional[str]] = {}
+    for name, dtypes in found.items():
+        kinds = {_dtype_kind(dtype) for dtype in dtypes.values()}
+        if len(kinds) > 1:
+            detail = ", ".join(f"{asset_id or 'default'}: {dtype}" for asset_id, dtype in dtypes.items())
+            raise HTTPException(status_code=422, detail=f"Column {name!r} has incompatible types across stores ({detail}).")
+        same = len(dtypes) == len(stores) and len({str(dtype) for dtype in dtypes.values()}) == 1
+        columns[name] = None if same else _EXPORT_CASTS[kinds.pop()]
+    return columns
+
+
+def _export_frames(
+    stores: Sequence[Tuple[Optional[str], Path]],
+    base_thr: float,
+    persist_k: int,
+    cooldown_h: int,
+    mult_map: Dict[str, float],
+    start: Optional[pd.Timestamp],
+    end: Optional[pd.Timestamp],
+    columns: Optional[Dict[str, Optional[str]]] = None,
+):
+    """Full KPI rows with tuned ``threshold_eff``/``alert_flag``, ``EXPORT_CHUNK_ROWS`` at a time.
+
+    Alerts come from :func:`tuned_alerts` over the cached /api/kpis columns,
+    so they match the dashboard and are shared with its cache; the rows
+    themselves are read from the store chunk by chunk. Rows appended after the
+    alerts were computed are left for the next export. With several stores
+    (assets) an ``asset_id`` column is prepended and the stores follow each
+    other. ``columns`` (see :func:`_export_columns`) gives every chunk the
+    same columns and dtypes; missing columns are left empty.
+    """
+    casts = {name: dtype for name, dtype in (columns or {}).items() if dtype is not None}
+    for asset_id, store in stores:
+        view, version = load_kpis_versioned(KPI_VIEW_COLUMNS, store)
+        source = store if asset_id is not None else None
+        thr_eff, alerts = tuned_alerts(view, version, base_thr, persist_k, cooldown_h, mult_map, source)
+        thr, flags = thr_eff.to_numpy(), alerts.to_numpy()
+        last = view.index.max() if len(view) else None
+        stop = last if end is None or (last is not None and last < end) else end
+        for chunk in kpi_store.iter_kpis(store, EXPORT_CHUNK_ROWS, start, stop):
+            pos = np.minimum(view.index.searchsorted(chunk.index), max(len(view) - 1, 0))
+            if len(view):
+                # Drop rows the alert view does not know (a store rewritten mid-export).
+                known = view.index[pos] == chunk.index
+                chunk, pos = chunk[known], pos[known]
+            if columns is not None:
+                chunk = chunk.reindex(columns=list(columns)).astype(casts)
+            chunk = chunk.assign(threshold_eff=thr[pos], alert_flag=flags[pos])
+            if len(stores) > 1:
+                chunk.insert(0, "asset_id", asset_id)
+            yield chunk
+
+
+def _write_export(frames, file_format: str, compression: Optional[str]) -> Dict[str, str]:
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = OUT_DIR / export.filename(EXPORT_STEM, file_format, compression)
+    # Exports with other parameters may be writing concurrently; each gets its own temporary file.
+    tmp = out_path.with_name(f"{out_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp.open("wb") as handle:
+        for data in export.encode(frames, file_format, compression):
+            handle.write(data)
+    tmp.replace(out_path)
+    return {"path": str(out_path)}
 
 
 @app.get("/api/export_kpis")
-def export_kpis(
+async def export_kpis(
     base_thr: float = 0.10,
     persist_k: int = 5,
     cooldown_h: int = 48,
@@ -285,24 +1220,149 @@ def export_kpis(
     m_post: float = 1.1,
     m_low: float = 1.2,
     m_shut: float = 1.3,
-) -> Dict[str, str]:
-    df = load_kpis().copy()
-    mult_map = {
-        "normal": m_normal,
-        "post_startup": m_post,
-        "low_load": m_low,
-        "shutdown": m_shut,
+    download: bool = Query(False, description="Stream the file in the response instead of writing it on the server"),
+    file_format: str = Query("csv", alias="format", pattern="^(csv|parquet)$"),
+    compression: Optional[str] = Query(None, pattern="^(gzip|zstd)$"),
+    start: Optional[str] = Query(None, description="First timestamp to export (ISO 8601, inclusive)"),
+    end: Optional[str] = Query(None, description="Last timestamp to export (ISO 8601, inclusive)"),
+    asset: List[str] = Query([], description="Export these assets' stores instead of the default one; repeatable"),
+):
+    """Export the KPI history with the tuned ``threshold_eff`` and ``alert_flag``.
+
+    By default the CSV is written to ``outputs/kpis_breach7d_tuned.csv`` and
+    its path returned. With ``download=true`` the file is streamed in the
+    response instead, as CSV (optionally gzip/zstd compressed) or Parquet
+    (``compression`` picks its column codec). Either way rows are read and
+    encoded in chunks, so memory stays bounded for multi-year, multi-asset
+    exports. Both run on the compute pool; a streamed download takes one
+    task per chunk.
+    """
+    start_ts, end_ts = _timestamp("start", start), _timestamp("end", end)
+    problem = export.unsupported(file_format, compression)
+    if problem:
+        raise HTTPException(status_code=422, detail=problem)
+    stores = [(asset_id, _asset_store(asset_id)) for asset_id in dict.fromkeys(asset)] or [(None, kpis_store_path())]
+    mult_map = regime_multipliers(m_normal, m_post, m_low, m_shut)
+    # Stores with different columns are reconciled (or refused) before the response starts.
+    columns = await _compute.run(None, _export_columns, stores) if len(stores) > 1 else None
+    frames = _export_frames(stores, base_thr, persist_k, cooldown_h, mult_map, start_ts, end_ts, columns)
+
+    if download:
+        name = export.filename(EXPORT_STEM, file_format, compression)
+        return StreamingResponse(
+            _compute.iterate(export.encode(frames, file_format, compression)),
+            media_type=export.media_type(file_format, compression),
+            headers={"Content-Disposition": f'attachment; filename="{name}"'},
+        )
+
+    mults = tuple(mult_map.values())
+    key = ("export", base_thr, persist_k, cooldown_h, mults, file_format, compression, start_ts, end_ts, tuple(stores))
+    return await _compute.run(key, _write_export, frames, file_format, compression)
+
+
+class ScoreRequest(BaseModel):
+    rows: List[Dict[str, Union[float, str, None]]]
+    models: Optional[List[str]] = None
+
+
+def _score_body(request: ScoreRequest) -> bytes:
+    if not request.rows:
+        raise HTTPException(status_code=422, detail="rows must not be empty.")
+    if len(request.rows) > SCORE_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {SCORE_MAX_ROWS} rows per batch.")
+    names = request.models or list(MODEL_NAMES)
+    unknown = sorted(set(names) - set(MODEL_NAMES))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown models {unknown}; expected {list(MODEL_NAMES)}.")
+
+    scorers, errors = scoring_models()
+    unavailable = {name: errors.get(name, "not loaded") for name in names if name not in scorers}
+    if unavailable:
+        raise HTTPException(status_code=503, detail={"unavailable_models": unavailable})
+
+    probabilities: Dict[str, np.ndarray] = {}
+    latency: Dict[str, float] = {}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            X = feature_matrix(request.rows, scorers[name].features)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=f"Non-numeric feature value: {exc}") from exc
+        probabilities[name] = scorers[name].predict(X)
+        latency[name] = (time.perf_counter() - start) * 1e3
+
+    return dumps(
+        {
+            "probabilities": probabilities,
+            "meta": {"rows": len(request.rows), "latency_ms": latency},
+        }
+    )
+
+
+@app.post("/api/score", response_class=FastJSONResponse)
+async def score(request: ScoreRequest) -> Response:
+    """Score a batch of feature rows with the calibrated classifiers.
+
+    Each row maps feature names (see ``feature_list_*.csv``) to values; missing
+    features are imputed by the model pipeline and ``regime`` may replace the
+    ``regime_*`` one-hot columns. Each model scores the whole batch with a
+    single ``predict_proba`` call.
+    """
+    body = await _compute.run(None, _score_body, request)
+    return Response(body, media_type="application/json")
+
+
+@app.get("/api/score/stats")
+def get_score_stats() -> Dict[str, Any]:
+    scorers, errors = scoring_models()
+    return {
+        "models": {name: {"features": len(s.features), **s.latency.stats()} for name, s in scorers.items()},
+        "errors": errors,
     }
-    thr_eff = pd.Series(base_thr, index=df.index, dtype=float) * df["regime"].map(mult_map).astype(float).fillna(1.0)
-    alerts = derive_alerts(df["prob_breach7d"], thr_eff, persist_k, cooldown_h)
 
-    df["threshold_eff"] = thr_eff
-    df["alert_flag"] = alerts
 
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    out_path = OUT_DIR / "kpis_breach7d_tuned.csv"
-    df.to_csv(out_path, index=True)
-    return {"path": str(out_path)}
+@app.get("/api/cache_stats")
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    return {
+        "kpis": _kpis_cache.stats(),
+        "shared_kpis": _shared_cache.stats(),
+        "summary": _summary_cache.stats(),
+        "fleet": _fleet_cache.stats(),
+        "alerts": {**_alert_cache.stats(), **{f"{kind}_updates": n for kind, n in _alert_updates.items()}},
+        "priors": {**_priors_cache.stats(), **{f"{kind}_updates": n for kind, n in _priors_updates.items()}},
+    }
+
+
+@app.get("/api/compute_stats")
+async def get_compute_stats() -> Dict[str, int]:
+    return _compute.stats()
+
+
+@app.get("/metrics")
+async def get_metrics() -> Response:
+    """Prometheus text exposition: latency histograms per route and stage, compute pool and cache counters."""
+    pool = _compute.stats()
+    caches = get_cache_stats()
+    lines = REQUESTS.render() + STAGES.render()
+    lines += render_values(
+        "jazan_compute_tasks",
+        "Compute pool tasks running or waiting for a thread.",
+        "gauge",
+        {(("state", state),): pool[state] for state in ("running", "queued")},
+    )
+    lines += render_values(
+        "jazan_compute_requests_total",
+        "Compute requests submitted to the pool, coalesced onto in-flight work, or rejected with 503.",
+        "counter",
+        {(("outcome", outcome),): pool[outcome] for outcome in ("submitted", "coalesced", "rejected")},
+    )
+    lines += render_values(
+        "jazan_cache_lookups_total",
+        "Cache lookups by cache and result.",
+        "counter",
+        {(("cache", name), ("result", result)): stats[result] for name, stats in caches.items() for result in ("hits", "misses")},
+    )
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
 
 
 @app.get("/health")
@@ -0,0 +1,172 @@
+# Read-only KPI columns in one memory-mapped file shared by every API worker
+#
+#   python -m backend.shared_kpis            # (re)build next to the KPI store
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import kpi_store
+from .alerts import index_ns
+from .caching import FileVersion, file_version
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks (Windows); concurrent rebuilds still swap in whole files
+    fcntl = None
+
+# What /api/kpis reads. Anything else stays on the per-process path.
+SHARED_COLUMNS = ("prob_breach7d", "regime", "dp_excess_mbar", "health_score")
+SUFFIX = ".kpimm"
+MAGIC = b"JZKPIMM1"
+# Every array starts on a 64-byte boundary so the mapped views are aligned.
+ALIGN = 64
+
+
+def shared_path(store: Path) -> Path:
+    return store.with_suffix(SUFFIX)
+
+
+def _padding(offset: int) -> int:
+    return -offset % ALIGN
+
+
+def write_shared(df: pd.DataFrame, path: Path, source: FileVersion) -> Path:
+    """Write the ``ts`` index and ``SHARED_COLUMNS`` of ``df`` as one mappable file.
+
+    Layout: magic, header length (little-endian uint64), a JSON header giving
+    each array's dtype and offset, then the raw arrays. ``regime`` is stored as
+    int8 category codes. The file is written aside and swapped in with
+    ``os.replace``, so readers see either the old file or the new one; workers
+    that still map the old one keep a valid view until they reopen.
+    """
+    arrays: Dict[str, np.ndarray] = {"ts": index_ns(df.index)}
+    categories: List[str] = []
+    for col in SHARED_COLUMNS:
+        if col not in df.columns:
+            continue
+        if col == "regime":
+            regime = df[col].astype("category")
+            categories = [str(c) for c in regime.cat.categories]
+            arrays[col] = regime.cat.codes.to_numpy(dtype=np.int8)
+        else:
+            arrays[col] = df[col].to_numpy(dtype=np.float64)
+
+    columns = {}
+    offset = 0
+    for name, arr in arrays.items():
+        columns[name] = {"dtype": arr.dtype.str, "offset": offset}
+        offset += arr.nbytes + _padding(arr.nbytes)
+    header = json.dumps(
+        {"rows": len(df), "source": list(source), "categories": categories, "columns": columns}
+    ).encode()
+    header += b" " * _padding(len(MAGIC) + 8 + len(header))
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as handle:
+        handle.write(MAGIC)
+        handle.write(np.uint64(len(header)).tobytes())
+        handle.write(header)
+        for arr in arrays.values():
+            handle.write(np.ascontiguousarray(arr).tobytes())
+            handle.write(b"\0" * _padding(arr.nbytes))
+    tmp.replace(path)
+    return path
+
+
+def _read_header(buf: np.ndarray) -> Tuple[dict, int]:
+    if bytes(buf[: len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a shared KPI file.")
+    size = int(buf[len(MAGIC) : len(MAGIC) + 8].view("<u8")[0])
+    start = len(MAGIC) + 8
+    return json.loads(bytes(buf[start : start + size])), start + size
+
+
+def open_shared(path: Path) -> Tuple[pd.DataFrame, FileVersion]:
+    """Map ``path`` and return ``(frame, source_version)`` without copying any column.
+
+    The frame's arrays are read-only views of the mapping, so every process
+    that opens the same file shares its pages through the OS page cache.
+    """
+    buf = np.memmap(path, dtype=np.uint8, mode="r")
+    header, data = _read_header(buf)
+    rows = header["rows"]
+
+    def column(name: str) -> np.ndarray:
+        spec = header["columns"][name]
+        dtype = np.dtype(spec["dtype"])
+        lo = data + spec["offset"]
+        return buf[lo : lo + rows * dtype.itemsize].view(dtype)
+
+    index = pd.DatetimeIndex(column("ts").view("datetime64[ns]"), name="ts", copy=False)
+    values = {}
+    for name in header["columns"]:
+        if name == "regime":
+            values[name] = pd.Categorical.from_codes(column(name), header["categories"], validate=False)
+        elif name != "ts":
+            values[name] = column(name)
+    frame = pd.DataFrame(values, index=index, copy=False)
+    return frame, tuple(header["source"])
+
+
+def source_version(path: Path) -> Optional[FileVersion]:
+    """The store version ``path`` was built from, reading only its header."""
+    if not path.exists():
+        return None
+    with path.open("rb") as handle:
+        prefix = handle.read(len(MAGIC) + 8)
+        if prefix[: len(MAGIC)] != MAGIC:
+            return None
+        size = int(np.frombuffer(prefix[len(MAGIC) :], dtype="<u8")[0])
+        return tuple(json.loads(handle.read(size))["source"])
+
+
+@contextmanager
+def _exclusive(path: Path) -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    with path.open("a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def refresh(store: Path, path: Optional[Path] = None) -> Path:
+    """Rebuild the shared file when ``store`` has changed since it was written.
+
+    Workers that notice a stale file queue on a lock; the first one rebuilds
+    and the rest find it current and return.
+    """
+    path = path or shared_path(store)
+    with _exclusive(path.with_name(path.name + ".lock")):
+        version = file_version(store)
+        if source_version(path) != version:
+            write_shared(kpi_store.read_kpis(store, SHARED_COLUMNS), path, version)
+    return path
+
+
+def main() -> None:
+    from .server import kpis_store_path
+
+    parser = argparse.ArgumentParser(description="Build the memory-mapped KPI file the API workers share.")
+    parser.add_argument("--store", type=Path, default=None, help="KPI store (default: the API's)")
+    args = parser.parse_args()
+
+    store = args.store or kpis_store_path()
+    path = refresh(store)
+    frame, _ = open_shared(path)
+    print(f"{path}: {len(frame):,d} rows, {path.stat().st_size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
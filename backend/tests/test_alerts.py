@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend import server
+from backend.alerts import AlertState, advance_alerts, cooldown_ns, fire_indices
+from backend.benchmarks.synthetic import make_kpi_frame
+
+STEP_NS = 15 * 60 * 10**9
+
+
+def reference_fires(above, times_ns, persist_k, cooldown):
+    """The notebook's while-loop ``derive_alerts``, on raw arrays."""
+    fires, i, n = [], 0, len(above)
+    while i < n:
+        if above[i]:
+            j = i
+            while j < n and above[j]:
+                j += 1
+            if j - i >= persist_k:
+                fire = i + persist_k - 1
+                fires.append(fire)
+                while j < n and times_ns[j] < times_ns[fire] + cooldown:
+                    j += 1
+            i = j
+        else:
+            i += 1
+    return np.asarray(fires, dtype=np.int64)
+
+
+def random_series(rng, n):
+    """Probabilities with NaN gaps, and sorted timestamps with duplicates and outages."""
+    prob = np.clip(rng.normal(0.5, 0.3, n), 0, 1)
+    prob[rng.random(n) < 0.05] = np.nan
+    steps = rng.choice([0, 1, 1, 1, 1, 1, 40], size=n).astype(np.int64)  # 0: duplicate, 40: outage
+    times = np.cumsum(steps) * STEP_NS
+    return prob, times
+
+
+def stream(above, times, persist_k, cooldown_h, cuts):
+    state = AlertState(persist_k, cooldown_h)
+    fires = []
+    for lo, hi in zip(cuts[:-1], cuts[1:]):
+        state, new = advance_alerts(state, above[lo:hi], times[lo:hi])
+        fires.append(new)
+    return state, np.concatenate(fires)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_batch_splits_match_full_recompute(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(50, 2000))
+    prob, times = random_series(rng, n)
+    above = prob >= 0.45  # NaN probabilities are never above threshold
+    persist_k = int(rng.integers(1, 8))
+    cooldown_h = float(rng.choice([0, 0.25, 1, 6, 48]))
+    expected = fire_indices(above, times, persist_k, cooldown_ns(cooldown_h))
+    np.testing.assert_array_equal(expected, reference_fires(above, times, persist_k, cooldown_ns(cooldown_h)))
+
+    cuts = np.unique(np.concatenate(([0, n], rng.integers(0, n, size=int(rng.integers(1, 30))))))
+    state, fires = stream(above, times, persist_k, cooldown_h, cuts)
+    np.testing.assert_array_equal(fires, expected)
+    assert state.processed == n and state.last_ts == times[-1]
+
+
+def test_single_row_batches_match_full_recompute():
+    rng = np.random.default_rng(99)
+    prob, times = random_series(rng, 600)
+    above = prob >= 0.4
+    expected = fire_indices(above, times, 3, cooldown_ns(2))
+    _, fires = stream(above, times, 3, 2, np.arange(len(above) + 1))
+    np.testing.assert_array_equal(fires, expected)
+
+
+@pytest.mark.parametrize("cut", [1, 2, 3, 4, 5, 6, 7])
+def test_cooldown_straddling_a_batch_boundary(cut):
+    # Fires on point 1; the 1 h cooldown ends at point 5, mid-run, which then counts as a fresh run.
+    above = np.array([1, 1, 1, 0, 1, 1, 1, 1, 1, 1, 0, 0], dtype=bool)
+    times = np.arange(len(above), dtype=np.int64) * STEP_NS
+    _, fires = stream(above, times, 2, 1.0, np.array([0, cut, len(above)]))
+    np.testing.assert_array_equal(fires, [1, 6])
+
+
+def test_duplicate_timestamps_across_a_batch_boundary():
+    above = np.ones(8, dtype=bool)
+    above[3] = False
+    times = np.array([0, 0, 0, 1, 1, 1, 1, 2], dtype=np.int64) * STEP_NS
+    expected = fire_indices(above, times, 2, cooldown_ns(0.25))
+    for cut in range(1, len(above)):
+        _, fires = stream(above, times, 2, 0.25, np.array([0, cut, len(above)]))
+        np.testing.assert_array_equal(fires, expected)
+
+
+class TestTunedAlertsCache:
+    PARAMS = dict(base_thr=0.2, persist_k=3, cooldown_h=12, mult_map=server.regime_multipliers(1.0, 1.1, 1.2, 1.3))
+
+    @pytest.fixture(autouse=True)
+    def clean_cache(self):
+        server._alert_cache.clear()
+        yield
+        server._alert_cache.clear()
+
+    @staticmethod
+    def frame(days):
+        df = make_kpi_frame(years=days / 365)
+        df["regime"] = df["regime"].astype("category")
+        return df
+
+    def tuned(self, df, version):
+        """Cached result for ``version``, checked against an uncached recompute; returns the update kind."""
+        before = dict(server._alert_updates)
+        thr, flags = server.tuned_alerts(df, version, **self.PARAMS)
+        kinds = [kind for kind, n in server._alert_updates.items() if n != before[kind]]
+        fresh_thr, fresh_flags = server.tuned_alerts(df, None, **self.PARAMS)
+        pd.testing.assert_series_equal(thr, fresh_thr)
+        pd.testing.assert_series_equal(flags, fresh_flags)
+        return kinds[0] if kinds else None
+
+    def test_appended_rows_are_processed_incrementally(self):
+        df = self.frame(60)
+        assert self.tuned(df.iloc[:4000], (1, 1)) == "full"
+        assert self.tuned(df.iloc[:4001], (2, 2)) == "incremental"
+        assert self.tuned(df, (3, 3)) == "incremental"
+
+    @pytest.mark.parametrize(
+        "rewrite",
+        [
+            lambda df: df.iloc[100:],  # history trimmed at the front
+            lambda df: df.iloc[:3000],  # store shrank
+            lambda df: df.drop(df.index[3999]),  # last processed row gone
+            lambda df: df.set_axis(df.index + pd.Timedelta(minutes=5)),  # timestamps moved
+        ],
+    )
+    def test_rewritten_history_is_recomputed(self, rewrite):
+        df = self.frame(60)
+        self.tuned(df.iloc[:4000], (1, 1))
+        assert self.tuned(rewrite(df), (2, 2)) == "full"
+
+    def test_unchanged_version_is_served_from_the_cache(self):
+        df = self.frame(30)
+        assert self.tuned(df, (1, 1)) == "full"
+        assert self.tuned(df, (1, 1)) is None
+
+    def test_alert_flags_match_derive_alerts(self):
+        df = self.frame(60)
+        self.tuned(df, (1, 1))
+        _, flags = server.tuned_alerts(df, (1, 1), **self.PARAMS)
+        thr = df["regime"].map(self.PARAMS["mult_map"]).astype(float) * self.PARAMS["base_thr"]
+        expected = server.derive_alerts(df["prob_breach7d"], thr, self.PARAMS["persist_k"], self.PARAMS["cooldown_h"])
+        np.testing.assert_array_equal(flags.to_numpy(), expected.to_numpy())
+
+
+class TestRegimePriors:
+    @pytest.fixture(autouse=True)
+    def clean_cache(self):
+        server._priors_cache.clear()
+        yield
+        server._priors_cache.clear()
+
+    @staticmethod
+    def priors(df, version):
+        """Cached priors for ``version``, checked against a full groupby; returns the update kind."""
+        before = dict(server._priors_updates)
+        priors = server.regime_priors(df, version)
+        kinds = [kind for kind, n in server._priors_updates.items() if n != before[kind]]
+        expected = df.groupby("regime", observed=True)["prob_breach7d"].mean().to_dict()
+        assert list(priors) == list(expected)
+        assert priors == pytest.approx(expected, rel=1e-12, nan_ok=True)
+        return kinds[0] if kinds else None
+
+    @pytest.fixture
+    def df(self):
+        df = TestTunedAlertsCache.frame(60)
+        df.loc[df.index[::7], "prob_breach7d"] = np.nan
+        return df
+
+    def test_appended_rows_are_added_to_the_totals(self, df):
+        assert self.priors(df.iloc[:4000], (1, 1)) == "full"
+        assert self.priors(df.iloc[:4000], (1, 1)) is None
+        assert self.priors(df.iloc[:4500], (2, 2)) == "incremental"
+        assert self.priors(df, (3, 3)) == "incremental"
+
+    def test_rewritten_history_is_regrouped(self, df):
+        self.priors(df.iloc[:4000], (1, 1))
+        assert self.priors(df.iloc[100:], (2, 2)) == "full"
+
+    def test_new_regime_in_appended_rows_is_regrouped(self, df):
+        df["regime"] = df["regime"].cat.add_categories("commissioning")
+        df.loc[df.index[-10:], "regime"] = "commissioning"
+        self.priors(df.iloc[:4000], (1, 1))
+        assert self.priors(df, (2, 2)) == "full"
+
+    def test_regime_without_probabilities_has_a_nan_prior(self, df):
+        df.loc[df["regime"] == df["regime"].iloc[0], "prob_breach7d"] = np.nan
+        assert self.priors(df, (1, 1)) == "full"
@@ -0,0 +1,34 @@
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from backend import autoencoder
+from backend.autoencoder import AutoencoderScorer
+
+
+class _Scaler:
+    def transform(self, X):
+        return X
+
+
+def test_cli_loads_model_and_manifest_from_artifacts(tmp_path, monkeypatch):
+    art = tmp_path / "artifacts"
+    art.mkdir()
+    (art / "manifest.json").write_text(json.dumps({"lstm_cols": ["a", "b"], "lstm_window": 4}))
+    src, out = tmp_path / "src.parquet", tmp_path / "errors.npy"
+    pd.DataFrame({"a": np.arange(20.0), "b": np.ones(20)}).to_parquet(src)
+    loaded = []
+
+    def load(cls, art_dir, manifest, batch_size):
+        loaded.append(art_dir)
+        # Reconstruct every window perfectly: all errors are zero.
+        return cls(lambda batch: batch, _Scaler(), _Scaler(), manifest["lstm_cols"], manifest["lstm_window"], batch_size)
+
+    monkeypatch.setattr(AutoencoderScorer, "load", classmethod(load))
+    monkeypatch.setattr(sys, "argv", ["autoencoder", "--src", str(src), "--out", str(out), "--artifacts", str(art)])
+    autoencoder.main()
+    assert loaded == [art]
+    errors = np.load(out)
+    assert errors.shape == (20 - 4 + 1,) and not errors.any()
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from backend.caching import FileCache
+
+
+class SlowLoader:
+    """Loader that blocks on ``gate`` for paths named ``slow*`` and counts its calls."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, path, *args):
+        self.calls += 1
+        if path.name.startswith("slow"):
+            self.started.set()
+            assert self.gate.wait(5)
+        if self.fail:
+            raise ValueError("unreadable")
+        return path.read_text()
+
+
+@pytest.fixture
+def files(tmp_path):
+    slow, fast = tmp_path / "slow.json", tmp_path / "fast.json"
+    slow.write_text("slow")
+    fast.write_text("fast")
+    return slow, fast
+
+
+def start(fn, *args):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(fn(*args)), daemon=True)
+    thread.start()
+    return thread, results
+
+
+def test_slow_load_does_not_block_other_keys(files):
+    slow, fast = files
+    loader = SlowLoader()
+    cache = FileCache(loader)
+    cache.get(fast)
+
+    thread, _ = start(cache.get, slow)
+    assert loader.started.wait(5)
+    began = time.perf_counter()
+    assert cache.get(fast)[0] == "fast"  # hit while the slow key is loading
+    assert cache.get(fast, "other columns")[0] == "fast"  # and a miss on another key
+    assert time.perf_counter() - began < 1
+    loader.gate.set()
+    thread.join(5)
+    assert cache.stats()["hits"] == 1
+
+
+def test_concurrent_misses_share_one_load(files):
+    slow, _ = files
+    loader = SlowLoader()
+    cache = FileCache(loader)
+    threads = [start(cache.get, slow) for _ in range(4)]
+    assert loader.started.wait(5)
+    while cache.stats()["coalesced"] < 3:
+        time.sleep(0.01)
+    loader.gate.set()
+    for thread, results in threads:
+        thread.join(5)
+        assert results[0][0] == "slow"
+    assert loader.calls == 1
+    assert cache.stats() == {"hits": 0, "misses": 1, "coalesced": 3, "entries": 1}
+
+
+def test_failed_load_reaches_waiters_and_is_retried(files):
+    slow, _ = files
+    loader = SlowLoader()
+    loader.fail = True
+    cache = FileCache(loader)
+    errors = []
+    waiter = threading.Thread(target=lambda: errors.append(pytest.raises(ValueError, cache.get, slow)), daemon=True)
+    owner = threading.Thread(target=lambda: errors.append(pytest.raises(ValueError, cache.get, slow)), daemon=True)
+    owner.start()
+    assert loader.started.wait(5)
+    waiter.start()
+    while cache.stats()["coalesced"] < 1:
+        time.sleep(0.01)
+    loader.gate.set()
+    owner.join(5)
+    waiter.join(5)
+    assert len(errors) == 2 and cache.stats()["entries"] == 0
+
+    loader.fail = False
+    assert cache.get(slow)[0] == "slow"
+    assert loader.calls == 2
+
+
+def test_changed_file_is_reloaded(files):
+    _, fast = files
+    loader = SlowLoader()
+    cache = FileCache(loader)
+    value, version = cache.get(fast)
+    fast.write_text("fast, longer")
+    new_value, new_version = cache.get(fast)
+    assert (value, new_value) == ("fast", "fast, longer")
+    assert new_version != version and loader.calls == 2
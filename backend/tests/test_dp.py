@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.dp import DP_COLUMNS, SMOOTH_STEPS, StreamingDP, dp_features
+from backend.benchmarks.synthetic import DP_COL, make_kpi_frame
+
+REPO_MANIFEST = Path(__file__).resolve().parents[1] / "outputs" / "artifacts" / "manifest.json"
+
+
+@pytest.mark.parametrize(
+    "manifest, dt_hours, smooth_steps",
+    [
+        ({"dt_hours": 0.25, "labeling_params": {"dp_smooth_hours": 4.0}}, 0.25, 16),
+        ({"dt_hours": 0.5, "labeling_params": {"dp_smooth_hours": 2.0}}, 0.5, 4),
+        ({"dt_hours": 0.25, "labeling_params": {"dp_smooth_hours": 0.1}}, 0.25, 1),
+        ({"dt_hours": 0.25, "labeling_params": {"event_cooldown_days": 7}}, 0.25, SMOOTH_STEPS),
+        ({"dt_hours": 0.25}, 0.25, SMOOTH_STEPS),
+        ({}, 0.25, SMOOTH_STEPS),
+    ],
+)
+def test_from_manifest_reads_labeling_params(manifest, dt_hours, smooth_steps):
+    state = StreamingDP.from_manifest(manifest)
+    assert state.dt_hours == dt_hours
+    assert state.smooth.window == smooth_steps
+
+
+def test_repo_manifest_smoothing():
+    manifest = json.loads(REPO_MANIFEST.read_text())
+    hours = manifest["labeling_params"]["dp_smooth_hours"]
+    assert StreamingDP.from_manifest(manifest).smooth.window == round(hours / manifest["dt_hours"])
+
+
+@pytest.mark.parametrize("smooth_hours", [1.0, 2.0, 6.0])
+def test_streamed_features_match_pandas(tmp_path, smooth_hours):
+    dp = make_kpi_frame(years=40 / 365)[DP_COL]
+    rng = np.random.default_rng(0)
+    dp[rng.random(len(dp)) < 0.02] = np.nan
+    dp.iloc[1000:1200] = np.nan
+    manifest = {"dt_hours": 0.25, "labeling_params": {"dp_smooth_hours": smooth_hours}}
+    state = StreamingDP.from_manifest(manifest)
+    expected = dp_features(dp, 0.25, state.smooth.window)
+
+    parts, checkpoint = [], tmp_path / "dp_state.pkl"
+    for batch in np.array_split(np.arange(len(dp)), 5):
+        # Overlapping the previous batch: already-seen samples are skipped.
+        parts.append(state.run(dp.iloc[max(batch[0] - 10, 0) : batch[-1] + 1]))
+        state.save(checkpoint)
+        state = StreamingDP.load(checkpoint)
+    streamed = pd.concat(parts)
+
+    assert streamed.index.equals(expected.index)
+    for col in DP_COLUMNS:
+        np.testing.assert_array_equal(streamed[col].to_numpy(), expected[col].to_numpy(), err_msg=col)
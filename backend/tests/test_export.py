@@ -0,0 +1,87 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import kpi_store, server
+from backend.benchmarks.synthetic import make_kpi_frame
+
+
+@pytest.fixture
+def fleet(tmp_path, monkeypatch):
+    """Two asset stores: A1 with every column, A2 (CSV) without ``health_score``."""
+    frame = make_kpi_frame(years=0.05)
+    kpi_store.write_kpis(frame, kpi_store.store_path(tmp_path / "A1", ".parquet"))
+    kpi_store.write_kpis(frame.drop(columns="health_score"), kpi_store.store_path(tmp_path / "A2", ".csv"))
+    monkeypatch.setattr(server, "ASSETS_DIR", tmp_path)
+    monkeypatch.setattr(server, "EXPORT_CHUNK_ROWS", 500)
+    return tmp_path, frame
+
+
+def _download(file_format, assets=("A1", "A2")):
+    client = TestClient(server.app)
+    return client.get("/api/export_kpis", params={"download": "true", "format": file_format, "asset": list(assets)})
+
+
+def test_csv_export_aligns_columns_across_assets(fleet):
+    _, frame = fleet
+    response = _download("csv")
+    assert response.status_code == 200
+    out = pd.read_csv(io.StringIO(response.text))
+    assert len(out) == 2 * len(frame)
+    a2 = out[out["asset_id"] == "A2"]
+    assert a2["health_score"].isna().all()
+    assert set(out["regime"].unique()) <= {"normal", "low_load", "shutdown", "post_startup"}
+    np.testing.assert_allclose(a2["score_blended"].to_numpy(), frame["score_blended"].to_numpy())
+
+
+def test_parquet_export_aligns_columns_across_assets(fleet):
+    _, frame = fleet
+    response = _download("parquet")
+    assert response.status_code == 200
+    out = pd.read_parquet(io.BytesIO(response.content))
+    assert len(out) == 2 * len(frame)
+    assert out.loc[out["asset_id"] == "A2", "health_score"].isna().all()
+    assert out.loc[out["asset_id"] == "A1", "health_score"].notna().all()
+
+
+def test_incompatible_column_types_are_refused_before_streaming(fleet):
+    root, frame = fleet
+    kpi_store.write_kpis(frame.assign(health_score="offline"), kpi_store.store_path(root / "A3", ".csv"))
+    response = _download("parquet", ("A1", "A3"))
+    assert response.status_code == 422
+    assert "health_score" in response.json()["detail"]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("2022-01-02T00:00:00Z", pd.Timestamp("2022-01-02 00:00")),
+        ("2022-01-02T01:00:00+01:00", pd.Timestamp("2022-01-02 00:00")),
+        ("2022-01-02 00:00", pd.Timestamp("2022-01-02 00:00")),
+    ],
+)
+def test_timestamps_are_normalised_to_naive_utc(value, expected):
+    ts = server._timestamp("start", value)
+    assert ts == expected and ts.tzinfo is None
+
+
+@pytest.mark.parametrize("value", ["garbage", "NaT"])
+def test_invalid_timestamps_are_422(value):
+    with pytest.raises(server.HTTPException) as exc:
+        server._timestamp("start", value)
+    assert exc.value.status_code == 422
+
+
+def test_tz_aware_range_exports(fleet, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "OUT_DIR", tmp_path / "out")
+    client = TestClient(server.app)
+    params = {"asset": "A1", "start": "2022-01-02T01:00:00+01:00", "end": "2022-01-03T00:00:00Z"}
+    streamed = client.get("/api/export_kpis", params={**params, "download": "true"})
+    assert streamed.status_code == 200
+    out = pd.read_csv(io.StringIO(streamed.text), parse_dates=["ts"])
+    assert out["ts"].min() == pd.Timestamp("2022-01-02") and out["ts"].max() == pd.Timestamp("2022-01-03")
+    written = client.get("/api/export_kpis", params=params)
+    assert written.status_code == 200
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from backend.benchmarks.synthetic import DP_COL, make_kpi_frame
+from backend.feature_plan import FeaturePlan
+
+COLUMNS = [
+    f"{DP_COL}_mean_w8",
+    f"{DP_COL}_std_w32",
+    f"{DP_COL}_ptp_w96",
+    f"{DP_COL}_slope_w32",
+    f"{DP_COL}_lag4",
+    f"{DP_COL}_mean_w8",  # repeated column
+    "dp_excess_mbar_max_w8",
+    "missing_tag_mean_w8",
+    "missing_tag",
+    "health_score",
+    "regime_normal",
+    "regime_shutdown",
+]
+
+
+@pytest.fixture
+def frame():
+    df = make_kpi_frame(years=10 / 365)
+    rng = np.random.default_rng(1)
+    df.loc[rng.random(len(df)) < 0.03, DP_COL] = np.nan
+    df.iloc[200:260, df.columns.get_loc(DP_COL)] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("batch", [1, 7, 96, 500])
+def test_streamed_batches_match_evaluate(frame, batch):
+    plan = FeaturePlan.compile(COLUMNS)
+    engine = plan.streaming()
+    streamed = np.vstack([plan.run(engine, frame.iloc[i : i + batch]) for i in range(0, len(frame), batch)])
+    expected = plan.evaluate(frame)
+    assert streamed.shape == expected.shape == (len(frame), len(COLUMNS))
+    np.testing.assert_array_equal(np.isnan(streamed), np.isnan(expected))
+    np.testing.assert_allclose(streamed, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_run_without_regime_column(frame):
+    plan = FeaturePlan.compile(COLUMNS)
+    X = plan.run(plan.streaming(), frame.drop(columns="regime"))
+    assert np.isnan(X[:, COLUMNS.index("regime_normal")]).all()
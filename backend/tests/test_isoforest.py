@@ -0,0 +1,72 @@
+import json
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from backend import isoforest
+from backend.benchmarks.synthetic import DP_COL, make_kpi_frame
+
+FEATURES = [DP_COL, "health_score", "prob_breach7d"]
+
+
+@pytest.fixture
+def frame():
+    return make_kpi_frame(years=5 / 365)
+
+
+@pytest.fixture
+def artifacts(tmp_path, frame):
+    """A small IsolationForest fitted on named columns, with its min-max scaler and manifest."""
+    art = tmp_path / "artifacts"
+    art.mkdir()
+    model = make_pipeline(StandardScaler(), IsolationForest(n_estimators=20, random_state=0)).fit(frame[FEATURES])
+    joblib.dump(model, art / "isoforest_pipeline.joblib")
+    raw = -model.decision_function(frame[FEATURES])
+    joblib.dump(MinMaxScaler().fit(raw.reshape(-1, 1)), art / "isoforest_minmax.joblib")
+    manifest = {"if_features": FEATURES, "dp_column": DP_COL, "dt_hours": 0.25}
+    (art / "manifest.json").write_text(json.dumps(manifest))
+    isoforest._models.clear()
+    yield art
+    isoforest._models.clear()
+
+
+def test_cli_reads_the_manifest_from_artifacts(tmp_path, monkeypatch, frame, artifacts):
+    src, out = tmp_path / "src.parquet", tmp_path / "score_if.parquet"
+    frame.to_parquet(src)
+    monkeypatch.setattr(sys, "argv", ["isoforest", "--src", str(src), "--out", str(out), "--artifacts", str(artifacts), "--jobs", "1"])
+    isoforest.main()
+    scores = pd.read_parquet(out)["score_if"]
+    manifest = json.loads((artifacts / "manifest.json").read_text())
+    expected = isoforest.score_if(frame, artifacts, manifest)
+    np.testing.assert_allclose(scores.to_numpy(), expected.to_numpy())
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_columns_follow_the_model_not_the_manifest_order(frame, artifacts, n_jobs):
+    manifest = {"if_features": FEATURES[::-1], "dp_column": DP_COL, "dt_hours": 0.25}
+    scores = isoforest.score_if(frame, artifacts, manifest, n_jobs=n_jobs, chunk_rows=100)
+    model = joblib.load(artifacts / "isoforest_pipeline.joblib")
+    minmax = joblib.load(artifacts / "isoforest_minmax.joblib")
+    expected = minmax.transform(-model.decision_function(frame[FEATURES]).reshape(-1, 1)).ravel()
+    np.testing.assert_allclose(scores.to_numpy(), expected)
+
+
+def test_derived_dp_columns_use_the_manifest_smoothing(tmp_path, frame):
+    features = [DP_COL, "dp_smooth_mbar"]
+    smoothed = frame[[DP_COL]].assign(dp_smooth_mbar=frame[DP_COL].rolling(24, min_periods=12).median()).dropna()
+    model = IsolationForest(n_estimators=20, random_state=0).fit(smoothed[features])
+    joblib.dump(model, tmp_path / "isoforest_pipeline.joblib")
+    minmax = MinMaxScaler().fit(-model.decision_function(smoothed[features]).reshape(-1, 1))
+    joblib.dump(minmax, tmp_path / "isoforest_minmax.joblib")
+    manifest = {"if_features": features, "dp_column": DP_COL, "dt_hours": 0.25, "labeling_params": {"dp_smooth_hours": 6.0}}
+
+    # The raw frame has no dp_smooth_mbar; it is derived with the manifest's 6-hour (24-sample) window.
+    scores = isoforest.score_if(frame[[DP_COL]], tmp_path, manifest)
+    expected = minmax.transform(-model.decision_function(smoothed[features]).reshape(-1, 1)).ravel()
+    np.testing.assert_allclose(scores.loc[smoothed.index].to_numpy(), expected)
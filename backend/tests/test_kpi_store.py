@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from backend import kpi_store
+from backend.benchmarks.synthetic import make_kpi_frame
+
+
+@pytest.fixture
+def frame():
+    return make_kpi_frame(years=3 / 365)
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".feather"])
+def test_reappending_a_batch_adds_no_duplicates(tmp_path, frame, suffix):
+    path = kpi_store.store_path(tmp_path, suffix)
+    assert kpi_store.append_kpis(frame.iloc[:100], path) == 100
+    assert kpi_store.append_kpis(frame.iloc[100:150], path) == 50
+    # A rerun recomputes the last batch, overlapping what is already stored.
+    assert kpi_store.append_kpis(frame.iloc[100:200], path) == 50
+    assert kpi_store.append_kpis(frame.iloc[120:140], path) == 0
+    stored = kpi_store.read_kpis(path)
+    assert stored.index.is_unique
+    assert stored.index.equals(frame.index[:200])
+
+
+def test_torn_csv_row_is_cut_before_appending(tmp_path, frame):
+    path = kpi_store.store_path(tmp_path, ".csv")
+    kpi_store.append_kpis(frame.iloc[:100], path)
+    kpi_store.append_kpis(frame.iloc[100:110], path)
+    with path.open("rb+") as handle:
+        handle.truncate(path.stat().st_size - 25)  # killed mid-row
+    assert kpi_store.append_kpis(frame.iloc[100:120], path) == 11
+    stored = kpi_store.read_kpis(path)
+    assert stored.index.equals(frame.index[:120])
+    pd.testing.assert_series_equal(stored["prob_breach7d"], frame["prob_breach7d"].iloc[:120], check_freq=False)
+
+
+def test_last_ts_of_header_only_csv(tmp_path, frame):
+    path = kpi_store.store_path(tmp_path, ".csv")
+    kpi_store.write_kpis(frame.iloc[:0], path)
+    assert kpi_store.append_kpis(frame.iloc[:5], path) == 5
+    assert kpi_store.read_kpis(path).index.equals(frame.index[:5])
+
+
+@pytest.mark.parametrize("block", [1, 7, 64, 1 << 16])
+def test_csv_last_ts_reads_back_across_blocks(tmp_path, frame, block):
+    path = kpi_store.store_path(tmp_path, ".csv")
+    kpi_store.write_kpis(frame.iloc[:50], path)
+    assert kpi_store._csv_last_ts(path, block) == frame.index[49]
+    with path.open("ab") as handle:
+        handle.write(b"2099-01-01 00:00:00,0.5")  # torn row
+    assert kpi_store._csv_last_ts(path, block) == frame.index[49]
+    assert path.read_bytes().endswith(b"\n")
@@ -0,0 +1,114 @@
+import json
+import pickle
+import sys
+
+import numpy as np
+import pytest
+
+from backend import kpi_store
+from backend.benchmarks.synthetic import make_kpi_frame
+from backend.pipeline import KPIPipeline, alerting_params, runner
+from backend.server import ART_DIR, OUT_DIR
+
+
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ({"persist_k": 3, "cooldown_hours": 48}, (5, 48.0)),
+        ({"persist_k": 8, "cooldown_hours": 24.5}, (8, 24.0)),
+        ({}, (5, 48.0)),
+    ],
+)
+def test_alerting_params_follow_the_notebook_export(params, expected):
+    # Phase 5: PERSIST_K = max(PERSIST_K, 5); COOLDOWN_H = int(...)
+    assert alerting_params({"alerting_params": params}) == expected
+
+
+def test_pipeline_alerting_matches_the_exported_summary():
+    manifest = json.loads((ART_DIR / "manifest.json").read_text())
+    summary = json.loads((OUT_DIR / "kpis_summary.json").read_text())
+    pipeline = KPIPipeline(None, manifest)
+    assert pipeline.persist_k == summary["persistence_k"]
+    assert pipeline.cooldown_h == summary["cooldown_hours"]
+
+
+def test_forward_fill_continues_across_batches():
+    nan = float("nan")
+    first = KPIPipeline._fill(np.array([[nan, 1.0], [2.0, nan]]), None, bootstrap=True)
+    np.testing.assert_array_equal(first, [[2.0, 1.0], [2.0, 1.0]])
+    second = KPIPipeline._fill(np.array([[nan, 3.0], [nan, nan]]), first[-1], bootstrap=False)
+    np.testing.assert_array_equal(second, [[2.0, 3.0], [2.0, 3.0]])
+    # Outside the bootstrap, leading gaps without a previous row stay NaN.
+    np.testing.assert_array_equal(KPIPipeline._fill(np.array([[nan], [4.0]]), None, bootstrap=False), [[nan], [4.0]])
+
+
+class _State:
+    """Stand-in for PipelineState: just the last processed timestamp."""
+
+    def __init__(self, last_ts=None):
+        self.last_ts = last_ts
+
+    def save(self, path):
+        path.write_bytes(pickle.dumps(self.last_ts))
+
+    @staticmethod
+    def load(path):
+        return _State(pickle.loads(path.read_bytes())) if path.exists() else None
+
+
+class _Pipeline:
+    """Stand-in for KPIPipeline: passes through the rows newer than its state."""
+
+    manifests = []
+
+    def __init__(self, models, manifest, state):
+        self.manifests.append(manifest)
+        self.state = state or _State()
+
+    def process(self, raw):
+        if self.state.last_ts is not None:
+            raw = raw[raw.index > self.state.last_ts]
+        self.state = _State(raw.index[-1] if len(raw) else self.state.last_ts)
+        return raw
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_pipeline_rerun_after_crash_before_state_save(tmp_path, monkeypatch, suffix):
+    frame = make_kpi_frame(years=3 / 365)
+    monkeypatch.setattr(runner, "KPIPipeline", _Pipeline)
+    monkeypatch.setattr(runner, "PipelineState", _State)
+    monkeypatch.setattr(runner.PipelineModels, "load", classmethod(lambda cls, *args: None))
+    store, state = kpi_store.store_path(tmp_path, suffix), tmp_path / "state.pkl"
+
+    def run(rows):
+        raw = tmp_path / "raw.parquet"
+        frame.iloc[:rows].rename_axis("ts").to_parquet(raw)
+        argv = ["pipeline", "--raw", str(raw), "--state", str(state), "--store", str(store), "--artifacts", str(tmp_path)]
+        monkeypatch.setattr(sys, "argv", argv)
+        runner.main()
+
+    run(100)
+    with monkeypatch.context() as crash:
+        crash.setattr(_State, "save", lambda self, path: (_ for _ in ()).throw(KeyboardInterrupt()))
+        with pytest.raises(KeyboardInterrupt):
+            run(150)  # rows appended, state never saved
+    run(200)
+    stored = kpi_store.read_kpis(store)
+    assert stored.index.is_unique
+    assert stored.index.equals(frame.index[:200])
+
+
+def test_pipeline_reads_the_manifest_next_to_its_artifacts(tmp_path, monkeypatch):
+    frame = make_kpi_frame(years=3 / 365)
+    monkeypatch.setattr(runner, "KPIPipeline", _Pipeline)
+    monkeypatch.setattr(runner, "PipelineState", _State)
+    loaded = []
+    monkeypatch.setattr(runner.PipelineModels, "load", classmethod(lambda cls, art_dir, manifest: loaded.append(art_dir)))
+    (tmp_path / "manifest.json").write_text('{"dp_column": "from-artifacts"}')
+    raw = tmp_path / "raw.parquet"
+    frame.iloc[:10].rename_axis("ts").to_parquet(raw)
+    argv = ["pipeline", "--raw", str(raw), "--state", str(tmp_path / "state.pkl")]
+    monkeypatch.setattr(sys, "argv", argv + ["--store", str(tmp_path / "kpis.csv"), "--artifacts", str(tmp_path)])
+    runner.main()
+    assert loaded == [tmp_path]
+    assert _Pipeline.manifests[-1] == {"dp_column": "from-artifacts"}